@@ -181,7 +181,7 @@ def main():
             # file2.txt is deleted (not in new_records)
         ]
         
-        memory_operations = csv_processor.generate_operations_from_records(old_records, new_records)
+        memory_operations = list(csv_processor.generate_operations_from_records(old_records, new_records))
         
         print(f"In-memory comparison found {len(memory_operations)} operations:")
         for op in memory_operations:
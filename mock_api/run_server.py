@@ -11,6 +11,7 @@ if __name__ == "__main__":
     print("Available endpoints:")
     print("  - GET  /                 : Health check")
     print("  - POST /updatePermissions : Get file permissions")
+    print("  - POST /updatePermissionsBulk : Get permissions for many files")
     print("  - POST /saveToDisk       : Save file with internal ID")
     print("  - GET  /pubSubFullList   : Get mock events")
     print("  - POST /reportResults    : Report sync results")
@@ -3,6 +3,7 @@ Mock API server for S3 sync service testing.
 
 Provides mock endpoints for:
 - updatePermissions: Mock permissions service
+- updatePermissionsBulk: Mock permissions service for many files at once
 - saveToDisk: File manager endpoint that saves files with internal ID
 - pubSubFullList: Mock event service that returns sync events
 """
@@ -29,6 +30,10 @@ class PermissionResponse(BaseModel):
     last_updated: datetime
 
 
+class BulkPermissionsRequest(BaseModel):
+    file_paths: List[str]
+
+
 class SaveToDiskResponse(BaseModel):
     internal_id: Optional[str] = None
     file_path: str
@@ -204,6 +209,26 @@ async def update_permissions(
         return updated_permissions
 
 
+@app.post("/updatePermissionsBulk")
+async def update_permissions_bulk(request: BulkPermissionsRequest) -> Dict[str, List[PermissionResponse]]:
+    """
+    Endpoint for retrieving the current permissions of many files in one call.
+    
+    Args:
+        request: Paths of the files to get permissions for
+        
+    Returns:
+        Dictionary with a PermissionResponse per requested file
+    """
+    if not request.file_paths:
+        raise HTTPException(status_code=400, detail="file_paths is required")
+    
+    return {
+        "permissions": [mock_generator.generate_permissions(file_path)
+                        for file_path in request.file_paths]
+    }
+
+
 @app.post("/saveToDisk")
 async def save_to_disk(
     operation: str = Form(...),  # 'create', 'update', 'rename', 'move', 'delete', 'get'
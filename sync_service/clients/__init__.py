@@ -1,5 +1,7 @@
 # Client packages
 from .s3_manager import S3Manager, S3Object
 from .infrastructure_api import InfrastructureAPI, InfrastructureAPIError
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
 
-__all__ = ['S3Manager', 'S3Object', 'InfrastructureAPI', 'InfrastructureAPIError']
\ No newline at end of file
+__all__ = ['S3Manager', 'S3Object', 'InfrastructureAPI', 'InfrastructureAPIError',
+           'CircuitBreaker', 'CircuitOpenError']
\ No newline at end of file
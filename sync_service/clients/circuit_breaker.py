@@ -0,0 +1,101 @@
+"""
+Circuit breaker for calls to remote services.
+
+After failure_threshold consecutive failures the circuit opens and calls fail
+immediately with CircuitOpenError instead of reaching the service. Once
+reset_timeout seconds have passed a single probe call is let through
+(half-open): success closes the circuit again, failure reopens it.
+"""
+
+import time
+import threading
+import logging
+from typing import Any, Callable
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open."""
+    pass
+
+
+class CircuitBreaker:
+    """Closed -> open -> half-open state machine guarding a remote dependency."""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a closed circuit breaker.
+        
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe is allowed
+            clock: Monotonic time source, replaceable in tests
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self) -> None:
+        """Close the circuit and forget previous failures."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failure_count = 0
+            self.opened_at = None
+    
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call fn through the breaker.
+        
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a probe
+                already in flight
+        """
+        with self._lock:
+            if self.state != self.CLOSED:
+                if self.state == self.HALF_OPEN or self.clock() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(
+                        f"Circuit open after {self.failure_count} consecutive failures"
+                    )
+                self.state = self.HALF_OPEN
+        
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._record_failure()
+            raise
+        except BaseException:
+            # An interrupted call says nothing about the service, but a probe
+            # must not leave the circuit half-open with nothing in flight
+            with self._lock:
+                if self.state == self.HALF_OPEN:
+                    self.state = self.OPEN
+                    self.opened_at = self.clock()
+            raise
+        
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.logger.info("Circuit closed after successful probe")
+            self.state = self.CLOSED
+            self.failure_count = 0
+            self.opened_at = None
+        return result
+    
+    def _record_failure(self) -> None:
+        """Count a failure, opening the circuit at the threshold or on a failed probe."""
+        with self._lock:
+            self.failure_count += 1
+            if self.state == self.HALF_OPEN or self.failure_count >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.logger.warning(
+                        f"Circuit opened after {self.failure_count} consecutive failures; "
+                        f"rejecting calls for {self.reset_timeout}s"
+                    )
+                self.state = self.OPEN
+                self.opened_at = self.clock()
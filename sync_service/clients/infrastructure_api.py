@@ -3,21 +3,97 @@ Infrastructure API client for communicating with file manager and mock server en
 
 Handles HTTP communication with retry logic and error handling for:
 - updatePermissions: Get file permissions from mock service
+- updatePermissionsBulk: Get permissions for many files at once
 - saveToDisk: Upload files to file manager with metadata
 - pubSubFullList: Get change events for incremental sync
 - reportResults: Report sync operation results
 """
 
+import io
 import time
 import json
-from typing import Dict, Any, List, BinaryIO, Optional
+from typing import Dict, Any, List, BinaryIO, Optional, Union
 from datetime import datetime
 import requests
 from requests.adapters import HTTPAdapter
+from requests.utils import super_len
+from urllib3.fields import RequestField
+from urllib3.filepost import choose_boundary
 from urllib3.util.retry import Retry
 import logging
 
 from ..models.data_models import PubSubEvent
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize values json does not handle natively, such as datetimes in metadata."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class _MultipartBody:
+    """
+    multipart/form-data request body that streams its file part.
+    
+    requests' files= encoder copies every part into one in-memory body, so an
+    upload briefly holds the content several times over. Here only the part
+    headers are encoded; bytes content is sent as-is and streams are read in
+    chunks. The length is known up front so the request keeps a Content-Length
+    header instead of switching to chunked transfer encoding. Seekable streams
+    are sent from their position at construction, and iterating again (as a
+    retry does) restarts the body there; non-seekable streams, such as S3
+    response bodies, are read once and need their size passed in.
+    """
+    
+    def __init__(self, fields: Dict[str, str], file_name: str,
+                 content: Union[BinaryIO, bytes, bytearray], file_type: str,
+                 size: Optional[int] = None, chunk_size: int = 64 * 1024):
+        boundary = choose_boundary()
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self.chunk_size = chunk_size
+        
+        head = []
+        for name, value in fields.items():
+            field = RequestField(name, value)
+            field.make_multipart()
+            head.append(f"--{boundary}\r\n{field.render_headers()}{value}\r\n")
+        file_field = RequestField("file", b"", filename=file_name)
+        file_field.make_multipart(content_type=file_type)
+        head.append(f"--{boundary}\r\n{file_field.render_headers()}")
+        self.head = "".join(head).encode("utf-8")
+        self.tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        
+        # Position to rewind to before each send; None for non-seekable streams
+        self.start = None
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            content_length = len(content)
+        elif getattr(content, 'seekable', lambda: False)():
+            self.start = content.tell()
+            content_length = content.seek(0, io.SEEK_END) - self.start
+            content.seek(self.start)
+        else:
+            # Streams that cannot report their length fall back to the caller's size
+            content_length = size if size is not None else super_len(content) or None
+            if content_length is None:
+                raise ValueError("size is required for a stream of unknown length")
+        self.content = content
+        self.length = len(self.head) + content_length + len(self.tail)
+    
+    def __len__(self) -> int:
+        return self.length
+    
+    def __iter__(self):
+        yield self.head
+        if isinstance(self.content, (bytes, bytearray, memoryview)):
+            yield self.content
+        else:
+            if self.start is not None:
+                self.content.seek(self.start)
+            while chunk := self.content.read(self.chunk_size):
+                yield chunk
+        yield self.tail
 
 
 class InfrastructureAPIError(Exception):
@@ -33,7 +109,8 @@ class InfrastructureAPI:
     retry logic, and proper file streaming support.
     """
     
-    def __init__(self, base_url: str, timeout: int = 30, max_retries: int = 3):
+    def __init__(self, base_url: str, timeout: int = 30, max_retries: int = 3,
+                 pool_maxsize: int = 10, circuit_breaker: Optional[CircuitBreaker] = None):
         """
         Initialize Infrastructure API client with base URL and configuration.
         
@@ -41,11 +118,16 @@ class InfrastructureAPI:
             base_url: Base URL for the infrastructure API server
             timeout: Request timeout in seconds
             max_retries: Maximum number of retry attempts
+            pool_maxsize: Keep-alive connections kept per host; should be at least
+                the number of threads sharing this client
+            circuit_breaker: Breaker guarding requests to the server; requests
+                fail fast while it is open (default: CircuitBreaker())
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
         self.max_retries = max_retries
         self.logger = logging.getLogger(__name__)
+        self._breaker = circuit_breaker or CircuitBreaker()
         
         # Configure session with retry strategy
         self.session = requests.Session()
@@ -58,7 +140,9 @@ class InfrastructureAPI:
             backoff_factor=1
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # Connections beyond pool_maxsize are closed after use instead of being
+        # reused, so concurrent callers would otherwise keep re-handshaking
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=pool_maxsize)
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
     
@@ -75,13 +159,16 @@ class InfrastructureAPI:
             Response object
             
         Raises:
-            InfrastructureAPIError: If request fails after retries
+            InfrastructureAPIError: If request fails after retries or the circuit is open
         """
         url = f"{self.base_url}{endpoint}"
         
         try:
             self.logger.debug(f"Making {method} request to {url}")
-            response = self.session.request(
+            # Only transport failures, including exhausted retries on 5xx
+            # responses, count towards opening the circuit
+            response = self._breaker.call(
+                self.session.request,
                 method=method,
                 url=url,
                 timeout=self.timeout,
@@ -96,7 +183,7 @@ class InfrastructureAPI:
             
             return response
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, CircuitOpenError) as e:
             error_msg = f"Infrastructure API request failed: {method} {url} - {str(e)}"
             self.logger.error(error_msg)
             raise InfrastructureAPIError(error_msg) from e
@@ -155,7 +242,44 @@ class InfrastructureAPI:
             self.logger.error(error_msg)
             raise InfrastructureAPIError(error_msg) from e
     
-    def save_to_disk(self, operation: str, file_path: str, file_stream: Optional[BinaryIO] = None,
+    def get_permissions_bulk(self, file_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the current permissions of many files with a single request.
+        
+        Args:
+            file_paths: Paths of the files to get permissions for
+        
+        Returns:
+            Dictionary mapping each file path to its permission information;
+            paths the service did not return are missing
+        
+        Raises:
+            InfrastructureAPIError: If the API call fails
+        """
+        if not file_paths:
+            return {}
+        
+        try:
+            self.logger.info(f"Getting permissions for {len(file_paths)} files")
+            
+            response = self._make_request(
+                method="POST",
+                endpoint="/updatePermissionsBulk",
+                json={"file_paths": list(file_paths)}
+            )
+            
+            return {
+                permissions_data["file_path"]: permissions_data
+                for permissions_data in response.json().get("permissions", [])
+            }
+            
+        except Exception as e:
+            error_msg = f"Failed to get permissions for {len(file_paths)} files: {str(e)}"
+            self.logger.error(error_msg)
+            raise InfrastructureAPIError(error_msg) from e
+    
+    def save_to_disk(self, operation: str, file_path: str, 
+                     file_stream: Optional[Union[BinaryIO, bytes, bytearray]] = None,
                      new_path: Optional[str] = None, size: Optional[int] = None, 
                      file_type: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -172,7 +296,7 @@ class InfrastructureAPI:
         Args:
             operation: Type of operation ('create', 'update', 'rename', 'move', 'delete', 'get')
             file_path: Original file path
-            file_stream: File stream (required for create/update operations)
+            file_stream: File stream or in-memory content (required for create/update operations)
             new_path: New path (required for rename/move operations)
             size: File size in bytes (optional)
             file_type: MIME type of the file (optional)
@@ -190,7 +314,7 @@ class InfrastructureAPI:
         if operation not in ['create', 'update', 'rename', 'move', 'delete', 'get']:
             raise ValueError("Invalid operation")
         
-        if operation in ['create', 'update'] and not file_stream:
+        if operation in ['create', 'update'] and file_stream is None:
             raise ValueError(f"{operation} operation requires file_stream")
         
         if operation in ['rename', 'move'] and not new_path:
@@ -212,22 +336,25 @@ class InfrastructureAPI:
             if file_type:
                 form_data["file_type"] = file_type
             if metadata:
-                form_data["metadata"] = json.dumps(metadata)
-            
-            # Prepare files for upload operations
-            files = None
-            if operation in ['create', 'update'] and file_stream:
-                # Reset stream position to beginning
-                if hasattr(file_stream, 'seek'):
-                    file_stream.seek(0)
-                files = {"file": (file_path, file_stream, file_type or "application/octet-stream")}
-            
-            response = self._make_request(
-                method="POST",
-                endpoint="/saveToDisk",
-                data=form_data,
-                files=files
-            )
+                form_data["metadata"] = json.dumps(metadata, default=_json_default)
+            
+            # Upload operations stream the content after the form fields
+            # instead of letting requests copy it into the encoded body
+            if operation in ['create', 'update'] and file_stream is not None:
+                body = _MultipartBody(form_data, file_path, file_stream,
+                                      file_type or "application/octet-stream", size=size)
+                response = self._make_request(
+                    method="POST",
+                    endpoint="/saveToDisk",
+                    data=body,
+                    headers={"Content-Type": body.content_type}
+                )
+            else:
+                response = self._make_request(
+                    method="POST",
+                    endpoint="/saveToDisk",
+                    data=form_data
+                )
             
             operation_response = response.json()
             self.logger.info(f"Operation {operation} completed successfully for {file_path}")
@@ -314,7 +441,8 @@ class InfrastructureAPI:
         
         try:
             self.logger.info("Reporting sync results to infrastructure")
-            self.logger.debug(f"Results data: {json.dumps(results, indent=2)}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Results data: {json.dumps(results, indent=2)}")
             
             response = self._make_request(
                 method="POST",
@@ -1,8 +1,10 @@
 """
 S3 client manager for handling dual S3 connections and operations.
 """
+import random
 import time
-from typing import Iterator, Dict, Any, BinaryIO, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Dict, Any, BinaryIO, Optional, Union
 from io import BytesIO
 import boto3
 from botocore.exceptions import ClientError, NoCredentialsError, EndpointConnectionError
@@ -11,9 +13,50 @@ from loguru import logger
 from ..models.config import S3Config
 
 
+# Objects at least this large are fetched as parallel byte ranges of this size
+RANGE_PART_SIZE = 16 * 1024 * 1024
+
+# Upper bound in seconds for a single retry backoff
+MAX_RETRY_DELAY = 30.0
+
+
+def _read_into(file_stream: BinaryIO, view: memoryview, chunk_size: int) -> int:
+    """Fill view from file_stream, returning the number of bytes read before EOF."""
+    readinto = getattr(file_stream, 'readinto', None)
+    size = len(view)
+    offset = 0
+    
+    while offset < size:
+        if readinto is not None:
+            count = readinto(view[offset:offset + chunk_size])
+        else:
+            chunk = file_stream.read(min(chunk_size, size - offset))
+            count = len(chunk)
+            view[offset:offset + count] = chunk
+        if not count:
+            break
+        offset += count
+    
+    return offset
+
+
+class ObjectChangedError(IOError):
+    """Raised when an object changes while it is being downloaded in parts."""
+    pass
+
+
+def _content_range_total(response: Dict[str, Any]) -> Optional[int]:
+    """Return the complete object size from a ranged GET's Content-Range, if reported."""
+    total = response.get('ContentRange', '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+
 class S3Object:
     """Represents an S3 object with metadata."""
     
+    # One instance is created per listed key, so skip the per-instance __dict__
+    __slots__ = ('key', 'size', 'last_modified', 'etag', 'storage_class')
+    
     def __init__(self, key: str, size: int, last_modified, etag: str, storage_class: str = 'STANDARD'):
         self.key = key
         self.size = size
@@ -50,8 +93,16 @@ class S3Manager:
             logger.error(f"Failed to create S3 client for {config.endpoint}: {e}")
             raise
     
-    def _retry_operation(self, operation, max_retries: int = 3, backoff_factor: float = 1.0):
-        """Execute an operation with exponential backoff retry logic."""
+    def _retry_operation(self, operation, max_retries: int = 3, backoff_factor: float = 1.0,
+                         sleep=time.sleep, rand=random.random):
+        """
+        Execute an operation with exponential backoff retry logic.
+        
+        Each backoff is stretched by up to half again at random so that workers
+        failing together do not retry in lockstep, and is capped at
+        MAX_RETRY_DELAY. sleep and rand can be replaced to drive the backoff
+        without waiting.
+        """
         for attempt in range(max_retries):
             try:
                 return operation()
@@ -60,36 +111,41 @@ class S3Manager:
                     logger.error(f"Operation failed after {max_retries} attempts: {e}")
                     raise
                 
-                wait_time = backoff_factor * (2 ** attempt)
-                logger.warning(f"Operation failed (attempt {attempt + 1}/{max_retries}), retrying in {wait_time}s: {e}")
-                time.sleep(wait_time)
+                wait_time = min(backoff_factor * (2 ** attempt) * (1 + 0.5 * rand()), MAX_RETRY_DELAY)
+                logger.warning(f"Operation failed (attempt {attempt + 1}/{max_retries}), retrying in {wait_time:.2f}s: {e}")
+                sleep(wait_time)
     
     def list_objects(self) -> Iterator[S3Object]:
         """
         List all objects in the customer bucket.
+        
+        Pages are requested one at a time and each request is retried on its
+        own, so a transient failure part-way through a large bucket resumes
+        from the same continuation token instead of failing the listing or
+        yielding objects twice.
             
         Yields:
             S3Object: Objects in the bucket
         """
-        client, bucket = self.customer_client, self.customer_config.bucket
-        
-        def _list_operation():
-            paginator = client.get_paginator('list_objects_v2')
-            page_iterator = paginator.paginate(Bucket=bucket)
-            
-            for page in page_iterator:
-                if 'Contents' in page:
-                    for obj in page['Contents']:
-                        yield S3Object(
-                            key=obj['Key'],
-                            size=obj['Size'],
-                            last_modified=obj['LastModified'],
-                            etag=obj['ETag'].strip('"'),
-                            storage_class=obj.get('StorageClass', 'STANDARD')
-                        )
+        client = self.customer_client
+        request = {'Bucket': self.customer_config.bucket}
         
         try:
-            yield from self._retry_operation(_list_operation)
+            while True:
+                page = self._retry_operation(lambda: client.list_objects_v2(**request))
+                
+                for obj in page.get('Contents', ()):
+                    yield S3Object(
+                        key=obj['Key'],
+                        size=obj['Size'],
+                        last_modified=obj['LastModified'],
+                        etag=obj['ETag'].strip('"'),
+                        storage_class=obj.get('StorageClass', 'STANDARD')
+                    )
+                
+                if not page.get('IsTruncated'):
+                    break
+                request['ContinuationToken'] = page['NextContinuationToken']
         except Exception as e:
             logger.error(f"Failed to list objects in customer bucket: {e}")
             raise
@@ -112,12 +168,137 @@ class S3Manager:
         
         try:
             stream = self._retry_operation(_get_operation)
-            logger.debug(f"Retrieved object stream for key: {key} from customer bucket")
+            logger.debug("Retrieved object stream for key: {} from customer bucket", key)
             return stream
         except Exception as e:
             logger.error(f"Failed to get object stream for key {key} from customer bucket: {e}")
             raise
     
+    def download_object(self, key: str, size: Optional[int] = None, etag: Optional[str] = None,
+                        chunk_size: int = 1024 * 1024) -> Union[bytes, bytearray]:
+        """
+        Download an object's content from customer bucket.
+        
+        When the size is known the body is read straight into a buffer of
+        exactly that size, avoiding the intermediate chunk list and final join
+        of a plain read(). Objects of RANGE_PART_SIZE or more are fetched with
+        get_object_ranged instead; if the object no longer matches the listed
+        size and ETag, it is downloaded whole with a single GET, so both paths
+        return the current content of one version.
+        
+        Args:
+            key: Object key in the bucket
+            size: Expected object size in bytes, if known
+            etag: ETag the object was listed with, if known
+            chunk_size: Maximum bytes read per call
+            
+        Returns:
+            The object content
+        """
+        if size and size >= RANGE_PART_SIZE:
+            try:
+                return self.get_object_ranged(key, size, etag=etag)
+            except ObjectChangedError as e:
+                logger.warning(f"Object {key} changed since it was listed, downloading it whole: {e}")
+                size = None
+        
+        file_stream = self.get_object_stream(key)
+        
+        if not size:
+            return file_stream.read()
+        
+        buffer = bytearray(size)
+        with memoryview(buffer) as view:
+            offset = _read_into(file_stream, view, chunk_size)
+        
+        if offset < size:
+            # Object shrank since it was listed
+            del buffer[offset:]
+        else:
+            # Object grew since it was listed; keep the extra data
+            remainder = file_stream.read()
+            if remainder:
+                buffer += remainder
+        
+        logger.debug("Downloaded {} bytes for key: {} from customer bucket", len(buffer), key)
+        return buffer
+    
+    def get_object_ranged(self, key: str, size: int, etag: Optional[str] = None,
+                          part_size: int = RANGE_PART_SIZE, workers: int = 8,
+                          chunk_size: int = 1024 * 1024) -> bytearray:
+        """
+        Download an object from customer bucket as concurrent byte-range GETs.
+        
+        Each part is written directly into its slice of a preallocated buffer.
+        Every range request carries If-Match with the object's ETag - the
+        listed one, or else the one returned for the first part - so all parts
+        come from the same version of the object, and each response's
+        Content-Range total must equal size.
+        
+        Args:
+            key: Object key in the bucket
+            size: Object size in bytes
+            etag: ETag the object was listed with, if known
+            part_size: Size of each byte range
+            workers: Maximum number of concurrent range requests
+            chunk_size: Maximum bytes read per call
+            
+        Returns:
+            The object content
+            
+        Raises:
+            ObjectChangedError: If the object was overwritten, or its size is
+                not size, before all parts were read
+        """
+        client, bucket = self.customer_client, self.customer_config.bucket
+        buffer = bytearray(size)
+        if_match = {}
+        if etag:
+            if_match['IfMatch'] = '"' + etag.strip('"') + '"'
+        
+        with memoryview(buffer) as view:
+            def _fetch_part(start: int) -> None:
+                end = min(start + part_size, size) - 1
+                
+                def _range_operation():
+                    try:
+                        response = client.get_object(Bucket=bucket, Key=key,
+                                                      Range=f'bytes={start}-{end}', **if_match)
+                    except ClientError as e:
+                        if e.response.get('Error', {}).get('Code') in ('PreconditionFailed', '412'):
+                            raise ObjectChangedError(f"{key} was overwritten during the download") from e
+                        raise
+                    
+                    total = _content_range_total(response)
+                    if total is not None and total != size:
+                        raise ObjectChangedError(f"{key} is {total} bytes, expected {size}")
+                    with view[start:end + 1] as part:
+                        count = _read_into(response['Body'], part, chunk_size)
+                    if count != end - start + 1:
+                        raise ObjectChangedError(f"Short read for bytes {start}-{end} of {key}: "
+                                                 f"got {count} bytes, object may have changed")
+                    return response.get('ETag')
+                
+                return self._retry_operation(_range_operation)
+            
+            part_starts = range(0, size, part_size)
+            try:
+                # The first part pins the version the remaining parts must match
+                first_etag = _fetch_part(0)
+                if not if_match and first_etag:
+                    if_match['IfMatch'] = first_etag
+                
+                with ThreadPoolExecutor(max_workers=max(1, min(workers, len(part_starts) - 1))) as executor:
+                    # Consume results so the first failed part is raised here
+                    for _ in executor.map(_fetch_part, part_starts[1:]):
+                        pass
+            except Exception as e:
+                logger.error(f"Failed ranged download for key {key} from customer bucket: {e}")
+                raise
+        
+        logger.debug("Downloaded {} bytes in {} ranges for key: {} from customer bucket", size, len(part_starts), key)
+        return buffer
+    
     def get_object_metadata(self, key: str) -> Dict[str, Any]:
         """
         Get metadata for an object without downloading the content.
@@ -143,7 +324,7 @@ class S3Manager:
         
         try:
             metadata = self._retry_operation(_head_operation)
-            logger.debug(f"Retrieved metadata for key: {key} from customer bucket")
+            logger.debug("Retrieved metadata for key: {} from customer bucket", key)
             return metadata
         except Exception as e:
             logger.error(f"Failed to get metadata for key {key} from customer bucket: {e}")
@@ -4,6 +4,7 @@ Main entry point for the S3 sync service.
 import os
 import sys
 import json
+import tempfile
 from pathlib import Path
 from loguru import logger
 
@@ -231,16 +232,20 @@ def run_test_workflow():
         
         # Test 4: Export state to CSV
         logger.info("Test 4: Testing CSV export functionality")
-        test_csv_path = "data/test_export.csv"
+        # Scratch export goes to the system temp dir (usually tmpfs), not the data volume
+        fd, test_csv_path = tempfile.mkstemp(prefix="test_export_", suffix=".csv")
+        os.close(fd)
         sync_service.export_state_to_csv(test_csv_path)
         
-        # Verify CSV file was created
-        if os.path.exists(test_csv_path):
-            logger.info(f"CSV export successful - File created: {test_csv_path}")
+        # Verify CSV content was written (the header row is always present)
+        try:
+            if os.path.getsize(test_csv_path) > 0:
+                logger.info(f"CSV export successful - File created: {test_csv_path}")
+            else:
+                raise Exception("CSV export failed - File is empty")
+        finally:
             # Clean up test file
             os.remove(test_csv_path)
-        else:
-            raise Exception("CSV export failed - File not created")
         
         # Test 5: Final status check
         logger.info("Test 5: Final status check")
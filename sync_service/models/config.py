@@ -36,6 +36,8 @@ class SyncConfig:
     sync_interval: int
     database_path: str
     live_reload: bool
+    s3_workers: int = 16
+    database_synchronous: str = 'NORMAL'
     
     @classmethod
     def from_env(cls) -> 'SyncConfig':
@@ -46,5 +48,7 @@ class SyncConfig:
             mock_api_url=os.getenv('MOCK_API_URL', 'http://localhost:8001'),
             sync_interval=int(os.getenv('SYNC_INTERVAL', '300')),  # Default 5 minutes
             database_path=os.getenv('DATABASE_PATH', 'data/sync.db'),
-            live_reload=os.getenv('LIVE_RELOAD', 'false').lower() == 'true'
+            live_reload=os.getenv('LIVE_RELOAD', 'false').lower() == 'true',
+            s3_workers=int(os.getenv('S3_WORKERS', '16')),
+            database_synchronous=os.getenv('DATABASE_SYNCHRONOUS', 'NORMAL').upper()
         )
\ No newline at end of file
@@ -1,12 +1,13 @@
 """
 Core data models for the S3 sync service.
 """
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict, Any, Optional
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class FileRecord:
     """Represents a file record in the sync system."""
     file_path: str
@@ -50,10 +51,52 @@ class PubSubEvent:
     metadata: Optional[Dict[str, Any]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FileOperation:
     """Represents a file operation to be executed."""
     operation_type: str  # 'create', 'update', 'delete', 'move'
     file_path: str
     new_path: Optional[str] = None
-    metadata: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    metadata: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True)
+class SyncStats:
+    """Statistics collected during an initial or incremental sync run."""
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    duration: float = 0.0
+    files_processed: int = 0
+    files_failed: int = 0
+    total_size: int = 0
+    events_processed: int = 0
+    operations_processed: int = 0
+    operations_failed: int = 0
+    event_counts: Dict[str, int] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    success: bool = False
+    # Monotonic clock reading at creation; durations never jump with wall-clock changes
+    _monotonic_start: float = field(default_factory=time.monotonic, repr=False)
+    
+    def finish(self, success: bool) -> None:
+        """Record the end time, duration and outcome of the run."""
+        self.duration = time.monotonic() - self._monotonic_start
+        self.end_time = self.start_time + timedelta(seconds=self.duration)
+        self.success = success
+    
+    def counters(self) -> Dict[str, int]:
+        """Return the counters reported as sync statistics."""
+        return {
+            'events_processed': self.events_processed,
+            'operations_processed': self.operations_processed,
+            'operations_failed': self.operations_failed,
+            'files_processed': self.files_processed,
+            'files_failed': self.files_failed,
+            'total_size': self.total_size
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for callers of the sync methods."""
+        data = asdict(self)
+        del data['_monotonic_start']
+        return data
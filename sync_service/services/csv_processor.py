@@ -2,14 +2,27 @@
 CSV processing and diff engine for the S3 sync service.
 """
 import csv
+import filecmp
+from itertools import starmap
+from operator import attrgetter
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict, Any, Set, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple, TextIO, Iterator, Union
 from datetime import datetime
 
 from ..models.data_models import FileRecord, FileOperation
 
 
+# CSV columns, in FileRecord field order
+_CSV_FIELDS = ('file_path', 'permissions', 'size', 'file_type', 'last_modified', 'internal_id')
+
+# Values of a FileRecord in CSV column order
+_record_values = attrgetter(*_CSV_FIELDS)
+
+# Fields compared to detect updated files
+_COMPARISON_FIELDS = ['permissions', 'size', 'file_type', 'last_modified', 'internal_id']
+
+
 class CSVProcessor:
     """Handles CSV processing, diff operations, and FileOperation generation."""
     
@@ -24,39 +37,48 @@ class CSVProcessor:
         csv_dir.mkdir(parents=True, exist_ok=True)
         
         with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-            if records:
-                # Use the first record to get field names
-                fieldnames = list(records[0].to_dict().keys())
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for record in records:
-                    writer.writerow(record.to_dict())
-            else:
-                # Write empty CSV with headers
-                fieldnames = ['file_path', 'permissions', 'size', 'file_type', 
-                             'last_modified', 'internal_id']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
+            writer = csv.writer(csvfile)
+            writer.writerow(_CSV_FIELDS)
+            # attrgetter builds each record's value tuple in C; only the
+            # timestamp still needs formatting in Python
+            writer.writerows(
+                (file_path, permissions, size, file_type, last_modified.isoformat(), internal_id)
+                for file_path, permissions, size, file_type, last_modified, internal_id
+                in map(_record_values, records)
+            )
     
-    def import_records_from_csv(self, csv_path: str) -> List[FileRecord]:
-        """Import file records from CSV format."""
-        if not Path(csv_path).exists():
+    def import_records_from_csv(self, csv_path: Union[str, TextIO]) -> List[FileRecord]:
+        """
+        Import file records from CSV format.
+        
+        The file is parsed by pandas and sizes and timestamps are converted a
+        column at a time, instead of per cell while building each record.
+        csv_path may also be a text stream (e.g. io.StringIO), read from its
+        current position.
+        """
+        if isinstance(csv_path, str) and not Path(csv_path).exists():
             raise FileNotFoundError(f"CSV file not found: {csv_path}")
         
-        records = []
-        with open(csv_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            for row in reader:
-                # Skip empty rows
-                if not any(row.values()):
-                    continue
-                
-                record = FileRecord.from_dict(row)
-                records.append(record)
-        
-        return records
+        try:
+            df = pd.read_csv(csv_path, dtype=str, keep_default_na=False, encoding='utf-8')
+        except pd.errors.EmptyDataError:
+            return []
+        
+        # Skip empty rows
+        df = df[(df != '').any(axis=1)]
+        if df.empty:
+            return []
+        
+        sizes = pd.to_numeric(df['size']).astype('int64').tolist()
+        last_modified = self._parse_timestamp_column(df['last_modified'])
+        internal_ids = df['internal_id'].tolist() if 'internal_id' in df.columns else [None] * len(df)
+        
+        # Columns are zipped in FileRecord field order, so each row goes straight
+        # into the dataclass-generated __init__ as positional arguments
+        return list(starmap(FileRecord, zip(
+            df['file_path'].tolist(), df['permissions'].tolist(), sizes,
+            df['file_type'].tolist(), last_modified, internal_ids
+        )))
     
     def compare_csv_files(self, old_csv_path: str, new_csv_path: str) -> List[FileOperation]:
         """
@@ -69,10 +91,23 @@ class CSVProcessor:
         if not Path(new_csv_path).exists():
             raise FileNotFoundError(f"New CSV file not found: {new_csv_path}")
         
-        # Read CSV files into pandas DataFrames
-        old_df = pd.read_csv(old_csv_path)
-        new_df = pd.read_csv(new_csv_path)
+        # Byte-identical states have no differences; filecmp checks the sizes
+        # first and stops reading at the first differing block
+        if filecmp.cmp(old_csv_path, new_csv_path, shallow=False):
+            return []
         
+        # Read CSV files into pandas DataFrames
+        return self._compare_dataframes(pd.read_csv(old_csv_path), pd.read_csv(new_csv_path))
+    
+    def compare_csv_streams(self, old_csv: TextIO, new_csv: TextIO) -> List[FileOperation]:
+        """
+        Compare two CSV text streams (e.g. io.StringIO exports) like compare_csv_files.
+        Both streams are read from their current position.
+        """
+        return self._compare_dataframes(pd.read_csv(old_csv), pd.read_csv(new_csv))
+    
+    def _compare_dataframes(self, old_df: pd.DataFrame, new_df: pd.DataFrame) -> List[FileOperation]:
+        """Generate FileOperation objects for the differences between two state DataFrames."""
         # Handle empty DataFrames
         if old_df.empty and new_df.empty:
             return []
@@ -125,11 +160,35 @@ class CSVProcessor:
         if old_df.empty or new_df.empty:
             return pd.DataFrame()
         
+        # Join only paths and per-row hashes of the compared fields; rows whose
+        # hashes match are unchanged, so only the rest need a field comparison
+        merged = pd.merge(
+            pd.DataFrame({'file_path': old_df['file_path'], 'row_hash': self._row_hashes(old_df)}),
+            pd.DataFrame({'file_path': new_df['file_path'], 'row_hash': self._row_hashes(new_df)}),
+            on='file_path', how='inner', suffixes=('_old', '_new')
+        )
+        candidate_paths = merged.loc[merged['row_hash_old'] != merged['row_hash_new'], 'file_path']
+        if candidate_paths.empty:
+            return pd.DataFrame()
+        
+        # Hashes also differ when equal values have different dtypes (e.g. int
+        # and float sizes), so confirm the candidates field by field
+        return self._compare_common_files(
+            old_df[old_df['file_path'].isin(candidate_paths)],
+            new_df[new_df['file_path'].isin(candidate_paths)]
+        )
+    
+    def _row_hashes(self, df: pd.DataFrame) -> pd.Series:
+        """Hash the compared fields of each row, vectorized by pandas."""
+        return pd.util.hash_pandas_object(df.reindex(columns=_COMPARISON_FIELDS), index=False)
+    
+    def _compare_common_files(self, old_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+        """Compare files present in both DataFrames field by field, returning the changed ones."""
         # Merge on file_path to compare records
         merged = pd.merge(old_df, new_df, on='file_path', how='inner', suffixes=('_old', '_new'))
         
         # Find rows where any field (except file_path) has changed
-        comparison_fields = ['permissions', 'size', 'file_type', 'last_modified', 'internal_id']
+        comparison_fields = _COMPARISON_FIELDS
         
         changed_mask = pd.Series([False] * len(merged))
         for field in comparison_fields:
@@ -157,134 +216,122 @@ class CSVProcessor:
         
         return pd.DataFrame()
     
-    def _generate_delete_operations(self, deleted_df: pd.DataFrame) -> List[FileOperation]:
-        """Generate delete operations from deleted files DataFrame."""
-        operations = []
+    def _parse_timestamp_column(self, values: pd.Series) -> List[Optional[datetime]]:
+        """
+        Parse a column of ISO timestamps in one vectorized pass; missing values become None.
         
-        for _, row in deleted_df.iterrows():
-            operation = FileOperation(
-                operation_type='delete',
-                file_path=row['file_path'],
+        Falls back to _parse_timestamp per value for columns pandas cannot
+        hold as one datetime column, such as mixed UTC offsets.
+        """
+        try:
+            parsed = pd.to_datetime(values, format='ISO8601')
+        except (ValueError, TypeError):
+            return [self._parse_timestamp(value) for value in values]
+        
+        timestamps = list(parsed.dt.to_pydatetime())
+        if parsed.hasnans:
+            timestamps = [None if timestamp is pd.NaT else timestamp for timestamp in timestamps]
+        return timestamps
+    
+    def _parse_timestamp(self, value: Any) -> Optional[datetime]:
+        """Parse a CSV timestamp once so operations carry a datetime; missing values become None."""
+        if isinstance(value, datetime):
+            return value
+        if not isinstance(value, str) or not value:
+            return None
+        return datetime.fromisoformat(value)
+    
+    def _generate_operations(self, operation_type: str, df: pd.DataFrame) -> List[FileOperation]:
+        """
+        Generate operations of one type from a DataFrame of files.
+        
+        Columns are converted to Python lists once and zipped, instead of
+        building a pandas Series per row with iterrows.
+        """
+        if df.empty:
+            return []
+        
+        row_count = len(df)
+        columns = [
+            df[field].tolist() if field in df.columns else [None] * row_count
+            for field in ('file_path', 'permissions', 'size', 'file_type')
+        ]
+        columns.append(self._parse_timestamp_column(df['last_modified']) if 'last_modified' in df.columns
+                       else [None] * row_count)
+        columns.append(df['internal_id'].tolist() if 'internal_id' in df.columns else [None] * row_count)
+        
+        return [
+            FileOperation(
+                operation_type=operation_type,
+                file_path=file_path,
                 metadata={
-                    'permissions': row.get('permissions'),
-                    'size': row.get('size'),
-                    'file_type': row.get('file_type'),
-                    'last_modified': row.get('last_modified'),
-                    'internal_id': row.get('internal_id')
+                    'permissions': permissions,
+                    'size': size,
+                    'file_type': file_type,
+                    'last_modified': last_modified,
+                    'internal_id': internal_id
                 }
             )
-            operations.append(operation)
-        
-        return operations
+            for file_path, permissions, size, file_type, last_modified, internal_id in zip(*columns)
+        ]
+    
+    def _generate_delete_operations(self, deleted_df: pd.DataFrame) -> List[FileOperation]:
+        """Generate delete operations from deleted files DataFrame."""
+        return self._generate_operations('delete', deleted_df)
     
     def _generate_create_operations(self, created_df: pd.DataFrame) -> List[FileOperation]:
         """Generate create operations from created files DataFrame."""
-        operations = []
-        
-        for _, row in created_df.iterrows():
-            operation = FileOperation(
-                operation_type='create',
-                file_path=row['file_path'],
-                metadata={
-                    'permissions': row.get('permissions'),
-                    'size': row.get('size'),
-                    'file_type': row.get('file_type'),
-                    'last_modified': row.get('last_modified'),
-                    'internal_id': row.get('internal_id')
-                }
-            )
-            operations.append(operation)
-        
-        return operations
+        return self._generate_operations('create', created_df)
     
     def _generate_update_operations(self, updated_df: pd.DataFrame) -> List[FileOperation]:
         """Generate update operations from updated files DataFrame."""
-        operations = []
-        
-        for _, row in updated_df.iterrows():
-            operation = FileOperation(
-                operation_type='update',
-                file_path=row['file_path'],
-                metadata={
-                    'permissions': row.get('permissions'),
-                    'size': row.get('size'),
-                    'file_type': row.get('file_type'),
-                    'last_modified': row.get('last_modified'),
-                    'internal_id': row.get('internal_id')
-                }
-            )
-            operations.append(operation)
-        
-        return operations
+        return self._generate_operations('update', updated_df)
     
     def generate_operations_from_records(
         self, 
         old_records: List[FileRecord], 
         new_records: List[FileRecord]
-    ) -> List[FileOperation]:
+    ) -> Iterator[FileOperation]:
         """
         Generate FileOperation objects by comparing two lists of FileRecord objects.
         This is an alternative to CSV file comparison for in-memory operations.
+        
+        Operations are yielded lazily (deletes first, then creates and updates);
+        wrap the call in list() when a list is needed.
         """
         # Convert records to dictionaries for easier comparison
         old_dict = {record.file_path: record for record in old_records}
         new_dict = {record.file_path: record for record in new_records}
         
-        operations = []
-        
         # Find deleted files (in old but not in new)
-        for file_path in old_dict:
+        for file_path, record in old_dict.items():
             if file_path not in new_dict:
-                record = old_dict[file_path]
-                operation = FileOperation(
-                    operation_type='delete',
-                    file_path=file_path,
-                    metadata={
-                        'permissions': record.permissions,
-                        'size': record.size,
-                        'file_type': record.file_type,
-                        'last_modified': record.last_modified.isoformat(),
-                        'internal_id': record.internal_id
-                    }
-                )
-                operations.append(operation)
+                yield self._operation_from_record('delete', record)
         
         # Find created and updated files
-        for file_path in new_dict:
-            new_record = new_dict[file_path]
+        for file_path, new_record in new_dict.items():
+            old_record = old_dict.get(file_path)
             
-            if file_path not in old_dict:
+            if old_record is None:
                 # Created file
-                operation = FileOperation(
-                    operation_type='create',
-                    file_path=file_path,
-                    metadata={
-                        'permissions': new_record.permissions,
-                        'size': new_record.size,
-                        'file_type': new_record.file_type,
-                        'last_modified': new_record.last_modified.isoformat(),
-                        'internal_id': new_record.internal_id
-                    }
-                )
-                operations.append(operation)
-            else:
-                # Check if file was updated
-                old_record = old_dict[file_path]
-                if self._records_differ(old_record, new_record):
-                    operation = FileOperation(
-                        operation_type='update',
-                        file_path=file_path,
-                        metadata={
-                            'permissions': new_record.permissions,
-                            'size': new_record.size,
-                            'file_type': new_record.file_type,
-                            'last_modified': new_record.last_modified.isoformat(),
-                            'internal_id': new_record.internal_id
-                        }
-                    )
-                    operations.append(operation)
-        
-        return operations
+                yield self._operation_from_record('create', new_record)
+            elif self._records_differ(old_record, new_record):
+                # Updated file
+                yield self._operation_from_record('update', new_record)
+    
+    def _operation_from_record(self, operation_type: str, record: FileRecord) -> FileOperation:
+        """Build a FileOperation carrying the record's fields as metadata."""
+        return FileOperation(
+            operation_type=operation_type,
+            file_path=record.file_path,
+            metadata={
+                'permissions': record.permissions,
+                'size': record.size,
+                'file_type': record.file_type,
+                'last_modified': record.last_modified,
+                'internal_id': record.internal_id
+            }
+        )
     
     def _records_differ(self, old_record: FileRecord, new_record: FileRecord) -> bool:
         """Check if two FileRecord objects differ in any field except file_path."""
@@ -296,9 +343,12 @@ class CSVProcessor:
             old_record.internal_id != new_record.internal_id
         )
     
-    def validate_csv_format(self, csv_path: str) -> bool:
+    def validate_csv_format(self, csv_path: str, deep: bool = False) -> bool:
         """
         Validate that a CSV file has the expected format for FileRecord data.
+        
+        By default only the header row is read. With deep=True the whole file
+        is parsed, so malformed rows further down are reported as invalid too.
         """
         if not Path(csv_path).exists():
             return False
@@ -307,7 +357,7 @@ class CSVProcessor:
                            'last_modified', 'internal_id'}
         
         try:
-            df = pd.read_csv(csv_path)
+            df = pd.read_csv(csv_path, nrows=None if deep else 0)
             actual_columns = set(df.columns)
             return expected_columns.issubset(actual_columns)
         except Exception:
@@ -320,12 +370,16 @@ class CSVProcessor:
         if not Path(csv_path).exists():
             raise FileNotFoundError(f"CSV file not found: {csv_path}")
         
-        df = pd.read_csv(csv_path)
+        # Read the header on its own so only the aggregated columns get parsed
+        columns = list(pd.read_csv(csv_path, nrows=0).columns)
+        summary_columns = [column for column in ('file_type', 'size', 'internal_id')
+                           if column in columns]
+        df = pd.read_csv(csv_path, usecols=summary_columns or columns[:1])
         
         return {
             'total_records': len(df),
             'file_types': df['file_type'].value_counts().to_dict() if 'file_type' in df.columns else {},
-            'total_size': df['size'].sum() if 'size' in df.columns else 0,
-            'columns': list(df.columns),
-            'has_internal_ids': df['internal_id'].notna().sum() if 'internal_id' in df.columns else 0
+            'total_size': int(df['size'].sum()) if 'size' in df.columns else 0,
+            'columns': columns,
+            'has_internal_ids': int(df['internal_id'].notna().sum()) if 'internal_id' in df.columns else 0
         }
\ No newline at end of file
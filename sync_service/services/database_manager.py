@@ -3,20 +3,94 @@ SQLite database manager for the S3 sync service.
 """
 import sqlite3
 import csv
-from datetime import datetime
+import threading
+import pandas as pd
+from datetime import datetime, timezone
+from itertools import repeat
+from operator import attrgetter
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-from contextlib import contextmanager
+from typing import List, Optional, Any, Iterable, TextIO, Union
+from contextlib import contextmanager, nullcontext
 
 from ..models.data_models import FileRecord
 
 
+# Values accepted for PRAGMA synchronous
+_SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# Values of a FileRecord in the column order of the INSERT statements, built in C
+_record_row = attrgetter('file_path', 'permissions', 'size', 'file_type',
+                         'last_modified', 'internal_id')
+
+# Statements shared by the single-record and bulk methods. Keeping one string per
+# statement lets a connection's statement cache reuse the compiled statement when
+# several calls run inside one transaction().
+_SQL_INSERT = """
+    INSERT INTO file_records 
+    (file_path, permissions, size, file_type, last_modified, internal_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_INSERT_OR_IGNORE = """
+    INSERT OR IGNORE INTO file_records 
+    (file_path, permissions, size, file_type, last_modified, internal_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_UPDATE = """
+    UPDATE file_records 
+    SET permissions = ?, size = ?, file_type = ?, 
+        last_modified = ?, internal_id = ?, 
+        updated_at = ?
+    WHERE file_path = ?
+"""
+
+# ON CONFLICT rather than INSERT OR REPLACE: REPLACE deletes the old row
+# without firing delete triggers, which would break the record count
+_SQL_UPSERT = """
+    INSERT INTO file_records 
+    (file_path, permissions, size, file_type, last_modified, internal_id, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(file_path) DO UPDATE SET
+        permissions = excluded.permissions,
+        size = excluded.size,
+        file_type = excluded.file_type,
+        last_modified = excluded.last_modified,
+        internal_id = excluded.internal_id,
+        updated_at = excluded.updated_at
+"""
+
+_SQL_DELETE = "DELETE FROM file_records WHERE file_path = ?"
+
+_SQL_GET = """
+    SELECT file_path, permissions, size, file_type, 
+           last_modified, internal_id
+    FROM file_records 
+    WHERE file_path = ?
+"""
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time in the same format SQLite's CURRENT_TIMESTAMP produces."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
 class DatabaseManager:
     """Manages SQLite database operations for file records."""
     
-    def __init__(self, db_path: str):
-        """Initialize database manager with database path."""
+    def __init__(self, db_path: str, synchronous: str = 'NORMAL'):
+        """
+        Initialize database manager with database path.
+        
+        synchronous is the SQLite synchronous mode used by every connection.
+        NORMAL is durable across process crashes in WAL mode; OFF also skips
+        the checkpoint fsyncs and may lose the latest commits on power loss.
+        """
+        if synchronous.upper() not in _SYNCHRONOUS_MODES:
+            raise ValueError(f"Invalid synchronous mode: {synchronous}")
         self.db_path = db_path
+        self.synchronous = synchronous.upper()
+        self._local = threading.local()  # Per-thread active transaction connection
         self._ensure_db_directory()
         self.create_tables()
     
@@ -25,21 +99,108 @@ class DatabaseManager:
         db_dir = Path(self.db_path).parent
         db_dir.mkdir(parents=True, exist_ok=True)
     
-    @contextmanager
-    def get_connection(self):
-        """Get database connection with automatic cleanup."""
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new database connection."""
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
+        # WAL (set in create_tables) lets readers run alongside the single
+        # writer and keeps commits durable without an fsync per transaction
+        conn.executescript(f"""
+            PRAGMA synchronous={self.synchronous};
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-65536;
+            PRAGMA mmap_size=268435456;
+        """)
+        return conn
+    
+    @contextmanager
+    def get_connection(self):
+        """
+        Get database connection with automatic cleanup.
+        
+        Inside a transaction() block the transaction's connection is reused and
+        left open. Otherwise a new connection is opened, committed when the
+        block succeeds, and closed on exit.
+        """
+        active_conn = getattr(self._local, 'conn', None)
+        if active_conn is not None:
+            yield active_conn
+            return
+        
+        conn = self._connect()
         try:
             yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
         finally:
             conn.close()
     
+    @contextmanager
+    def transaction(self):
+        """
+        Group several database operations into a single transaction.
+        
+        All DatabaseManager calls made by the current thread inside the block
+        share one connection and are committed once on exit, or rolled back if
+        an exception escapes. Nested blocks join the outer transaction.
+        """
+        active_conn = getattr(self._local, 'conn', None)
+        if active_conn is not None:
+            yield active_conn
+            return
+        
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.conn = conn
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            conn.close()
+    
+    def in_transaction(self) -> bool:
+        """Return True if the current thread is inside a transaction() block."""
+        return getattr(self._local, 'conn', None) is not None
+    
+    @contextmanager
+    def savepoint(self):
+        """
+        Make the writes of a block succeed or fail together.
+        
+        Inside a transaction() block the writes are wrapped in a SAVEPOINT; if
+        an exception escapes, only the block's own writes are rolled back and
+        the rest of the transaction is kept. Outside one, the block runs in
+        its own transaction.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self.transaction():
+                yield
+            return
+        
+        conn.execute("SAVEPOINT block")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK TO block")
+            conn.execute("RELEASE block")
+            raise
+        conn.execute("RELEASE block")
+    
     def create_tables(self) -> None:
         """Create database tables with proper schema and indexes."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            # Write-ahead logging is persistent, so enabling it once per database is enough
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
             # Create file_records table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS file_records (
@@ -55,29 +216,51 @@ class DatabaseManager:
                 )
             """)
             
+            # file_path lookups use the implicit index behind its UNIQUE constraint;
+            # drop the duplicate explicit index created by older schema versions
+            cursor.execute("DROP INDEX IF EXISTS idx_file_path")
+            
             # Create indexes for performance
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_file_path 
-                ON file_records(file_path)
+                CREATE INDEX IF NOT EXISTS idx_internal_id 
+                ON file_records(internal_id)
             """)
             
+            # Row count maintained by triggers, so counting never scans file_records.
+            # The triggers commit and roll back together with the rows they count.
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_internal_id 
-                ON file_records(internal_id)
+                CREATE TABLE IF NOT EXISTS file_records_count (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    count INTEGER NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS file_records_count_insert
+                AFTER INSERT ON file_records
+                BEGIN
+                    UPDATE file_records_count SET count = count + 1 WHERE id = 1;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS file_records_count_delete
+                AFTER DELETE ON file_records
+                BEGIN
+                    UPDATE file_records_count SET count = count - 1 WHERE id = 1;
+                END
             """)
             
-            conn.commit()
+            # Seed the count once for databases created before the counter existed
+            cursor.execute("""
+                INSERT OR IGNORE INTO file_records_count (id, count)
+                SELECT 1, COUNT(*) FROM file_records
+            """)
     
     def insert_file_record(self, record: FileRecord) -> None:
         """Insert a new file record into the database."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute("""
-                INSERT INTO file_records 
-                (file_path, permissions, size, file_type, last_modified, internal_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
+            cursor.execute(_SQL_INSERT, (
                 record.file_path,
                 record.permissions,
                 record.size,
@@ -85,53 +268,152 @@ class DatabaseManager:
                 record.last_modified,
                 record.internal_id
             ))
+    
+    def bulk_insert_file_records(self, records: Iterable[FileRecord]) -> None:
+        """
+        Insert many new file records with one executemany in a single transaction.
+        
+        Raises:
+            sqlite3.IntegrityError: If any record already exists; nothing is inserted
+        """
+        with self.transaction() as conn:
+            conn.executemany(_SQL_INSERT, map(_record_row, records))
+    
+    def try_insert_file_record(self, record: FileRecord) -> bool:
+        """
+        Insert a new file record unless one already exists for its file path.
+        
+        Returns:
+            bool: True if the record was inserted, False if it already existed
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             
-            conn.commit()
+            cursor.execute(_SQL_INSERT_OR_IGNORE, _record_row(record))
+            return cursor.rowcount == 1
     
     def update_file_record(self, record: FileRecord) -> None:
         """Update an existing file record in the database."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute("""
-                UPDATE file_records 
-                SET permissions = ?, size = ?, file_type = ?, 
-                    last_modified = ?, internal_id = ?, 
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE file_path = ?
-            """, (
+            cursor.execute(_SQL_UPDATE, (
                 record.permissions,
                 record.size,
                 record.file_type,
                 record.last_modified,
                 record.internal_id,
+                _utc_timestamp(),
                 record.file_path
             ))
-            
-            conn.commit()
     
-    def delete_file_record(self, file_path: str) -> None:
-        """Delete a file record from the database."""
+    def update_many(self, records: Iterable[FileRecord]) -> None:
+        """Update many existing file records with one executemany in a single transaction."""
+        updated_at = _utc_timestamp()
+        rows = (
+            (record.permissions, record.size, record.file_type,
+             record.last_modified, record.internal_id, updated_at, record.file_path)
+            for record in records
+        )
+        
+        with self.transaction() as conn:
+            conn.executemany(_SQL_UPDATE, rows)
+    
+    def update_file_permissions(self, file_path: str, permissions: str, 
+                                last_modified: datetime) -> bool:
+        """
+        Update the permissions and last_modified of an existing file record.
+        
+        Returns:
+            bool: True if a record was updated, False if none exists for file_path
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
-                DELETE FROM file_records WHERE file_path = ?
-            """, (file_path,))
+                UPDATE file_records 
+                SET permissions = ?, last_modified = ?, updated_at = ?
+                WHERE file_path = ?
+            """, (permissions, last_modified, _utc_timestamp(), file_path))
             
-            conn.commit()
+            return cursor.rowcount == 1
+    
+    def rename_file_record(self, old_path: str, new_path: str,
+                           last_modified: Optional[datetime] = None) -> bool:
+        """
+        Change the path of a file record in place.
+        
+        last_modified, when given, is stored in the same statement; otherwise
+        the record keeps its current value.
+        
+        Returns:
+            True if a record was renamed, False if no record exists at old_path
+            
+        Raises:
+            sqlite3.IntegrityError: If a record already exists at new_path
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE file_records 
+                SET file_path = ?, last_modified = COALESCE(?, last_modified), updated_at = ?
+                WHERE file_path = ?
+            """, (new_path, last_modified, _utc_timestamp(), old_path))
+            return cursor.rowcount > 0
+    
+    def update_file_metadata(self, file_path: str, permissions: Optional[str] = None,
+                             size: Optional[int] = None, file_type: Optional[str] = None) -> bool:
+        """
+        Update some metadata fields of an existing file record in place.
+        
+        Fields given as None keep their current value.
+        
+        Returns:
+            True if a record was updated, False if none exists for file_path
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE file_records 
+                SET permissions = COALESCE(?, permissions), size = COALESCE(?, size),
+                    file_type = COALESCE(?, file_type), updated_at = ?
+                WHERE file_path = ?
+            """, (permissions, size, file_type, _utc_timestamp(), file_path))
+            return cursor.rowcount > 0
+    
+    def delete_file_record(self, file_path: str) -> bool:
+        """
+        Delete a file record from the database.
+        
+        Returns:
+            bool: True if a record was deleted, False if none existed
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(_SQL_DELETE, (file_path,))
+            
+            return cursor.rowcount > 0
+    
+    def delete_many(self, file_paths: Iterable[str]) -> int:
+        """
+        Delete the file records for many paths in a single transaction.
+        
+        Returns:
+            Number of records deleted
+        """
+        with self.transaction() as conn:
+            cursor = conn.executemany(
+                _SQL_DELETE, ((file_path,) for file_path in file_paths)
+            )
+            return cursor.rowcount
     
     def get_file_record(self, file_path: str) -> Optional[FileRecord]:
         """Get a specific file record by file path."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute("""
-                SELECT file_path, permissions, size, file_type, 
-                       last_modified, internal_id
-                FROM file_records 
-                WHERE file_path = ?
-            """, (file_path,))
+            cursor.execute(_SQL_GET, (file_path,))
             
             row = cursor.fetchone()
             if row:
@@ -149,6 +431,8 @@ class DatabaseManager:
         """Get all file records from the database."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            # Bulk read: plain tuples are cheaper to build than sqlite3.Row objects
+            cursor.row_factory = None
             
             cursor.execute("""
                 SELECT file_path, permissions, size, file_type, 
@@ -157,92 +441,166 @@ class DatabaseManager:
                 ORDER BY file_path
             """)
             
-            records = []
-            for row in cursor.fetchall():
-                records.append(FileRecord(
-                    file_path=row['file_path'],
-                    permissions=row['permissions'],
-                    size=row['size'],
-                    file_type=row['file_type'],
-                    last_modified=datetime.fromisoformat(row['last_modified']),
-                    internal_id=row['internal_id']
-                ))
+            # Iterate the cursor directly (no fetchall copy) with locally bound names;
+            # columns are selected in FileRecord's positional field order
+            record_cls, parse_timestamp = FileRecord, datetime.fromisoformat
+            return [
+                record_cls(file_path, permissions, size, file_type,
+                           parse_timestamp(last_modified), internal_id)
+                for file_path, permissions, size, file_type, last_modified, internal_id in cursor
+            ]
+    
+    def get_records_by_paths(self, file_paths: Iterable[str], 
+                             batch_size: int = 500) -> List[FileRecord]:
+        """
+        Get the file records for the given paths; paths without a record are skipped.
+        
+        Paths are looked up in batches to stay under SQLite's bound-parameter limit.
+        """
+        unique_paths = list(dict.fromkeys(file_paths))
+        records = []
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
             
-            return records
+            record_cls, parse_timestamp = FileRecord, datetime.fromisoformat
+            for start in range(0, len(unique_paths), batch_size):
+                batch = unique_paths[start:start + batch_size]
+                placeholders = ', '.join('?' * len(batch))
+                cursor.execute(f"""
+                    SELECT file_path, permissions, size, file_type, 
+                           last_modified, internal_id
+                    FROM file_records 
+                    WHERE file_path IN ({placeholders})
+                """, batch)
+                records.extend(
+                    record_cls(file_path, permissions, size, file_type,
+                               parse_timestamp(last_modified), internal_id)
+                    for file_path, permissions, size, file_type, last_modified, internal_id in cursor
+                )
+        
+        return records
     
-    def export_to_csv(self, csv_path: str) -> None:
-        """Export all file records to CSV format."""
-        records = self.get_all_records()
+    def export_to_csv(self, csv_path: Union[str, TextIO]) -> None:
+        """
+        Export all file records to CSV format.
         
-        # Ensure CSV directory exists
-        csv_dir = Path(csv_path).parent
-        csv_dir.mkdir(parents=True, exist_ok=True)
+        Rows are streamed straight from the database cursor into the CSV writer
+        without building FileRecord objects. csv_path may also be an open text
+        stream (e.g. io.StringIO) to keep the export off disk; it is left open.
+        """
+        fieldnames = ['file_path', 'permissions', 'size', 'file_type', 
+                      'last_modified', 'internal_id']
         
-        with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-            if records:
-                # Use the first record to get field names
-                fieldnames = list(records[0].to_dict().keys())
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for record in records:
-                    writer.writerow(record.to_dict())
-            else:
-                # Write empty CSV with headers
-                fieldnames = ['file_path', 'permissions', 'size', 'file_type', 
-                             'last_modified', 'internal_id']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-    
-    def import_from_csv(self, csv_path: str) -> None:
-        """Import file records from CSV format."""
+        if isinstance(csv_path, str):
+            # Ensure CSV directory exists
+            csv_dir = Path(csv_path).parent
+            csv_dir.mkdir(parents=True, exist_ok=True)
+            # A large buffer turns the row-by-row writes into few, big write calls
+            target = open(csv_path, 'w', newline='', encoding='utf-8', buffering=1 << 20)
+        else:
+            target = nullcontext(csv_path)
+        
+        # Enter the file first so it is closed if opening the connection fails
+        with target as csvfile, self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            
+            # Timestamps are stored as 'YYYY-MM-DD HH:MM:SS'; export them in ISO format
+            cursor.execute("""
+                SELECT file_path, permissions, size, file_type, 
+                       REPLACE(last_modified, ' ', 'T'), internal_id
+                FROM file_records 
+                ORDER BY file_path
+            """)
+            
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerows(cursor)
+    
+    def import_from_csv(self, csv_path: str, chunk_size: int = 100000) -> None:
+        """
+        Import file records from CSV format.
+        
+        The CSV is parsed in chunks by pandas and each chunk is written with a
+        single executemany, all inside one transaction. Records that already
+        exist are updated in place.
+        """
         if not Path(csv_path).exists():
             raise FileNotFoundError(f"CSV file not found: {csv_path}")
         
-        with open(csv_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            for row in reader:
+        columns = ['file_path', 'permissions', 'size', 'file_type', 
+                   'last_modified', 'internal_id']
+        
+        try:
+            reader = pd.read_csv(csv_path, chunksize=chunk_size, dtype=str,
+                                 keep_default_na=False, encoding='utf-8')
+        except pd.errors.EmptyDataError:
+            return
+        
+        # One timestamp for the whole import instead of one clock read per row
+        updated_at = _utc_timestamp()
+        
+        with self.transaction() as conn:
+            for chunk in reader:
                 # Skip empty rows
-                if not any(row.values()):
+                chunk = chunk.reindex(columns=columns, fill_value='')
+                chunk = chunk[chunk['file_path'] != '']
+                if chunk.empty:
                     continue
                 
-                record = FileRecord.from_dict(row)
+                # Columns are materialized as lists in C, so the zip below
+                # does not box a pandas scalar per cell
+                internal_ids = chunk['internal_id'].astype(object)
+                rows = zip(
+                    chunk['file_path'].tolist(),
+                    chunk['permissions'].tolist(),
+                    pd.to_numeric(chunk['size']).astype('int64').tolist(),
+                    chunk['file_type'].tolist(),
+                    # Store timestamps the same way sqlite3 adapts datetime objects
+                    chunk['last_modified'].str.replace('T', ' ', n=1, regex=False).tolist(),
+                    internal_ids.where(internal_ids != '', None).tolist(),
+                    repeat(updated_at)
+                )
                 
-                # Try to insert, if it fails due to unique constraint, update instead
-                try:
-                    self.insert_file_record(record)
-                except sqlite3.IntegrityError:
-                    self.update_file_record(record)
+                conn.executemany(_SQL_UPSERT, rows)
     
     def upsert_file_record(self, record: FileRecord) -> None:
         """Insert or update a file record (upsert operation)."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO file_records
-                (file_path, permissions, size, file_type, last_modified, internal_id, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (
+            cursor.execute(_SQL_UPSERT, (
                 record.file_path,
                 record.permissions,
                 record.size,
                 record.file_type,
                 record.last_modified,
-                record.internal_id
+                record.internal_id,
+                _utc_timestamp()
             ))
-            conn.commit()
+    
+    def upsert_many(self, records: Iterable[FileRecord]) -> None:
+        """Insert or update many file records with one executemany in a single transaction."""
+        updated_at = _utc_timestamp()
+        rows = (
+            (record.file_path, record.permissions, record.size, record.file_type,
+             record.last_modified, record.internal_id, updated_at)
+            for record in records
+        )
+        
+        with self.transaction() as conn:
+            conn.executemany(_SQL_UPSERT, rows)
     
     def get_record_count(self) -> int:
-        """Get the total number of records in the database."""
+        """Get the total number of records in the database from the trigger-maintained counter."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM file_records")
+            cursor.execute("SELECT count FROM file_records_count WHERE id = 1")
             return cursor.fetchone()[0]
     
     def clear_all_records(self) -> None:
         """Clear all records from the database (for testing purposes)."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM file_records")
-            conn.commit()
\ No newline at end of file
+            cursor.execute("DELETE FROM file_records")
\ No newline at end of file
@@ -2,25 +2,53 @@
 Event processor for handling pubSubFullList events and updating SQLite database.
 """
 import logging
+import queue
+import threading
 from datetime import datetime
+from operator import attrgetter
 from typing import List, Dict, Any, Optional
 
 from ..models.data_models import PubSubEvent, FileRecord
 from .database_manager import DatabaseManager
 
 
+# Sort key for ordering events chronologically (evaluated in C, no lambda call)
+_TIMESTAMP_KEY = attrgetter('timestamp')
+
+# Marks the end of the event stream for the database writer thread
+_END_OF_EVENTS = object()
+
+
 class EventProcessor:
     """Processes pubSubFullList events and updates the SQLite database accordingly."""
     
-    def __init__(self, database_manager: DatabaseManager):
-        """Initialize event processor with database manager."""
+    def __init__(self, database_manager: DatabaseManager, queue_size: int = 1000):
+        """
+        Initialize event processor with database manager.
+        
+        Args:
+            database_manager: DatabaseManager used to apply events
+            queue_size: Maximum number of validated events waiting to be written
+        """
         self.db_manager = database_manager
+        self.queue_size = queue_size
         self.logger = logging.getLogger(__name__)
     
     def process_events(self, events: List[PubSubEvent]) -> Dict[str, int]:
         """
         Process a list of pubSubFullList events and update the database.
         
+        Events are validated on the calling thread and streamed through a
+        bounded queue to a database writer thread, which applies them in
+        timestamp order inside a single transaction. Validation work thus
+        overlaps with database writes.
+        
+        The writer thread opens its own BEGIN IMMEDIATE transaction, which
+        would wait forever on a write lock already held by the caller. When
+        called inside db_manager.transaction(), events are therefore applied
+        inline on the calling thread and join the caller's transaction; they
+        are committed or rolled back with it.
+        
         Args:
             events: List of PubSubEvent objects to process
             
@@ -32,7 +60,7 @@ class EventProcessor:
             return {}
         
         # Sort events by timestamp to ensure proper order
-        sorted_events = sorted(events, key=lambda e: e.timestamp)
+        sorted_events = sorted(events, key=_TIMESTAMP_KEY)
         
         event_counts = {
             'change_permission': 0,
@@ -45,19 +73,107 @@ class EventProcessor:
         
         self.logger.info(f"Processing {len(sorted_events)} events")
         
-        for event in sorted_events:
-            try:
-                self._validate_event(event)
-                self._process_single_event(event)
-                event_counts[event.event_type] += 1
+        if self.db_manager.in_transaction():
+            for event in sorted_events:
+                try:
+                    self._validate_event(event)
+                except Exception as e:
+                    self.logger.error(f"Error processing event {event}: {e}")
+                    event_counts['errors'] += 1
+                    continue
+                
+                self._apply_event(event, event_counts)
+            
+            self.logger.info(f"Event processing complete: {event_counts}")
+            return event_counts
+        
+        event_queue = queue.Queue(maxsize=self.queue_size)
+        writer_errors = []
+        writer = threading.Thread(
+            target=self._write_events,
+            args=(event_queue, event_counts, writer_errors),
+            name="event-db-writer",
+            daemon=True
+        )
+        writer.start()
+        
+        # Only the writer thread touches event_counts until it is joined
+        validation_errors = 0
+        try:
+            for event in sorted_events:
+                try:
+                    self._validate_event(event)
+                except Exception as e:
+                    self.logger.error(f"Error processing event {event}: {e}")
+                    validation_errors += 1
+                    continue
                 
-            except Exception as e:
-                self.logger.error(f"Error processing event {event}: {e}")
-                event_counts['errors'] += 1
+                event_queue.put(event)
+        finally:
+            event_queue.put(_END_OF_EVENTS)
+            writer.join()
+        
+        if writer_errors:
+            raise writer_errors[0]
+        
+        event_counts['errors'] += validation_errors
         
         self.logger.info(f"Event processing complete: {event_counts}")
         return event_counts
     
+    def _write_events(self, event_queue: queue.Queue, event_counts: Dict[str, int],
+                      writer_errors: List[BaseException]) -> None:
+        """
+        Apply validated events from the queue until the end marker is received.
+        
+        Runs on the database writer thread. The whole stream is applied in one
+        transaction so it is committed only once; each event runs in its own
+        savepoint, so an event that fails leaves no partial writes behind.
+        Failures that abort the transaction are stored in writer_errors for the
+        caller to re-raise.
+        
+        Args:
+            event_queue: Queue of validated PubSubEvent objects
+            event_counts: Dictionary of counts to update per event type
+            writer_errors: List collecting a fatal error, if any
+        """
+        end_received = False
+        try:
+            with self.db_manager.transaction():
+                while True:
+                    event = event_queue.get()
+                    if event is _END_OF_EVENTS:
+                        end_received = True
+                        break
+                    
+                    self._apply_event(event, event_counts)
+                    
+        except BaseException as e:
+            writer_errors.append(e)
+            # Keep draining so the producer never blocks on a full queue
+            while not end_received:
+                end_received = event_queue.get() is _END_OF_EVENTS
+    
+    def _apply_event(self, event: PubSubEvent, event_counts: Dict[str, int]) -> None:
+        """
+        Apply one validated event atomically and count the outcome.
+        
+        The event's writes run in a savepoint: if its handler raises, they are
+        rolled back and the event is counted as an error.
+        
+        Args:
+            event: Validated PubSubEvent to apply
+            event_counts: Dictionary of counts to update per event type
+        """
+        try:
+            with self.db_manager.savepoint():
+                self._process_single_event(event)
+            event_counts[event.event_type] += 1
+            
+        except Exception as e:
+            self.logger.error(f"Error processing event {event}: {e}")
+            event_counts['errors'] += 1
+    
     def _validate_event(self, event: PubSubEvent) -> None:
         """
         Validate event data before processing.
@@ -113,23 +229,17 @@ class EventProcessor:
         """
         self.logger.debug(f"Handling change_permission for {event.file_path}")
         
-        # Get existing record
-        existing_record = self.db_manager.get_file_record(event.file_path)
-        if not existing_record:
-            self.logger.warning(f"File not found for permission change: {event.file_path}")
-            return
-        
         # Extract new permissions from metadata
         new_permissions = self._extract_permissions_from_metadata(event.metadata)
         if new_permissions is None:
             self.logger.warning(f"No permissions found in metadata for {event.file_path}")
             return
         
-        # Update permissions and last_modified
-        existing_record.permissions = new_permissions
-        existing_record.last_modified = event.timestamp
+        # Update permissions and last_modified; no row updated means the file is unknown
+        if not self.db_manager.update_file_permissions(event.file_path, new_permissions, event.timestamp):
+            self.logger.warning(f"File not found for permission change: {event.file_path}")
+            return
         
-        self.db_manager.update_file_record(existing_record)
         self.logger.debug(f"Updated permissions for {event.file_path} to {new_permissions}")
     
     def _handle_delete(self, event: PubSubEvent) -> None:
@@ -141,13 +251,10 @@ class EventProcessor:
         """
         self.logger.debug(f"Handling delete for {event.file_path}")
         
-        # Check if record exists before deleting
-        existing_record = self.db_manager.get_file_record(event.file_path)
-        if not existing_record:
+        if not self.db_manager.delete_file_record(event.file_path):
             self.logger.warning(f"File not found for deletion: {event.file_path}")
             return
         
-        self.db_manager.delete_file_record(event.file_path)
         self.logger.debug(f"Deleted record for {event.file_path}")
     
     def _handle_create(self, event: PubSubEvent) -> None:
@@ -159,19 +266,17 @@ class EventProcessor:
         """
         self.logger.debug(f"Handling create for {event.file_path}")
         
-        # Check if record already exists
-        existing_record = self.db_manager.get_file_record(event.file_path)
-        if existing_record:
-            self.logger.warning(f"File already exists for creation: {event.file_path}")
-            return
-        
         # Create new file record from event metadata
         file_record = self._create_file_record_from_event(event)
         if not file_record:
             self.logger.error(f"Could not create file record from event: {event}")
             return
         
-        self.db_manager.insert_file_record(file_record)
+        # Insert only if no record exists yet (single statement, no prior lookup)
+        if not self.db_manager.try_insert_file_record(file_record):
+            self.logger.warning(f"File already exists for creation: {event.file_path}")
+            return
+        
         self.logger.debug(f"Created record for {event.file_path}")
     
     def _handle_rename(self, event: PubSubEvent) -> None:
@@ -183,20 +288,12 @@ class EventProcessor:
         """
         self.logger.debug(f"Handling rename from {event.file_path} to {event.new_path}")
         
-        # Get existing record
-        existing_record = self.db_manager.get_file_record(event.file_path)
-        if not existing_record:
+        # Update the file path and last_modified in a single statement (no prior lookup)
+        if not self.db_manager.rename_file_record(event.file_path, event.new_path,
+                                                  last_modified=event.timestamp):
             self.logger.warning(f"File not found for rename: {event.file_path}")
             return
         
-        # Delete old record and create new one with updated path
-        self.db_manager.delete_file_record(event.file_path)
-        
-        # Update the file path and last_modified
-        existing_record.file_path = event.new_path
-        existing_record.last_modified = event.timestamp
-        
-        self.db_manager.insert_file_record(existing_record)
         self.logger.debug(f"Renamed {event.file_path} to {event.new_path}")
     
     def _handle_move(self, event: PubSubEvent) -> None:
@@ -209,34 +306,22 @@ class EventProcessor:
         """
         self.logger.debug(f"Handling move from {event.file_path} to {event.new_path}")
         
-        # Get existing record
-        existing_record = self.db_manager.get_file_record(event.file_path)
-        if not existing_record:
+        # Move the record in place, keeping its internal_id and other fields
+        if not self.db_manager.rename_file_record(event.file_path, event.new_path,
+                                                  last_modified=event.timestamp):
             self.logger.warning(f"File not found for move: {event.file_path}")
             return
         
-        # Delete old record and create new one with updated path
-        self.db_manager.delete_file_record(event.file_path)
-        
-        # Update the file path, last_modified, and potentially other metadata
-        existing_record.file_path = event.new_path
-        existing_record.last_modified = event.timestamp
-        
         # Update other metadata if provided
         if event.metadata:
-            permissions = self._extract_permissions_from_metadata(event.metadata)
-            if permissions:
-                existing_record.permissions = permissions
-            
             size = event.metadata.get('size')
-            if size is not None:
-                existing_record.size = int(size)
-            
-            file_type = event.metadata.get('file_type')
-            if file_type:
-                existing_record.file_type = file_type
+            self.db_manager.update_file_metadata(
+                event.new_path,
+                permissions=self._extract_permissions_from_metadata(event.metadata) or None,
+                size=int(size) if size is not None else None,
+                file_type=event.metadata.get('file_type') or None
+            )
         
-        self.db_manager.insert_file_record(existing_record)
         self.logger.debug(f"Moved {event.file_path} to {event.new_path}")
     
     def _extract_permissions_from_metadata(self, metadata: Optional[Dict[str, Any]]) -> Optional[str]:
@@ -1,10 +1,15 @@
 """
 Main sync service orchestrator for S3 to file manager synchronization.
 """
-import os
+import queue
+import sqlite3
+import time
 import uuid
-from typing import Dict, Any, Optional, List
-from datetime import datetime
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Iterator, Tuple, TextIO, Union
+from datetime import datetime, timedelta
 from loguru import logger
 
 from ..clients.s3_manager import S3Manager, S3Object
@@ -13,7 +18,29 @@ from ..services.database_manager import DatabaseManager
 from ..services.csv_processor import CSVProcessor
 from ..services.event_processor import EventProcessor
 from ..models.config import SyncConfig
-from ..models.data_models import FileRecord, FileOperation
+from ..models.data_models import FileRecord, FileOperation, PubSubEvent, SyncStats
+
+
+# Number of processed files written to the database per transaction during initial sync
+_UPSERT_BATCH_SIZE = 1000
+
+# Maximum seconds processed files wait before being written during initial sync
+_UPSERT_FLUSH_INTERVAL = 1.0
+
+# Maximum number of processed files waiting for the initial sync database writer
+_RECORD_QUEUE_SIZE = 10000
+
+# Maximum number of listed S3 objects waiting to be processed during initial sync
+_LIST_QUEUE_SIZE = 1024
+
+# Number of listed S3 objects whose permissions are fetched with one bulk request
+_PERMISSIONS_BATCH_SIZE = 1000
+
+# Marks the end of the S3 listing for the initial sync workers
+_END_OF_OBJECTS = object()
+
+# Marks the end of the processed files for the initial sync database writer
+_END_OF_RECORDS = object()
 
 
 class SyncService:
@@ -33,11 +60,24 @@ class SyncService:
         
         # Initialize components
         self.s3_manager = S3Manager(config.customer_s3)
-        self.infrastructure_api = InfrastructureAPI(config.mock_api_url)
-        self.database_manager = DatabaseManager(config.database_path)
+        self.infrastructure_api = InfrastructureAPI(config.mock_api_url, pool_maxsize=config.s3_workers)
+        self.database_manager = DatabaseManager(config.database_path, config.database_synchronous)
         self.csv_processor = CSVProcessor()
         self.event_processor = EventProcessor(self.database_manager)
         
+        # Periodic sync worker state; setting the event wakes and stops the worker
+        self._stop_event = threading.Event()
+        self._sync_thread: Optional[threading.Thread] = None
+        
+        # (monotonic time, result) of the last connection test
+        self._conn_test_cache = (0.0, False)
+        
+        # Static part of the service info sent with every sync report
+        self._service_info = {
+            'database_path': config.database_path,
+            'customer_bucket': config.customer_s3.bucket
+        }
+        
         logger.info("SyncService initialized successfully")
     
     def run_initial_sync(self) -> Dict[str, Any]:
@@ -58,67 +98,75 @@ class SyncService:
         """
         logger.info("Starting initial sync process")
         
-        sync_stats = {
-            'start_time': datetime.now(),
-            'files_processed': 0,
-            'files_failed': 0,
-            'total_size': 0,
-            'errors': []
-        }
+        sync_stats = SyncStats(start_time=datetime.now())
         
         try:
             # Test connections before starting
-            if not self._test_connections():
+            if not self._test_connections_cached():
                 raise Exception("Connection tests failed - cannot proceed with sync")
             
             logger.info("Scanning customer S3 bucket for objects")
             
-            # Scan S3 bucket and process each object
-            for s3_object in self.s3_manager.list_objects():
-                try:
-                    logger.debug(f"Processing S3 object: {s3_object.key}")
+            # A single writer thread stores records in batches, so neither the
+            # workers nor this thread ever wait on SQLite
+            record_queue = queue.Queue(maxsize=_RECORD_QUEUE_SIZE)
+            writer_errors = []
+            writer = threading.Thread(
+                target=self._write_records,
+                args=(record_queue, writer_errors),
+                name="initial-sync-db-writer",
+                daemon=True
+            )
+            writer.start()
+            
+            try:
+                for s3_object, file_record, error in self._iter_processed_files():
+                    if error is not None:
+                        sync_stats.files_failed += 1
+                        error_msg = f"Error processing {s3_object.key}: {str(error)}"
+                        sync_stats.errors.append(error_msg)
+                        logger.error(error_msg)
+                        continue
                     
-                    # Process the file and update statistics
-                    if self._process_file(s3_object):
-                        sync_stats['files_processed'] += 1
-                        sync_stats['total_size'] += s3_object.size
-                        logger.info(f"Successfully processed file: {s3_object.key}")
+                    # Update statistics from the processing result
+                    if file_record is not None:
+                        record_queue.put(file_record)
+                        sync_stats.files_processed += 1
+                        sync_stats.total_size += s3_object.size
+                        logger.info("Successfully processed file: {}", s3_object.key)
                     else:
-                        sync_stats['files_failed'] += 1
+                        sync_stats.files_failed += 1
                         logger.warning(f"Failed to process file: {s3_object.key}")
-                        
-                except Exception as e:
-                    sync_stats['files_failed'] += 1
-                    error_msg = f"Error processing {s3_object.key}: {str(e)}"
-                    sync_stats['errors'].append(error_msg)
-                    logger.error(error_msg)
-                    continue
+            finally:
+                # Files already saved to disk must not be lost from the database
+                record_queue.put(_END_OF_RECORDS)
+                writer.join()
             
-            sync_stats['end_time'] = datetime.now()
-            sync_stats['duration'] = (sync_stats['end_time'] - sync_stats['start_time']).total_seconds()
+            if writer_errors:
+                raise writer_errors[0]
             
-            sync_stats['success'] = True
+            sync_stats.finish(success=True)
             
-            logger.info(f"Initial sync completed - Processed: {sync_stats['files_processed']}, "
-                       f"Failed: {sync_stats['files_failed']}, "
-                       f"Total size: {sync_stats['total_size']} bytes, "
-                       f"Duration: {sync_stats['duration']:.2f} seconds")
+            logger.info(f"Initial sync completed - Processed: {sync_stats.files_processed}, "
+                       f"Failed: {sync_stats.files_failed}, "
+                       f"Total size: {sync_stats.total_size} bytes, "
+                       f"Duration: {sync_stats.duration:.2f} seconds")
             
             # Report results to configured endpoints
             try:
                 self._report_sync_results(sync_stats, 'initial')
             except Exception as e:
                 logger.warning(f"Failed to report sync results: {str(e)}")
-                sync_stats['errors'].append(f"Result reporting failed: {str(e)}")
+                sync_stats.errors.append(f"Result reporting failed: {str(e)}")
             
-            return sync_stats
+            return sync_stats.to_dict()
             
         except Exception as e:
-            sync_stats['end_time'] = datetime.now()
-            sync_stats['duration'] = (sync_stats['end_time'] - sync_stats['start_time']).total_seconds()
-            sync_stats['success'] = False
+            if isinstance(e, InfrastructureAPIError):
+                self._invalidate_connection_test()
+            sync_stats.finish(success=False)
             error_msg = f"Initial sync failed: {str(e)}"
-            sync_stats['errors'].append(error_msg)
+            sync_stats.errors.append(error_msg)
             logger.error(error_msg)
             
             # Still try to report the failure
@@ -129,43 +177,204 @@ class SyncService:
             
             raise
     
-    def _process_file(self, s3_object: S3Object) -> bool:
+    def _iter_processed_files(self) -> Iterator[Tuple[S3Object, Optional[FileRecord], Optional[Exception]]]:
+        """
+        List the customer bucket and process its objects concurrently.
+        
+        A lister thread feeds objects through a bounded queue to s3_workers
+        consumer threads, so paginated LIST requests overlap with processing
+        and at most _LIST_QUEUE_SIZE listed objects wait in memory. The work is
+        dominated by S3 and API round-trips, so threads overlap it well. The
+        lister fetches permissions for every _PERMISSIONS_BATCH_SIZE objects
+        with one bulk request instead of one request per file.
+        
+        Yields:
+            (s3_object, file_record, error) tuples in completion order, where
+            file_record is the result of _process_file and error is set if
+            processing raised
+            
+        Raises:
+            Exception: If listing the bucket or queueing listed objects fails,
+                after all queued objects are processed
+        """
+        workers = self.config.s3_workers
+        object_queue = queue.Queue(maxsize=_LIST_QUEUE_SIZE)
+        result_queue = queue.Queue()
+        stop = threading.Event()
+        listing_errors = []
+        
+        def enqueue(batch):
+            permissions = self._prefetch_permissions([s3_object.key for s3_object in batch])
+            for s3_object in batch:
+                object_queue.put((s3_object, permissions.get(s3_object.key)))
+        
+        def produce():
+            batch = []
+            try:
+                try:
+                    for s3_object in self.s3_manager.list_objects():
+                        if stop.is_set():
+                            break
+                        batch.append(s3_object)
+                        if len(batch) >= _PERMISSIONS_BATCH_SIZE:
+                            # Taken out first, so a batch whose enqueue failed is not retried
+                            full_batch, batch = batch, []
+                            enqueue(full_batch)
+                except Exception as e:
+                    listing_errors.append(e)
+                
+                # Objects listed before a listing failure are still processed
+                if batch and not stop.is_set():
+                    enqueue(batch)
+            except Exception as e:
+                listing_errors.append(e)
+            finally:
+                # Consumers, and so the caller, wait for these whatever happened
+                for _ in range(workers):
+                    object_queue.put(_END_OF_OBJECTS)
+        
+        def consume():
+            while True:
+                item = object_queue.get()
+                if item is _END_OF_OBJECTS:
+                    result_queue.put(_END_OF_OBJECTS)
+                    return
+                if stop.is_set():
+                    # Consumer abandoned the results; just drain the queue
+                    continue
+                s3_object, permissions = item
+                try:
+                    result_queue.put((s3_object, self._process_file(s3_object, permissions), None))
+                except Exception as e:
+                    result_queue.put((s3_object, None, e))
+        
+        lister = threading.Thread(target=produce, name="s3-lister", daemon=True)
+        lister.start()
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in range(workers):
+                executor.submit(consume)
+            
+            try:
+                finished_workers = 0
+                while finished_workers < workers:
+                    result = result_queue.get()
+                    if result is _END_OF_OBJECTS:
+                        finished_workers += 1
+                        continue
+                    yield result
+            finally:
+                stop.set()
+        
+        lister.join()
+        if listing_errors:
+            raise listing_errors[0]
+    
+    def _write_records(self, record_queue: queue.Queue, writer_errors: List[BaseException]) -> None:
+        """
+        Store FileRecords from the queue until the end marker is received.
+        
+        Runs on the initial sync database writer thread. Records are written
+        with upsert_many once _UPSERT_BATCH_SIZE have accumulated, or once
+        _UPSERT_FLUSH_INTERVAL seconds have passed since the last write, so
+        progress is persisted steadily even when processing is slow. Failures
+        are stored in writer_errors for the caller to re-raise.
+        
+        Args:
+            record_queue: Queue of FileRecords to store
+            writer_errors: List collecting a fatal error, if any
+        """
+        pending: List[FileRecord] = []
+        last_flush = time.monotonic()
+        end_received = False
+        try:
+            while not end_received:
+                try:
+                    record = record_queue.get(timeout=_UPSERT_FLUSH_INTERVAL)
+                except queue.Empty:
+                    record = None
+                
+                if record is _END_OF_RECORDS:
+                    end_received = True
+                elif record is not None:
+                    pending.append(record)
+                
+                if pending and (end_received or len(pending) >= _UPSERT_BATCH_SIZE
+                                or time.monotonic() - last_flush >= _UPSERT_FLUSH_INTERVAL):
+                    self.database_manager.upsert_many(pending)
+                    pending.clear()
+                    last_flush = time.monotonic()
+                    
+        except BaseException as e:
+            writer_errors.append(e)
+            # Keep draining so the producer never blocks on a full queue
+            while not end_received:
+                end_received = record_queue.get() is _END_OF_RECORDS
+    
+    def _prefetch_permissions(self, file_paths: List[str]) -> Dict[str, str]:
         """
-        Process a single file from S3: get permissions, save to disk, store in database.
+        Fetch permissions for a batch of files with one bulk API request.
+        
+        Args:
+            file_paths: Paths of the files about to be processed
+            
+        Returns:
+            Dictionary mapping file paths to permissions; empty if the bulk
+            request failed, in which case files fetch their own permissions
+        """
+        try:
+            permissions = self.infrastructure_api.get_permissions_bulk(file_paths)
+        except InfrastructureAPIError as e:
+            logger.warning(f"Bulk permissions request failed, falling back to per-file requests: {str(e)}")
+            return {}
+        
+        # Malformed entries are left out, so those files fetch their own
+        return {
+            file_path: permissions_data.get('permissions', 'rw-r--r--')
+            for file_path, permissions_data in permissions.items()
+            if isinstance(permissions_data, dict)
+        }
+    
+    def _process_file(self, s3_object: S3Object, permissions: Optional[str] = None) -> Optional[FileRecord]:
+        """
+        Process a single file from S3: get permissions, save to disk, build its record.
+        
+        The returned record is not stored; the caller writes records to the
+        database in batches.
         
         Args:
             s3_object: S3Object containing file metadata
+            permissions: Permissions already fetched in bulk; requested from the
+                infrastructure API when not given
             
         Returns:
-            bool: True if file was processed successfully, False otherwise
+            FileRecord for the processed file, or None if processing failed
         """
         try:
-            # Step 1: Get file stream and metadata from S3
-            logger.debug(f"Getting file stream for: {s3_object.key}")
-            file_stream = self.s3_manager.get_object_stream(s3_object.key)
+            logger.debug("Processing S3 object: {}", s3_object.key)
             
-            # Get additional metadata from S3
+            # Step 1: Get metadata from S3
             s3_metadata = self.s3_manager.get_object_metadata(s3_object.key)
             
-            # Step 2: Get file permissions from infrastructure API
-            logger.debug(f"Getting permissions for: {s3_object.key}")
-            permissions_response = self.infrastructure_api.update_permissions(s3_object.key)
-            permissions = permissions_response.get('permissions', 'rw-r--r--')
-            
-            # Step 3: Read the stream into memory to avoid seek issues
-            logger.debug(f"Reading file content for: {s3_object.key}")
-            file_content = file_stream.read()
-            
-            # Create a BytesIO stream from the content
-            from io import BytesIO
-            content_stream = BytesIO(file_content)
+            # Step 2: Get file permissions from infrastructure API unless prefetched
+            if permissions is None:
+                logger.debug("Getting permissions for: {}", s3_object.key)
+                permissions_response = self.infrastructure_api.update_permissions(s3_object.key)
+                permissions = permissions_response.get('permissions', 'rw-r--r--')
+            
+            # Step 3: Download the content into a buffer sized from the listing;
+            # it is uploaded as-is, so retries never need to seek the S3 stream
+            logger.debug("Downloading file content for: {}", s3_object.key)
+            file_content = self.s3_manager.download_object(
+                s3_object.key, s3_object.size, etag=s3_object.etag
+            )
             
             # Step 4: Save file to disk via infrastructure API
-            logger.debug(f"Saving file to disk: {s3_object.key}")
+            logger.debug("Saving file to disk: {}", s3_object.key)
             save_response = self.infrastructure_api.save_to_disk(
                 operation='create',
                 file_path=s3_object.key,
-                file_stream=content_stream,
+                file_stream=file_content,
                 size=s3_object.size,
                 file_type=s3_metadata.get('content_type', 'application/octet-stream'),
                 metadata={
@@ -178,7 +387,7 @@ class SyncService:
             # Extract internal ID from save response
             internal_id = save_response.get('internal_id') or str(uuid.uuid4())
             
-            # Step 5: Create file record and store in database
+            # Step 5: Create file record for the database
             file_record = FileRecord(
                 file_path=s3_object.key,
                 permissions=permissions,
@@ -188,18 +397,16 @@ class SyncService:
                 internal_id=internal_id
             )
             
-            logger.debug(f"Storing file record in database: {s3_object.key}")
-            self.database_manager.upsert_file_record(file_record)
-            
-            logger.debug(f"Successfully processed file: {s3_object.key} -> {internal_id}")
-            return True
+            logger.debug("Successfully processed file: {} -> {}", s3_object.key, internal_id)
+            return file_record
             
         except InfrastructureAPIError as e:
+            self._invalidate_connection_test()
             logger.error(f"Infrastructure API error processing {s3_object.key}: {str(e)}")
-            return False
+            return None
         except Exception as e:
             logger.error(f"Unexpected error processing {s3_object.key}: {str(e)}")
-            return False
+            return None
     
     def _test_connections(self) -> bool:
         """
@@ -241,6 +448,27 @@ class SyncService:
         logger.info("All service connections tested successfully")
         return True
     
+    def _test_connections_cached(self, ttl: float = 300) -> bool:
+        """
+        Test connections, reusing a successful result for up to ttl seconds.
+        
+        Failed tests are never cached, so a broken service is re-checked on
+        the next sync.
+        """
+        now = time.monotonic()
+        tested_at, ok = self._conn_test_cache
+        if ok and now - tested_at < ttl:
+            logger.debug("Using cached connection test result")
+            return True
+        
+        ok = self._test_connections()
+        self._conn_test_cache = (now, ok)
+        return ok
+    
+    def _invalidate_connection_test(self) -> None:
+        """Force the next sync to re-test connections."""
+        self._conn_test_cache = (0.0, False)
+    
     def get_sync_status(self) -> Dict[str, Any]:
         """
         Get current sync service status and statistics.
@@ -267,12 +495,13 @@ class SyncService:
                 'error': str(e)
             }
     
-    def export_state_to_csv(self, filename: str) -> None:
+    def export_state_to_csv(self, filename: Union[str, TextIO]) -> None:
         """
         Export current database state to CSV file.
         
         Args:
-            filename: Path where CSV file should be saved
+            filename: Path where CSV file should be saved, or an open text
+                stream such as io.StringIO to keep the snapshot in memory
         """
         logger.info(f"Exporting database state to CSV: {filename}")
         
@@ -284,21 +513,27 @@ class SyncService:
             logger.error(f"Failed to export state to CSV: {str(e)}")
             raise
     
-    def process_csv_diff(self, old_csv: str, new_csv: str) -> list[FileOperation]:
+    def process_csv_diff(self, old_csv: Union[str, TextIO],
+                         new_csv: Union[str, TextIO]) -> list[FileOperation]:
         """
         Process differences between two CSV files and generate FileOperation objects.
         
         Args:
-            old_csv: Path to the old state CSV file
-            new_csv: Path to the new state CSV file
+            old_csv: Path to the old state CSV file, or a text stream positioned
+                at its start
+            new_csv: Path to the new state CSV file, or a text stream positioned
+                at its start
             
         Returns:
             List of FileOperation objects representing the differences
         """
-        logger.info(f"Processing CSV diff between {old_csv} and {new_csv}")
-        
         try:
-            operations = self.csv_processor.compare_csv_files(old_csv, new_csv)
+            if isinstance(old_csv, str) and isinstance(new_csv, str):
+                logger.info(f"Processing CSV diff between {old_csv} and {new_csv}")
+                operations = self.csv_processor.compare_csv_files(old_csv, new_csv)
+            else:
+                logger.info("Processing CSV diff between in-memory exports")
+                operations = self.csv_processor.compare_csv_streams(old_csv, new_csv)
             
             logger.info(f"CSV diff processing completed - Found {len(operations)} operations")
             
@@ -318,117 +553,113 @@ class SyncService:
     
     def run_incremental_sync(self) -> Dict[str, Any]:
         """
-        Perform incremental synchronization using event replay and CSV diff approach.
+        Perform incremental synchronization using event replay and state diff approach.
         
         This method implements the complete incremental sync workflow:
-        1. Export current database state to CSV (old state)
-        2. Retrieve and process pub/sub events to update database
-        3. Export updated database state to CSV (new state)
-        4. Compare CSV files to identify differences
+        1. Retrieve pub/sub events from the infrastructure API
+        2. Snapshot the database records touched by those events (old state)
+        3. Process events to update the database
+        4. Snapshot the same records again (new state) and diff them in memory
         5. Execute operations based on differences
         6. Report results to configured endpoints
         
+        Only records referenced by events can change, so the cost of a cycle
+        grows with the number of events rather than the size of the database.
+        
         Returns:
             Dictionary containing sync statistics and results
         """
         logger.info("Starting incremental sync process")
         
-        sync_stats = {
-            'start_time': datetime.now(),
-            'events_processed': 0,
-            'operations_processed': 0,
-            'operations_failed': 0,
-            'event_counts': {},
-            'errors': []
-        }
-        
-        old_csv_path = None
-        new_csv_path = None
+        sync_stats = SyncStats(start_time=datetime.now())
         
         try:
             # Test connections before starting
-            if not self._test_connections():
+            if not self._test_connections_cached():
                 raise Exception("Connection tests failed - cannot proceed with incremental sync")
             
-            # Step 1: Export current database state to CSV (old state)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            old_csv_path = f"data/sync_state_old_{timestamp}.csv"
-            logger.info(f"Exporting current state to: {old_csv_path}")
-            self.export_state_to_csv(old_csv_path)
-            
-            # Step 2: Retrieve and process pub/sub events
+            # Step 1: Retrieve pub/sub events
             logger.info("Retrieving pub/sub events from infrastructure API")
             events = self.infrastructure_api.get_pub_sub_events(count=50)
             logger.info(f"Retrieved {len(events)} events for processing")
             
             if events:
-                # Process events to update database
+                # Step 2: Snapshot the records the events can touch (old state)
+                affected_paths = self._get_affected_paths(events)
+                old_records = self.database_manager.get_records_by_paths(affected_paths)
+                
+                # Step 3: Process events to update database
                 logger.info("Processing events to update database state")
                 event_counts = self.event_processor.process_events(events)
-                sync_stats['events_processed'] = len(events)
-                sync_stats['event_counts'] = event_counts
+                sync_stats.events_processed = len(events)
+                sync_stats.event_counts = event_counts
                 logger.info(f"Event processing completed: {event_counts}")
+                
+                # Step 4: Snapshot the same records again and diff the two states
+                logger.info(f"Comparing old and new states of {len(affected_paths)} affected files")
+                new_records = self.database_manager.get_records_by_paths(affected_paths)
+                operations = self.csv_processor.generate_operations_from_records(old_records, new_records)
             else:
                 logger.info("No events to process - database state unchanged")
-                sync_stats['event_counts'] = {}
+                operations = []
             
-            # Step 3: Export updated database state to CSV (new state)
-            new_csv_path = f"data/sync_state_new_{timestamp}.csv"
-            logger.info(f"Exporting updated state to: {new_csv_path}")
-            self.export_state_to_csv(new_csv_path)
+            # Group by type so each group is executed with bulk database writes;
+            # operations are consumed as they are generated
+            operation_groups = defaultdict(list)
+            operation_count = 0
+            for operation in operations:
+                operation_groups[operation.operation_type].append(operation)
+                operation_count += 1
             
-            # Step 4: Process CSV diff to identify operations
-            logger.info("Comparing old and new states to identify operations")
-            operations = self.process_csv_diff(old_csv_path, new_csv_path)
-            logger.info(f"Identified {len(operations)} operations to execute")
+            logger.info(f"Identified {operation_count} operations to execute")
             
             # Step 5: Execute operations based on differences
-            if operations:
+            if operation_groups:
                 logger.info("Executing operations based on identified differences")
-                for operation in operations:
+                for operation_type, group in operation_groups.items():
                     try:
-                        if self._execute_operation(operation):
-                            sync_stats['operations_processed'] += 1
-                            logger.info(f"Successfully executed {operation.operation_type} for {operation.file_path}")
-                        else:
-                            sync_stats['operations_failed'] += 1
-                            logger.warning(f"Failed to execute {operation.operation_type} for {operation.file_path}")
-                            
+                        results = self._execute_operation_group(operation_type, group)
                     except Exception as e:
-                        sync_stats['operations_failed'] += 1
-                        error_msg = f"Error executing {operation.operation_type} for {operation.file_path}: {str(e)}"
-                        sync_stats['errors'].append(error_msg)
+                        sync_stats.operations_failed += len(group)
+                        error_msg = f"Error executing {len(group)} {operation_type} operations: {str(e)}"
+                        sync_stats.errors.append(error_msg)
                         logger.error(error_msg)
                         continue
+                    
+                    for operation, succeeded in zip(group, results):
+                        if succeeded:
+                            sync_stats.operations_processed += 1
+                            logger.info("Successfully executed {} for {}", operation.operation_type, operation.file_path)
+                        else:
+                            sync_stats.operations_failed += 1
+                            logger.warning(f"Failed to execute {operation.operation_type} for {operation.file_path}")
             else:
                 logger.info("No operations to execute - states are identical")
             
             # Calculate final statistics
-            sync_stats['end_time'] = datetime.now()
-            sync_stats['duration'] = (sync_stats['end_time'] - sync_stats['start_time']).total_seconds()
-            sync_stats['success'] = True
+            sync_stats.finish(success=True)
             
             logger.info(f"Incremental sync completed successfully - "
-                       f"Events: {sync_stats['events_processed']}, "
-                       f"Operations processed: {sync_stats['operations_processed']}, "
-                       f"Operations failed: {sync_stats['operations_failed']}, "
-                       f"Duration: {sync_stats['duration']:.2f} seconds")
+                       f"Events: {sync_stats.events_processed}, "
+                       f"Operations processed: {sync_stats.operations_processed}, "
+                       f"Operations failed: {sync_stats.operations_failed}, "
+                       f"Duration: {sync_stats.duration:.2f} seconds")
             
             # Step 6: Report results to configured endpoints
             try:
                 self._report_sync_results(sync_stats, 'incremental')
             except Exception as e:
                 logger.warning(f"Failed to report sync results: {str(e)}")
-                sync_stats['errors'].append(f"Result reporting failed: {str(e)}")
+                sync_stats.errors.append(f"Result reporting failed: {str(e)}")
             
-            return sync_stats
+            return sync_stats.to_dict()
             
         except Exception as e:
-            sync_stats['end_time'] = datetime.now()
-            sync_stats['duration'] = (sync_stats['end_time'] - sync_stats['start_time']).total_seconds()
-            sync_stats['success'] = False
+            if isinstance(e, InfrastructureAPIError):
+                self._invalidate_connection_test()
+            sync_stats.finish(success=False)
             error_msg = f"Incremental sync failed: {str(e)}"
-            sync_stats['errors'].append(error_msg)
+            sync_stats.errors.append(error_msg)
             logger.error(error_msg)
             
             # Still try to report the failure
@@ -438,120 +669,141 @@ class SyncService:
                 logger.warning(f"Failed to report sync failure: {str(report_error)}")
             
             raise
-        
-        finally:
-            # Clean up temporary CSV files if they exist
-            self._cleanup_temp_files([old_csv_path, new_csv_path])
     
-    def _execute_operation(self, operation: FileOperation) -> bool:
+    def _get_affected_paths(self, events: List[PubSubEvent]) -> List[str]:
+        """Collect every file path an event batch can modify, including rename/move targets."""
+        paths = []
+        for event in events:
+            paths.append(event.file_path)
+            if event.new_path:
+                paths.append(event.new_path)
+        return paths
+    
+    def _execute_operation_group(self, operation_type: str, 
+                                 operations: List[FileOperation]) -> List[bool]:
         """
-        Execute a single FileOperation.
+        Execute a group of FileOperations sharing the same type.
         
         Args:
-            operation: FileOperation to execute
+            operation_type: Type shared by all operations in the group
+            operations: FileOperations to execute
             
         Returns:
-            bool: True if operation was executed successfully, False otherwise
+            List of success flags, one per operation in input order
         """
-        try:
-            if operation.operation_type == 'create':
-                return self._execute_create_operation(operation)
-            elif operation.operation_type == 'update':
-                return self._execute_update_operation(operation)
-            elif operation.operation_type == 'delete':
-                return self._execute_delete_operation(operation)
-            elif operation.operation_type == 'move':
-                return self._execute_move_operation(operation)
-            else:
-                logger.error(f"Unknown operation type: {operation.operation_type}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error executing operation {operation.operation_type} for {operation.file_path}: {str(e)}")
-            return False
+        if operation_type == 'create':
+            return self._execute_create_operations(operations)
+        elif operation_type == 'update':
+            return self._execute_update_operations(operations)
+        elif operation_type == 'delete':
+            return self._execute_delete_operations(operations)
+        elif operation_type == 'move':
+            return [self._execute_move_operation(operation) for operation in operations]
+        else:
+            logger.error(f"Unknown operation type: {operation_type}")
+            return [False] * len(operations)
     
-    def _execute_create_operation(self, operation: FileOperation) -> bool:
-        """Execute a create operation."""
-        logger.debug(f"Executing create operation for: {operation.file_path}")
+    def _record_from_operation(self, operation: FileOperation, 
+                               internal_id: Optional[str] = None) -> FileRecord:
+        """Build the database record described by an operation's metadata."""
+        metadata = operation.metadata or {}
+        
+        # CSVProcessor stores last_modified as a datetime; only hand-built
+        # operations still carry ISO strings that need parsing
+        last_modified = metadata.get('last_modified') or datetime.now()
+        if isinstance(last_modified, str):
+            last_modified = datetime.fromisoformat(last_modified)
+        
+        return FileRecord(
+            file_path=operation.file_path,
+            permissions=metadata.get('permissions', 'rw-r--r--'),
+            size=metadata.get('size', 0),
+            file_type=metadata.get('file_type', 'application/octet-stream'),
+            last_modified=last_modified,
+            internal_id=internal_id or metadata.get('internal_id')
+        )
+    
+    def _execute_create_operations(self, operations: List[FileOperation]) -> List[bool]:
+        """
+        Execute create operations.
+        
+        Files are fetched from S3 and saved concurrently; the resulting
+        records are then written to the database in one batch.
+        """
+        logger.debug("Executing {} create operations", len(operations))
+        
+        with ThreadPoolExecutor(max_workers=self.config.s3_workers) as executor:
+            records = list(executor.map(self._save_created_file, operations))
+        
+        created_records = [record for record in records if record is not None]
+        if created_records:
+            self.database_manager.upsert_many(created_records)
+        
+        return [record is not None for record in records]
+    
+    def _save_created_file(self, operation: FileOperation) -> Optional[FileRecord]:
+        """Copy a created file from S3 to disk and return its record, or None on failure."""
+        logger.debug("Executing create operation for: {}", operation.file_path)
         
         # For create operations, we need to get the file from S3 and save it
         try:
-            # Get file stream from S3
-            file_stream = self.s3_manager.get_object_stream(operation.file_path)
-            file_content = file_stream.read()
+            metadata = operation.metadata or {}
             
-            from io import BytesIO
-            content_stream = BytesIO(file_content)
+            # Download file content from S3
+            file_content = self.s3_manager.download_object(
+                operation.file_path, metadata.get('size'), etag=metadata.get('etag')
+            )
             
             # Save to disk via infrastructure API
             save_response = self.infrastructure_api.save_to_disk(
                 operation='create',
                 file_path=operation.file_path,
-                file_stream=content_stream,
-                size=operation.metadata.get('size', 0),
-                file_type=operation.metadata.get('file_type', 'application/octet-stream'),
-                metadata=operation.metadata
+                file_stream=file_content,
+                size=metadata.get('size', 0),
+                file_type=metadata.get('file_type', 'application/octet-stream'),
+                metadata=metadata
             )
             
-            # Update database record
-            file_record = FileRecord(
-                file_path=operation.file_path,
-                permissions=operation.metadata.get('permissions', 'rw-r--r--'),
-                size=operation.metadata.get('size', 0),
-                file_type=operation.metadata.get('file_type', 'application/octet-stream'),
-                last_modified=datetime.fromisoformat(operation.metadata.get('last_modified', datetime.now().isoformat())),
-                internal_id=save_response.get('internal_id') or operation.metadata.get('internal_id')
-            )
-            
-            self.database_manager.upsert_file_record(file_record)
-            return True
+            return self._record_from_operation(operation, save_response.get('internal_id'))
             
         except Exception as e:
-            logger.error(f"Failed to execute create operation: {str(e)}")
-            return False
+            if isinstance(e, InfrastructureAPIError):
+                self._invalidate_connection_test()
+            logger.error(f"Failed to execute create operation for {operation.file_path}: {str(e)}")
+            return None
     
-    def _execute_update_operation(self, operation: FileOperation) -> bool:
-        """Execute an update operation."""
-        logger.debug(f"Executing update operation for: {operation.file_path}")
+    def _execute_update_operations(self, operations: List[FileOperation]) -> List[bool]:
+        """Execute update operations with a single bulk database update."""
+        logger.debug("Executing {} update operations", len(operations))
         
-        # For update operations, we update the database record and potentially re-save the file
-        try:
-            file_record = FileRecord(
-                file_path=operation.file_path,
-                permissions=operation.metadata.get('permissions', 'rw-r--r--'),
-                size=operation.metadata.get('size', 0),
-                file_type=operation.metadata.get('file_type', 'application/octet-stream'),
-                last_modified=datetime.fromisoformat(operation.metadata.get('last_modified', datetime.now().isoformat())),
-                internal_id=operation.metadata.get('internal_id')
-            )
-            
-            self.database_manager.update_file_record(file_record)
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to execute update operation: {str(e)}")
-            return False
+        results = []
+        records = []
+        for operation in operations:
+            try:
+                records.append(self._record_from_operation(operation))
+                results.append(True)
+            except Exception as e:
+                logger.error(f"Failed to execute update operation for {operation.file_path}: {str(e)}")
+                results.append(False)
+        
+        if records:
+            self.database_manager.update_many(records)
+        
+        return results
     
-    def _execute_delete_operation(self, operation: FileOperation) -> bool:
-        """Execute a delete operation."""
-        logger.debug(f"Executing delete operation for: {operation.file_path}")
+    def _execute_delete_operations(self, operations: List[FileOperation]) -> List[bool]:
+        """Execute delete operations with a single bulk database delete."""
+        logger.debug("Executing {} delete operations", len(operations))
         
-        try:
-            # Remove from database
-            self.database_manager.delete_file_record(operation.file_path)
-            
-            # Optionally, we could also delete from file manager here
-            # but that would require additional API endpoints
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to execute delete operation: {str(e)}")
-            return False
+        # Optionally, we could also delete from file manager here
+        # but that would require additional API endpoints
+        self.database_manager.delete_many([operation.file_path for operation in operations])
+        
+        return [True] * len(operations)
     
     def _execute_move_operation(self, operation: FileOperation) -> bool:
         """Execute a move operation."""
-        logger.debug(f"Executing move operation for: {operation.file_path} -> {operation.new_path}")
+        logger.debug("Executing move operation for: {} -> {}", operation.file_path, operation.new_path)
         
         try:
             # For move operations, we need to update the file_path in the database
@@ -559,38 +811,29 @@ class SyncService:
                 logger.error("Move operation requires new_path")
                 return False
             
-            # Get existing record
-            existing_record = self.database_manager.get_file_record(operation.file_path)
-            if not existing_record:
-                logger.error(f"Cannot move non-existent file: {operation.file_path}")
+            # Single UPDATE of the path: no read, and no window where the record is missing
+            try:
+                moved = self.database_manager.rename_file_record(operation.file_path, operation.new_path)
+            except sqlite3.IntegrityError:
+                logger.error(f"Cannot move {operation.file_path}: a record already exists at {operation.new_path}")
                 return False
             
-            # Delete old record
-            self.database_manager.delete_file_record(operation.file_path)
-            
-            # Create new record with updated path
-            new_record = FileRecord(
-                file_path=operation.new_path,
-                permissions=existing_record.permissions,
-                size=existing_record.size,
-                file_type=existing_record.file_type,
-                last_modified=existing_record.last_modified,
-                internal_id=existing_record.internal_id
-            )
+            if not moved:
+                logger.error(f"Cannot move non-existent file: {operation.file_path}")
+                return False
             
-            self.database_manager.insert_file_record(new_record)
             return True
             
         except Exception as e:
             logger.error(f"Failed to execute move operation: {str(e)}")
             return False
     
-    def _report_sync_results(self, sync_stats: Dict[str, Any], sync_type: str) -> None:
+    def _report_sync_results(self, sync_stats: SyncStats, sync_type: str) -> None:
         """
         Report sync results to configured endpoints.
         
         Args:
-            sync_stats: Dictionary containing sync statistics
+            sync_stats: SyncStats collected during the sync
             sync_type: Type of sync ('initial' or 'incremental')
         """
         logger.info(f"Reporting {sync_type} sync results")
@@ -599,21 +842,13 @@ class SyncService:
         results = {
             'sync_type': sync_type,
             'timestamp': datetime.now().isoformat(),
-            'success': sync_stats.get('success', False),
-            'duration_seconds': sync_stats.get('duration', 0),
-            'statistics': {
-                'events_processed': sync_stats.get('events_processed', 0),
-                'operations_processed': sync_stats.get('operations_processed', 0),
-                'operations_failed': sync_stats.get('operations_failed', 0),
-                'files_processed': sync_stats.get('files_processed', 0),
-                'files_failed': sync_stats.get('files_failed', 0),
-                'total_size': sync_stats.get('total_size', 0)
-            },
-            'event_counts': sync_stats.get('event_counts', {}),
-            'errors': sync_stats.get('errors', []),
+            'success': sync_stats.success,
+            'duration_seconds': sync_stats.duration,
+            'statistics': sync_stats.counters(),
+            'event_counts': sync_stats.event_counts,
+            'errors': sync_stats.errors,
             'service_info': {
-                'database_path': self.config.database_path,
-                'customer_bucket': self.config.customer_s3.bucket,
+                **self._service_info,
                 'record_count': self.database_manager.get_record_count()
             }
         }
@@ -634,11 +869,8 @@ class SyncService:
         This method starts a background thread that runs incremental sync
         at the configured interval. It's designed for use in applications
         that need to continue other operations while syncing periodically.
+        Calling it while the worker is running does not start another one.
         """
-        import threading
-        import time
-        from datetime import datetime, timedelta
-        
         def sync_worker():
             """Background worker function for periodic sync."""
             logger.info("Starting periodic sync worker thread")
@@ -658,46 +890,58 @@ class SyncService:
             logger.info(f"Periodic sync worker started - Next sync: {next_sync_time}")
             
             while True:
+                # Sleep exactly until the next sync; returns early if stop is requested
+                wait_seconds = max(0.0, (next_sync_time - datetime.now()).total_seconds())
+                if self._stop_event.wait(wait_seconds):
+                    break
+                
                 try:
-                    current_time = datetime.now()
-                    
-                    if current_time >= next_sync_time:
-                        logger.info("Running scheduled incremental sync in worker thread")
-                        sync_results = self.run_incremental_sync()
-                        logger.info(f"Worker incremental sync completed - "
-                                   f"Events: {sync_results['events_processed']}, "
-                                   f"Operations: {sync_results['operations_processed']}")
-                        
-                        # Schedule next sync
-                        next_sync_time = datetime.now() + timedelta(seconds=self.config.sync_interval)
-                        logger.debug(f"Next sync scheduled for: {next_sync_time}")
+                    logger.info("Running scheduled incremental sync in worker thread")
+                    sync_results = self.run_incremental_sync()
+                    logger.info(f"Worker incremental sync completed - "
+                               f"Events: {sync_results['events_processed']}, "
+                               f"Operations: {sync_results['operations_processed']}")
                     
-                    # Sleep for a short interval to avoid busy waiting
-                    time.sleep(30)
+                    # Schedule next sync
+                    next_sync_time = datetime.now() + timedelta(seconds=self.config.sync_interval)
+                    logger.debug("Next sync scheduled for: {}", next_sync_time)
                     
                 except Exception as e:
                     logger.error(f"Error in periodic sync worker: {str(e)}")
                     # Schedule next sync even if current one failed
                     next_sync_time = datetime.now() + timedelta(seconds=self.config.sync_interval)
-                    time.sleep(60)  # Wait a bit longer after an error
-                    continue
+                    if self._stop_event.wait(60):  # Wait a bit longer after an error
+                        break
+            
+            logger.info("Periodic sync worker stopped")
+        
+        # A second worker would run every sync twice; reuse the running one
+        if self._sync_thread is not None and self._sync_thread.is_alive():
+            logger.warning("Periodic sync thread is already running")
+            return
         
         # Start the worker thread as a daemon thread
-        sync_thread = threading.Thread(target=sync_worker, daemon=True)
-        sync_thread.start()
+        self._stop_event.clear()
+        self._sync_thread = threading.Thread(target=sync_worker, name="periodic-sync", daemon=True)
+        self._sync_thread.start()
         logger.info("Periodic sync thread started successfully")
     
-    def _cleanup_temp_files(self, file_paths: List[Optional[str]]) -> None:
+    def stop_periodic_sync(self, timeout: Optional[float] = None) -> None:
         """
-        Clean up temporary files created during sync operations.
+        Stop the periodic sync worker started by start_periodic_sync.
+        
+        The worker wakes immediately if it is waiting for the next sync; a
+        sync already in progress is allowed to finish.
         
         Args:
-            file_paths: List of file paths to clean up (None values are ignored)
+            timeout: Maximum seconds to wait for the worker to exit (None waits indefinitely)
         """
-        for file_path in file_paths:
-            if file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.debug(f"Cleaned up temporary file: {file_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to clean up temporary file {file_path}: {str(e)}")
\ No newline at end of file
+        self._stop_event.set()
+        
+        if self._sync_thread is not None:
+            self._sync_thread.join(timeout)
+            if self._sync_thread.is_alive():
+                logger.warning("Periodic sync thread did not stop within timeout")
+            else:
+                self._sync_thread = None
+                logger.info("Periodic sync thread stopped")
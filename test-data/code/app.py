@@ -8,15 +8,19 @@ synchronized between S3 buckets.
 
 import os
 import sys
+import copy
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 
 class SampleApplication:
     """Sample application class for testing purposes."""
     
+    # Parsed configs keyed by (path, modification time), shared by all instances
+    _CONFIG_CACHE: Dict[tuple, Dict] = {}
+    
     def __init__(self, config_path: str = "config.json"):
         """Initialize the application with configuration."""
         self.config_path = config_path
@@ -24,10 +28,16 @@ class SampleApplication:
         self.logger = self.setup_logging()
         
     def load_config(self) -> Dict:
-        """Load configuration from JSON file."""
+        """Load configuration from JSON file, reusing the parsed result while the file is unchanged."""
         try:
-            with open(self.config_path, 'r') as f:
-                return json.load(f)
+            key = (self.config_path, os.stat(self.config_path).st_mtime_ns)
+            config = self._CONFIG_CACHE.get(key)
+            if config is None:
+                with open(self.config_path, 'r') as f:
+                    config = json.load(f)
+                self._CONFIG_CACHE[key] = config
+            # Deep copy: nested sections such as api_endpoints must not be shared either
+            return copy.deepcopy(config)
         except FileNotFoundError:
             return {
                 "app_name": "Sample App",
@@ -50,20 +60,22 @@ class SampleApplication:
         
         return logger
     
-    def process_data(self, data: List[Dict]) -> List[Dict]:
-        """Process input data and return results."""
-        self.logger.info(f"Processing {len(data)} records")
+    def process_data(self, data: List[Dict], now: Callable[[], datetime] = datetime.now) -> List[Dict]:
+        """Process input data and return results; now supplies the batch timestamp."""
+        self.logger.info("Processing %d records", len(data))
+        
+        # One timestamp per batch; records don't need finer granularity
+        processed_at = now().isoformat()
         
         processed = []
         for item in data:
-            processed_item = {
-                **item,
-                "processed_at": datetime.now().isoformat(),
-                "status": "processed"
-            }
+            # Copy so the caller's records are left untouched
+            processed_item = item.copy()
+            processed_item["processed_at"] = processed_at
+            processed_item["status"] = "processed"
             processed.append(processed_item)
         
-        self.logger.info(f"Processed {len(processed)} records successfully")
+        self.logger.info("Processed %d records successfully", len(processed))
         return processed
     
     def run(self):
@@ -7,62 +7,106 @@ formats, and characteristics for comprehensive testing.
 """
 
 import os
+import csv
 import json
 import random
 import string
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+
+# Characters used for random strings
+_ALPHANUM = string.ascii_letters + string.digits
+
+# Shared encoder for the generated JSON files
+_JSON_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
+
+# Operations listed in the generated complex JSON scenarios
+_SCENARIO_OPERATIONS = ('create', 'update', 'delete', 'rename', 'move')
+
+# Value pools for the generated CSV rows
+_CSV_EXTENSIONS = ('txt', 'pdf', 'jpg', 'docx', 'json')
+_CSV_MIME_TYPES = ('text/plain', 'application/pdf', 'image/jpeg',
+                   'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+                   'application/json')
+_CSV_PERMISSIONS = ('rw-r--r--', 'rwxr-xr-x', 'rw-rw-r--', 'rw-------')
+_CSV_OWNERS = ('user', 'admin', 'system', 'service')
+
+# Pools for the generated log entries; messages depend on the level
+_LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+_LOG_COMPONENTS = ('sync_service', 's3_manager', 'database', 'api_client', 'event_processor')
+_LOG_ERROR_MESSAGES = (
+    "Failed to connect to S3 bucket",
+    "Database operation timeout",
+    "API endpoint returned 500 error",
+    "File processing failed",
+    "Invalid event format received"
+)
+_LOG_WARNING_MESSAGES = (
+    "Retrying failed operation",
+    "High memory usage detected",
+    "Slow API response time",
+    "Large file detected",
+    "Rate limit approaching"
+)
+_LOG_INFO_MESSAGES = (
+    "Operation completed successfully",
+    "File synchronized",
+    "Event processed",
+    "Database updated",
+    "API call successful"
+)
 
 
 class TestDataGenerator:
     """Generates test data files for S3 sync service testing."""
     
-    def __init__(self, base_dir: str = "test-data"):
-        """Initialize the test data generator."""
+    def __init__(self, base_dir: str = "test-data", seed: Optional[int] = None):
+        """Initialize the test data generator; pass a seed for reproducible random content."""
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(exist_ok=True)
+        self._rng = random.Random(seed)
         
     def generate_text_file(self, path: str, size_bytes: int) -> None:
         """Generate a text file with specified size."""
-        content_lines = []
-        current_size = 0
-        line_number = 1
-        
-        while current_size < size_bytes:
-            line = f"Line {line_number}: This is test content for the S3 sync service. " \
-                   f"Generated at {datetime.now().isoformat()}. Random data: {self._random_string(20)}\n"
-            
-            if current_size + len(line.encode()) > size_bytes:
-                # Truncate the last line to fit exact size
-                remaining = size_bytes - current_size
-                line = line[:remaining]
-                if not line.endswith('\n'):
-                    line = line[:-1] + '\n'
-            
-            content_lines.append(line)
-            current_size += len(line.encode())
-            line_number += 1
-        
         file_path = self.base_dir / path
         file_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.writelines(content_lines)
+        current_size = 0
+        line_number = 1
+        
+        # Lines are encoded once and streamed to the file instead of being collected first
+        with open(file_path, 'wb', buffering=1 << 20) as f:
+            while current_size < size_bytes:
+                line = f"Line {line_number}: This is test content for the S3 sync service. " \
+                       f"Generated at {datetime.now().isoformat()}. Random data: {self._random_string(20)}\n"
+                encoded = line.encode('utf-8')
+                
+                if current_size + len(encoded) > size_bytes:
+                    # Truncate the last line to fit exact size
+                    remaining = size_bytes - current_size
+                    encoded = encoded[:remaining]
+                    if not encoded.endswith(b'\n'):
+                        encoded = encoded[:-1] + b'\n'
+                
+                f.write(encoded)
+                current_size += len(encoded)
+                line_number += 1
     
     def generate_json_file(self, path: str, complexity: str = "medium") -> None:
         """Generate a JSON file with varying complexity."""
         if complexity == "simple":
             data = {
-                "id": random.randint(1, 1000),
+                "id": self._rng.randint(1, 1000),
                 "name": f"test_item_{self._random_string(5)}",
                 "timestamp": datetime.now().isoformat(),
-                "active": random.choice([True, False])
+                "active": self._rng.choice([True, False])
             }
         elif complexity == "medium":
             data = {
                 "metadata": {
-                    "id": str(random.randint(1000, 9999)),
+                    "id": str(self._rng.randint(1000, 9999)),
                     "created_at": datetime.now().isoformat(),
                     "updated_at": (datetime.now() + timedelta(hours=1)).isoformat(),
                     "version": "1.0.0"
@@ -70,8 +114,8 @@ class TestDataGenerator:
                 "config": {
                     "settings": {
                         "debug": True,
-                        "timeout": random.randint(30, 300),
-                        "retries": random.randint(1, 5)
+                        "timeout": self._rng.randint(30, 300),
+                        "retries": self._rng.randint(1, 5)
                     },
                     "features": [
                         "sync", "backup", "restore", "monitor"
@@ -81,12 +125,22 @@ class TestDataGenerator:
                     {
                         "type": "file",
                         "path": f"/test/path/{i}.txt",
-                        "size": random.randint(100, 10000)
+                        "size": self._rng.randint(100, 10000)
                     }
-                    for i in range(random.randint(5, 15))
+                    for i in range(self._rng.randint(5, 15))
                 ]
             }
         else:  # complex
+            rng = self._rng
+            scenario_count = rng.randint(3, 8)
+            
+            # Draw each integer field for all scenarios with one call
+            file_counts = rng.choices(range(10, 101), k=scenario_count)
+            min_sizes = rng.choices(range(100, 1001), k=scenario_count)
+            max_sizes = rng.choices(range(10000, 100001), k=scenario_count)
+            operation_counts = rng.choices(range(2, 6), k=scenario_count)
+            max_durations = rng.choices(range(60, 301), k=scenario_count)
+            
             data = {
                 "schema_version": "2.1.0",
                 "generated_at": datetime.now().isoformat(),
@@ -98,23 +152,20 @@ class TestDataGenerator:
                             "name": f"Test Scenario {i}",
                             "description": f"Complex test scenario {i} for sync service validation",
                             "parameters": {
-                                "file_count": random.randint(10, 100),
+                                "file_count": file_counts[i],
                                 "size_range": {
-                                    "min": random.randint(100, 1000),
-                                    "max": random.randint(10000, 100000)
+                                    "min": min_sizes[i],
+                                    "max": max_sizes[i]
                                 },
-                                "operations": random.sample(
-                                    ["create", "update", "delete", "rename", "move"], 
-                                    random.randint(2, 5)
-                                )
+                                "operations": rng.sample(_SCENARIO_OPERATIONS, operation_counts[i])
                             },
                             "expected_results": {
-                                "success_rate": random.uniform(0.95, 1.0),
-                                "max_duration_seconds": random.randint(60, 300),
-                                "error_tolerance": random.uniform(0.0, 0.05)
+                                "success_rate": rng.uniform(0.95, 1.0),
+                                "max_duration_seconds": max_durations[i],
+                                "error_tolerance": rng.uniform(0.0, 0.05)
                             }
                         }
-                        for i in range(random.randint(3, 8))
+                        for i in range(scenario_count)
                     ]
                 },
                 "environment": {
@@ -131,8 +182,8 @@ class TestDataGenerator:
         file_path = self.base_dir / path
         file_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Encode in one pass and write once instead of one write per JSON token
+        file_path.write_text(_JSON_ENCODER.encode(data), encoding='utf-8')
     
     def generate_csv_file(self, path: str, rows: int = 100) -> None:
         """Generate a CSV file with test data."""
@@ -141,69 +192,54 @@ class TestDataGenerator:
         file_path = self.base_dir / path
         file_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            # Write header
-            f.write(','.join(headers) + '\n')
-            
-            # Write data rows
-            for i in range(1, rows + 1):
-                row_data = [
-                    str(i),
-                    f"test_file_{i}.{random.choice(['txt', 'pdf', 'jpg', 'docx', 'json'])}",
-                    str(random.randint(100, 1000000)),
-                    random.choice(['text/plain', 'application/pdf', 'image/jpeg', 
-                                 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                                 'application/json']),
-                    (datetime.now() - timedelta(days=random.randint(0, 30))).isoformat(),
-                    random.choice(['rw-r--r--', 'rwxr-xr-x', 'rw-rw-r--', 'rw-------']),
-                    random.choice(['user', 'admin', 'system', 'service'])
-                ]
-                f.write(','.join(row_data) + '\n')
+        rng = self._rng
+        now = datetime.now()
+        rows_iter = (
+            (
+                i,
+                f"test_file_{i}.{rng.choice(_CSV_EXTENSIONS)}",
+                rng.randint(100, 1000000),
+                rng.choice(_CSV_MIME_TYPES),
+                (now - timedelta(days=rng.randint(0, 30))).isoformat(),
+                rng.choice(_CSV_PERMISSIONS),
+                rng.choice(_CSV_OWNERS)
+            )
+            for i in range(1, rows + 1)
+        )
+        
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(headers)
+            writer.writerows(rows_iter)
     
     def generate_log_file(self, path: str, entries: int = 50) -> None:
         """Generate a log file with realistic log entries."""
-        log_levels = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
-        components = ['sync_service', 's3_manager', 'database', 'api_client', 'event_processor']
-        
         file_path = self.base_dir / path
         file_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            base_time = datetime.now() - timedelta(hours=24)
+        rng = self._rng
+        base_time = datetime.now() - timedelta(hours=24)
+        
+        # Draw all random values up front, then format the entries in one pass
+        minute_offsets = rng.choices(range(1441), k=entries)
+        levels = rng.choices(_LOG_LEVELS, k=entries)
+        components = rng.choices(_LOG_COMPONENTS, k=entries)
+        message_indexes = rng.choices(range(len(_LOG_INFO_MESSAGES)), k=entries)
+        
+        lines = []
+        for minutes, level, component, message_index in zip(minute_offsets, levels, components, message_indexes):
+            if level == 'ERROR':
+                message = _LOG_ERROR_MESSAGES[message_index]
+            elif level == 'WARNING':
+                message = _LOG_WARNING_MESSAGES[message_index]
+            else:
+                message = _LOG_INFO_MESSAGES[message_index]
             
-            for i in range(entries):
-                timestamp = base_time + timedelta(minutes=random.randint(0, 1440))
-                level = random.choice(log_levels)
-                component = random.choice(components)
-                
-                if level == 'ERROR':
-                    messages = [
-                        "Failed to connect to S3 bucket",
-                        "Database operation timeout",
-                        "API endpoint returned 500 error",
-                        "File processing failed",
-                        "Invalid event format received"
-                    ]
-                elif level == 'WARNING':
-                    messages = [
-                        "Retrying failed operation",
-                        "High memory usage detected",
-                        "Slow API response time",
-                        "Large file detected",
-                        "Rate limit approaching"
-                    ]
-                else:
-                    messages = [
-                        "Operation completed successfully",
-                        "File synchronized",
-                        "Event processed",
-                        "Database updated",
-                        "API call successful"
-                    ]
-                
-                message = random.choice(messages)
-                log_entry = f"{timestamp.strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]} - {level} - {component} - {message}\n"
-                f.write(log_entry)
+            timestamp = base_time + timedelta(minutes=minutes)
+            lines.append(f"{timestamp.strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]} - {level} - {component} - {message}\n")
+        
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(lines))
     
     def generate_binary_file(self, path: str, size_bytes: int) -> None:
         """Generate a binary file with random data."""
@@ -212,8 +248,7 @@ class TestDataGenerator:
         
         with open(file_path, 'wb') as f:
             # Generate random binary data
-            data = bytes([random.randint(0, 255) for _ in range(size_bytes)])
-            f.write(data)
+            f.write(self._rng.randbytes(size_bytes))
     
     def generate_special_chars_files(self) -> None:
         """Generate files with special characters in names."""
@@ -246,7 +281,7 @@ class TestDataGenerator:
     
     def _random_string(self, length: int) -> str:
         """Generate a random string of specified length."""
-        return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
+        return ''.join(self._rng.choices(_ALPHANUM, k=length))
     
     def generate_test_suite(self) -> None:
         """Generate a complete test suite with various file types and sizes."""
@@ -282,7 +317,7 @@ class TestDataGenerator:
         ]
         
         for nested_file in nested_files:
-            self.generate_text_file(nested_file, random.randint(100, 5000))
+            self.generate_text_file(nested_file, self._rng.randint(100, 5000))
         
         print("Test data generation completed!")
         print(f"Files generated in: {self.base_dir.absolute()}")
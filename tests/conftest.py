@@ -3,16 +3,32 @@ Pytest configuration and fixtures for the S3 sync service tests.
 """
 import os
 import pytest
-import tempfile
+import requests
 from pathlib import Path
+from datetime import datetime
+from requests.adapters import HTTPAdapter
 
 from sync_service.clients.infrastructure_api import InfrastructureAPI
+from sync_service.models.data_models import FileRecord
 from sync_service.services.database_manager import DatabaseManager
 
 
+# Shared HTTP session so service probes reuse connections across tests
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+# Seconds to wait for a service probe before treating the service as down
+_PROBE_TIMEOUT = 2
+
+
 @pytest.fixture(scope="session", autouse=True)
-def setup_test_environment():
-    """Set up test environment variables for all tests."""
+def setup_test_environment(tmp_path_factory):
+    """
+    Set up test environment variables for all tests.
+    
+    The database lives in the session's temporary directory, which is
+    unique per pytest-xdist worker, so parallel workers never share it.
+    """
     # Set up environment variables for testing
     test_env = {
         'CUSTOMER_S3_ENDPOINT': 'http://localhost:9001',
@@ -22,7 +38,7 @@ def setup_test_environment():
         'CUSTOMER_S3_REGION': 'us-east-1',
         'MOCK_API_URL': 'http://localhost:8001',
         'FILE_MANAGER_API_URL': 'http://localhost:8000',
-        'DATABASE_PATH': 'data/test_sync.db',
+        'DATABASE_PATH': str(tmp_path_factory.mktemp("data") / "test_sync.db"),
         'SYNC_INTERVAL': '300'
     }
     
@@ -35,26 +51,48 @@ def setup_test_environment():
     # Cleanup is handled automatically when the session ends
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def http_session():
+    """Pytest fixture for the shared HTTP session."""
+    return _session
+
+
+@pytest.fixture(scope="session")
 def api_client():
-    """Pytest fixture for Infrastructure API client."""
-    return InfrastructureAPI("http://localhost:8001")
+    """Pytest fixture for Infrastructure API client, shared so tests reuse its connection pool."""
+    client = InfrastructureAPI("http://localhost:8001")
+    yield client
+    client.session.close()
 
 
 @pytest.fixture
-def temp_database():
+def temp_database(tmp_path):
     """Pytest fixture for temporary database."""
-    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp_file:
-        db_path = tmp_file.name
+    return DatabaseManager(str(tmp_path / "test.db"))
+
+
+@pytest.fixture
+def make_file_record():
+    """Factory for file records; keyword arguments override the sample defaults."""
+    defaults = dict(
+        file_path="/test/file.txt",
+        permissions="rw-r--r--",
+        size=1024,
+        file_type="text/plain",
+        last_modified=datetime(2023, 1, 1, 12, 0, 0),
+        internal_id="test-id-123"
+    )
     
-    db_manager = DatabaseManager(db_path)
-    yield db_manager
+    def _make(**overrides):
+        return FileRecord(**{**defaults, **overrides})
     
-    # Cleanup
-    try:
-        os.unlink(db_path)
-    except OSError:
-        pass
+    return _make
+
+
+@pytest.fixture
+def sample_file_record(make_file_record):
+    """Create a sample file record for testing."""
+    return make_file_record()
 
 
 @pytest.fixture
@@ -64,10 +102,14 @@ def sample_file_content():
 
 
 @pytest.fixture(scope="session")
-def check_services():
-    """Check that required services are running before tests."""
-    import requests
+def check_services(http_session):
+    """
+    Check that required services are running before tests.
     
+    Runs once per session: pytest caches the result, including a skip, so
+    every dependent test reuses the first probe. Probes time out quickly so
+    an unreachable environment skips the integration tests without stalling.
+    """
     services = [
         ("MinIO", "http://localhost:9001/minio/health/live"),
         ("Mock API", "http://localhost:8001/")
@@ -75,7 +117,7 @@ def check_services():
     
     for service_name, url in services:
         try:
-            response = requests.get(url, timeout=5)
+            response = http_session.get(url, timeout=_PROBE_TIMEOUT)
             if response.status_code not in [200, 404]:  # 404 is ok for some endpoints
                 pytest.skip(f"{service_name} is not responding correctly (status: {response.status_code})")
         except requests.exceptions.RequestException as e:
@@ -3,30 +3,63 @@
 Test runner for all S3 sync service tests.
 """
 import sys
-import subprocess
 from pathlib import Path
+import pytest
 from loguru import logger
 
 
-def run_test(test_file):
-    """Run a single test file and return success status."""
-    logger.info(f"Running {test_file}...")
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+class _SuiteResults:
+    """Pytest plugin recording which test files had failures."""
+    
+    def __init__(self):
+        self.failed = set()
+    
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.failed.add(report.nodeid.split("::")[0])
+    
+    def pytest_runtest_logreport(self, report):
+        if report.failed:
+            self.failed.add(report.nodeid.split("::")[0])
+
+
+def run_tests(test_files):
+    """
+    Run the test files in a single in-process pytest session.
+    
+    Returns:
+        List of (test_file, success) tuples in the order given
+    """
+    logger.info(f"Running {len(test_files)} test suites...")
     
+    collector = _SuiteResults()
     try:
-        result = subprocess.run([sys.executable, test_file], 
-                              capture_output=True, text=True, cwd=Path(__file__).parent.parent)
-        
-        if result.returncode == 0:
+        exit_code = pytest.main(
+            ["-q", "--rootdir", str(PROJECT_ROOT)] + [str(PROJECT_ROOT / test_file) for test_file in test_files],
+            plugins=[collector]
+        )
+    except Exception as e:
+        logger.error(f"❌ Test session ERROR - {str(e)}")
+        return [(test_file, False) for test_file in test_files]
+    
+    if exit_code not in (pytest.ExitCode.OK, pytest.ExitCode.TESTS_FAILED,
+                         pytest.ExitCode.NO_TESTS_COLLECTED):
+        logger.error(f"❌ Test session aborted with exit code {int(exit_code)}")
+        return [(test_file, False) for test_file in test_files]
+    
+    results = []
+    for test_file in test_files:
+        success = Path(test_file).as_posix() not in collector.failed
+        if success:
             logger.success(f"✅ {test_file}: PASSED")
-            return True
         else:
             logger.error(f"❌ {test_file}: FAILED")
-            logger.error(f"Error output: {result.stderr}")
-            return False
-            
-    except Exception as e:
-        logger.error(f"❌ {test_file}: ERROR - {str(e)}")
-        return False
+        results.append((test_file, success))
+    
+    return results
 
 
 def main():
@@ -41,10 +74,7 @@ def main():
         "tests/test_api_integration.py"
     ]
     
-    results = []
-    for test_file in test_files:
-        success = run_test(test_file)
-        results.append((test_file, success))
+    results = run_tests(test_files)
     
     # Summary
     passed = sum(1 for _, success in results if success)
@@ -20,10 +20,7 @@ from sync_service.clients.infrastructure_api import InfrastructureAPI, Infrastru
 from loguru import logger
 
 
-@pytest.fixture
-def api_client():
-    """Pytest fixture for API client."""
-    return InfrastructureAPI("http://localhost:8001")
+pytestmark = pytest.mark.integration
 
 
 def test_update_permissions(api_client, check_services):
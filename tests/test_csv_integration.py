@@ -1,6 +1,7 @@
 """
 Integration tests for CSV processing functionality with sync service.
 """
+import io
 import pytest
 import tempfile
 import os
@@ -12,20 +13,25 @@ from sync_service.services.database_manager import DatabaseManager
 from sync_service.models.data_models import FileRecord
 
 
+@pytest.fixture(scope="module")
+def shared_database_manager():
+    """One database for the module; tests start from an empty table instead of a new file."""
+    with tempfile.TemporaryDirectory() as db_dir:
+        yield DatabaseManager(os.path.join(db_dir, "test.db"))
+
+
 class TestCSVIntegration:
     """Test CSV processing integration with database manager."""
     
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, shared_database_manager):
         """Set up test fixtures."""
-        self.temp_dir = tempfile.mkdtemp()
-        self.db_path = os.path.join(self.temp_dir, "test.db")
-        self.database_manager = DatabaseManager(self.db_path)
+        self.database_manager = shared_database_manager
+        self.database_manager.clear_all_records()
         self.csv_processor = CSVProcessor()
-    
-    def teardown_method(self):
-        """Clean up test fixtures."""
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.temp_dir = temp_dir
+            yield
     
     def create_sample_records(self) -> list[FileRecord]:
         """Create sample file records for testing."""
@@ -52,18 +58,15 @@ class TestCSVIntegration:
         """Test exporting from database to CSV and importing back."""
         # Insert records into database
         records = self.create_sample_records()
-        for record in records:
-            self.database_manager.insert_file_record(record)
-        
-        # Export to CSV
-        csv_path = os.path.join(self.temp_dir, "export.csv")
-        self.database_manager.export_to_csv(csv_path)
+        self.database_manager.bulk_insert_file_records(records)
         
-        # Verify CSV was created
-        assert Path(csv_path).exists()
+        # Export to an in-memory CSV; only the round trip is under test
+        csv_buffer = io.StringIO()
+        self.database_manager.export_to_csv(csv_buffer)
+        csv_buffer.seek(0)
         
         # Import records from CSV using CSV processor
-        imported_records = self.csv_processor.import_records_from_csv(csv_path)
+        imported_records = self.csv_processor.import_records_from_csv(csv_buffer)
         
         # Verify imported records match original
         assert len(imported_records) == len(records)
@@ -75,12 +78,29 @@ class TestCSVIntegration:
             assert original.file_type == imported.file_type
             assert original.internal_id == imported.internal_id
     
+    def test_csv_diff_with_in_memory_exports(self):
+        """Test diffing database exports written to in-memory streams."""
+        records = self.create_sample_records()
+        self.database_manager.bulk_insert_file_records(records)
+        
+        old_csv = io.StringIO()
+        self.database_manager.export_to_csv(old_csv)
+        
+        self.database_manager.delete_file_record("/test/file2.jpg")
+        new_csv = io.StringIO()
+        self.database_manager.export_to_csv(new_csv)
+        
+        old_csv.seek(0)
+        new_csv.seek(0)
+        operations = self.csv_processor.compare_csv_streams(old_csv, new_csv)
+        
+        assert [(op.operation_type, op.file_path) for op in operations] == [('delete', '/test/file2.jpg')]
+    
     def test_csv_diff_with_database_changes(self):
         """Test CSV diff functionality with actual database changes."""
         # Initial state
         initial_records = self.create_sample_records()
-        for record in initial_records:
-            self.database_manager.insert_file_record(record)
+        self.database_manager.bulk_insert_file_records(initial_records)
         
         # Export initial state
         old_csv = os.path.join(self.temp_dir, "old_state.csv")
@@ -139,8 +159,7 @@ class TestCSVIntegration:
         """Test CSV validation with database-exported files."""
         # Insert records and export
         records = self.create_sample_records()
-        for record in records:
-            self.database_manager.insert_file_record(record)
+        self.database_manager.bulk_insert_file_records(records)
         
         csv_path = os.path.join(self.temp_dir, "validation_test.csv")
         self.database_manager.export_to_csv(csv_path)
@@ -6,6 +6,7 @@ import tempfile
 import os
 from datetime import datetime
 from pathlib import Path
+from unittest.mock import patch
 
 from sync_service.services.csv_processor import CSVProcessor
 from sync_service.models.data_models import FileRecord, FileOperation
@@ -17,13 +18,12 @@ class TestCSVProcessor:
     def setup_method(self):
         """Set up test fixtures."""
         self.csv_processor = CSVProcessor()
-        self.temp_dir = tempfile.mkdtemp()
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.temp_dir = self._temp_dir.name
     
     def teardown_method(self):
         """Clean up test fixtures."""
-        # Clean up temp directory
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self._temp_dir.cleanup()
     
     def create_sample_records(self) -> list[FileRecord]:
         """Create sample file records for testing."""
@@ -128,6 +128,21 @@ class TestCSVProcessor:
         # Should be no operations for identical files
         assert len(operations) == 0
     
+    def test_compare_csv_files_identical_skips_parsing(self):
+        """Test byte-identical CSV files are compared without parsing them."""
+        records = self.create_sample_records()
+        
+        old_csv = os.path.join(self.temp_dir, "old.csv")
+        new_csv = os.path.join(self.temp_dir, "new.csv")
+        
+        self.csv_processor.export_records_to_csv(records, old_csv)
+        self.csv_processor.export_records_to_csv(records, new_csv)
+        
+        with patch('sync_service.services.csv_processor.pd.read_csv') as mock_read_csv:
+            assert self.csv_processor.compare_csv_files(old_csv, new_csv) == []
+        
+        mock_read_csv.assert_not_called()
+    
     def test_compare_csv_files_with_deletions(self):
         """Test comparing CSV files with deleted records."""
         old_records = self.create_sample_records()
@@ -187,6 +202,26 @@ class TestCSVProcessor:
         assert operations[0].file_path == "/test/file2.jpg"
         assert operations[0].metadata['size'] == 3072
         assert operations[0].metadata['permissions'] == "rwxr--r--"
+        # Timestamps are parsed once while diffing, not by every consumer
+        assert operations[0].metadata['last_modified'] == datetime(2024, 1, 2, 12, 0, 0)
+    
+    def test_compare_csv_files_ignores_dtype_only_differences(self):
+        """Test rows whose values only differ in parsed dtype are not reported as updates."""
+        old_csv = os.path.join(self.temp_dir, "old.csv")
+        new_csv = os.path.join(self.temp_dir, "new.csv")
+        header = "file_path,permissions,size,file_type,last_modified,internal_id\n"
+        
+        # The missing size makes the old size column float, the new one is int
+        with open(old_csv, 'w') as f:
+            f.write(header + "/a.txt,rw-r--r--,10,text/plain,2024-01-01T00:00:00,a\n"
+                             "/b.txt,rw-r--r--,,text/plain,2024-01-01T00:00:00,b\n")
+        with open(new_csv, 'w') as f:
+            f.write(header + "/a.txt,rw-r--r--,10,text/plain,2024-01-01T00:00:00,a\n"
+                             "/b.txt,rw-r--r--,20,text/plain,2024-01-01T00:00:00,b\n")
+        
+        operations = self.csv_processor.compare_csv_files(old_csv, new_csv)
+        
+        assert [(op.operation_type, op.file_path) for op in operations] == [('update', '/b.txt')]
     
     def test_compare_empty_csv_files(self):
         """Test comparing empty CSV files."""
@@ -252,7 +287,7 @@ class TestCSVProcessor:
             internal_id="id4"
         ))
         
-        operations = self.csv_processor.generate_operations_from_records(old_records, new_records)
+        operations = list(self.csv_processor.generate_operations_from_records(old_records, new_records))
         
         # Should have delete, update, and create operations
         operation_types = [op.operation_type for op in operations]
@@ -269,6 +304,18 @@ class TestCSVProcessor:
         
         assert self.csv_processor.validate_csv_format(csv_path) is True
     
+    def test_validate_csv_format_deep(self):
+        """Test that only deep validation parses rows past the header."""
+        csv_path = os.path.join(self.temp_dir, "malformed.csv")
+        
+        with open(csv_path, 'w') as f:
+            f.write("file_path,permissions,size,file_type,last_modified,internal_id\n")
+            f.write("/a.txt,644,1,text/plain,2024-01-01T00:00:00,id1\n")
+            f.write("/b.txt,644,1,text/plain,2024-01-01T00:00:00,id2,extra,fields\n")
+        
+        assert self.csv_processor.validate_csv_format(csv_path) is True
+        assert self.csv_processor.validate_csv_format(csv_path, deep=True) is False
+    
     def test_validate_csv_format_nonexistent(self):
         """Test validating a non-existent CSV file."""
         csv_path = os.path.join(self.temp_dir, "nonexistent.csv")
@@ -1,8 +1,11 @@
 """
 Tests for the DatabaseManager class.
 """
+import pytest
 import os
+import sqlite3
 import tempfile
+from contextlib import closing
 from datetime import datetime
 from pathlib import Path
 
@@ -107,8 +110,7 @@ def test_csv_export_import():
         ]
         
         # Insert records
-        for record in records:
-            db_manager.insert_file_record(record)
+        db_manager.bulk_insert_file_records(records)
         
         # Export to CSV
         db_manager.export_to_csv(csv_path)
@@ -121,6 +123,7 @@ def test_csv_export_import():
             assert "/test/file2.jpg" in content
             assert "text/plain" in content
             assert "image/jpeg" in content
+            assert "2023-01-01T12:00:00" in content
         
         # Clear database and import from CSV
         db_manager.clear_all_records()
@@ -154,10 +157,228 @@ def test_csv_export_import():
                 os.unlink(path)
 
 
+def test_csv_export_closes_file_when_connection_fails(temp_database, tmp_path, monkeypatch):
+    """Test the export file is closed even if no database connection can be opened."""
+    opened = []
+    
+    def tracking_open(*args, **kwargs):
+        opened.append(open(*args, **kwargs))
+        return opened[-1]
+    
+    def failing_connection():
+        raise sqlite3.OperationalError("unable to open database file")
+    
+    monkeypatch.setattr("sync_service.services.database_manager.open", tracking_open, raising=False)
+    monkeypatch.setattr(temp_database, "get_connection", failing_connection)
+    
+    with pytest.raises(sqlite3.OperationalError):
+        temp_database.export_to_csv(str(tmp_path / "export.csv"))
+    
+    assert len(opened) == 1 and opened[0].closed
+
+
+def test_csv_import_updates_existing_records(temp_database, make_file_record, tmp_path):
+    """Test CSV import updates existing rows and keeps empty internal IDs as NULL."""
+    csv_path = tmp_path / "records.csv"
+    csv_path.write_text(
+        "file_path,permissions,size,file_type,last_modified,internal_id\n"
+        "/test/existing.txt,rwxr-xr-x,4096,text/plain,2023-01-05T12:00:00,id-new\n"
+        "/test/no_id.txt,rw-r--r--,10,text/plain,2023-01-06T12:00:00,\n"
+    )
+    temp_database.insert_file_record(make_file_record(file_path="/test/existing.txt", internal_id="id-old"))
+    
+    temp_database.import_from_csv(str(csv_path))
+    
+    assert temp_database.get_record_count() == 2
+    
+    existing = temp_database.get_file_record("/test/existing.txt")
+    assert existing.permissions == "rwxr-xr-x"
+    assert existing.size == 4096
+    assert existing.last_modified == datetime(2023, 1, 5, 12, 0, 0)
+    assert existing.internal_id == "id-new"
+    
+    assert temp_database.get_file_record("/test/no_id.txt").internal_id is None
+
+
+def test_transaction_commits_and_rolls_back(temp_database, make_file_record):
+    """Test that transaction() commits on success and rolls back on error."""
+    # Successful block commits every write at once
+    with temp_database.transaction():
+        temp_database.insert_file_record(make_file_record(file_path="/test/a.txt"))
+        temp_database.insert_file_record(make_file_record(file_path="/test/b.txt"))
+        assert temp_database.get_record_count() == 2
+    assert temp_database.get_record_count() == 2
+    
+    # A failing block leaves no partial writes behind
+    with pytest.raises(sqlite3.IntegrityError):
+        with temp_database.transaction():
+            temp_database.delete_file_record("/test/a.txt")
+            temp_database.insert_file_record(make_file_record(file_path="/test/b.txt"))
+    assert temp_database.get_file_record("/test/a.txt") is not None
+    assert temp_database.get_record_count() == 2
+
+
+def test_bulk_insert_file_records(temp_database, make_file_record):
+    """Test bulk inserts are stored together and roll back entirely on a duplicate path."""
+    temp_database.bulk_insert_file_records(
+        make_file_record(file_path=f"/test/{i}.txt") for i in range(3)
+    )
+    assert temp_database.get_record_count() == 3
+    
+    with pytest.raises(sqlite3.IntegrityError):
+        temp_database.bulk_insert_file_records([
+            make_file_record(file_path="/test/new.txt"),
+            make_file_record(file_path="/test/0.txt")
+        ])
+    assert temp_database.get_file_record("/test/new.txt") is None
+    assert temp_database.get_record_count() == 3
+
+
+def test_connection_pragmas(tmp_path):
+    """Test connections use WAL, the configured synchronous mode and in-memory temp storage."""
+    db_path = str(tmp_path / "test.db")
+    db_manager = DatabaseManager(db_path, synchronous='off')
+    
+    with db_manager.get_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 0  # OFF
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    
+    with pytest.raises(ValueError, match="synchronous"):
+        DatabaseManager(db_path, synchronous='sometimes')
+
+
+def test_file_path_lookups_use_index(temp_database):
+    """Test point lookups and deletes by file_path search an index instead of scanning."""
+    with temp_database.get_connection() as conn:
+        for statement in ("SELECT * FROM file_records WHERE file_path = ?",
+                          "DELETE FROM file_records WHERE file_path = ?"):
+            plan = " ".join(row[-1] for row in conn.execute(
+                f"EXPLAIN QUERY PLAN {statement}", ("/test/file.txt",)))
+            assert "USING INDEX" in plan and "file_path=?" in plan, plan
+
+
+def test_rename_file_record(temp_database, make_file_record):
+    """Test renaming a record in place, including missing and conflicting paths."""
+    temp_database.bulk_insert_file_records(
+        make_file_record(file_path=path, internal_id="id-" + path)
+        for path in ("/test/a.txt", "/test/b.txt")
+    )
+    
+    assert temp_database.rename_file_record("/test/a.txt", "/test/c.txt") is True
+    assert temp_database.get_file_record("/test/a.txt") is None
+    renamed = temp_database.get_file_record("/test/c.txt")
+    assert renamed.internal_id == "id-/test/a.txt"
+    assert renamed.last_modified == datetime(2023, 1, 1, 12, 0, 0)
+    
+    assert temp_database.rename_file_record("/test/c.txt", "/test/e.txt",
+                                            last_modified=datetime(2024, 6, 1, 8, 30, 0)) is True
+    assert temp_database.get_file_record("/test/e.txt").last_modified == datetime(2024, 6, 1, 8, 30, 0)
+    
+    assert temp_database.rename_file_record("/test/missing.txt", "/test/d.txt") is False
+    
+    with pytest.raises(sqlite3.IntegrityError):
+        temp_database.rename_file_record("/test/b.txt", "/test/e.txt")
+    assert temp_database.get_file_record("/test/b.txt") is not None
+    assert temp_database.get_record_count() == 2
+
+
+def test_record_count_tracks_changes(temp_database, make_file_record):
+    """Test the maintained record count follows inserts, upserts, deletes and rollbacks."""
+    temp_database.insert_file_record(make_file_record(file_path="/test/a.txt"))
+    temp_database.upsert_file_record(make_file_record(file_path="/test/a.txt"))
+    temp_database.upsert_many([
+        make_file_record(file_path="/test/a.txt"),
+        make_file_record(file_path="/test/b.txt")
+    ])
+    assert temp_database.get_record_count() == 2
+    
+    with pytest.raises(RuntimeError, match="abort"):
+        with temp_database.transaction():
+            temp_database.insert_file_record(make_file_record(file_path="/test/c.txt"))
+            raise RuntimeError("abort")
+    assert temp_database.get_record_count() == 2
+    
+    temp_database.delete_file_record("/test/a.txt")
+    assert temp_database.get_record_count() == 1
+    
+    # A database without the counter table is seeded from the existing rows
+    with closing(sqlite3.connect(temp_database.db_path)) as conn, conn:
+        conn.execute("DROP TABLE file_records_count")
+    assert DatabaseManager(temp_database.db_path).get_record_count() == 1
+    
+    temp_database.clear_all_records()
+    assert temp_database.get_record_count() == 0
+
+
+def test_get_records_by_paths(temp_database, make_file_record):
+    """Test looking up several records by path across lookup batches."""
+    temp_database.bulk_insert_file_records(
+        make_file_record(file_path=f"/test/file{i}.txt", size=i) for i in range(5)
+    )
+    
+    records = temp_database.get_records_by_paths(
+        ["/test/file1.txt", "/test/file3.txt", "/test/missing.txt", "/test/file1.txt",
+         "/test/file4.txt"],
+        batch_size=2
+    )
+    
+    assert sorted(record.file_path for record in records) == [
+        "/test/file1.txt", "/test/file3.txt", "/test/file4.txt"
+    ]
+    assert all(record.last_modified == datetime(2023, 1, 1, 12, 0, 0) for record in records)
+    assert temp_database.get_records_by_paths([]) == []
+
+
+def test_update_and_delete_many(temp_database, make_file_record):
+    """Test bulk update and delete of existing records."""
+    records = [make_file_record(file_path=f"/test/file{i}.txt", size=i) for i in range(3)]
+    temp_database.upsert_many(records)
+    
+    for record in records:
+        record.permissions = "rwx------"
+    records.append(make_file_record(file_path="/test/missing.txt", permissions="rwx------"))
+    temp_database.update_many(records)
+    
+    # Updates never create records
+    assert temp_database.get_record_count() == 3
+    assert temp_database.get_file_record("/test/file2.txt").permissions == "rwx------"
+    
+    deleted = temp_database.delete_many(["/test/file0.txt", "/test/file1.txt", "/test/missing.txt"])
+    assert deleted == 2
+    assert temp_database.get_record_count() == 1
+
+
+def test_upsert_many(temp_database, make_file_record):
+    """Test bulk upsert inserts new records and updates existing ones in place."""
+    temp_database.insert_file_record(make_file_record(file_path="/test/existing.txt", size=1))
+    
+    temp_database.upsert_many([
+        make_file_record(file_path="/test/existing.txt", size=100),
+        make_file_record(file_path="/test/new.txt", size=2, internal_id="id-/test/new.txt")
+    ])
+    
+    assert temp_database.get_record_count() == 2
+    assert temp_database.get_file_record("/test/existing.txt").size == 100
+    assert temp_database.get_file_record("/test/new.txt").internal_id == "id-/test/new.txt"
+
+
+def test_row_count_helpers_report_matches(temp_database, make_file_record):
+    """Test that update and delete helpers report whether a row matched."""
+    temp_database.bulk_insert_file_records(
+        make_file_record(file_path=path) for path in ("/test/file1.txt", "/test/file2.txt")
+    )
+    
+    assert temp_database.update_file_permissions("/test/file1.txt", "rwx------", datetime(2023, 1, 2)) is True
+    assert temp_database.update_file_permissions("/test/missing.txt", "rwx------", datetime(2023, 1, 2)) is False
+    assert temp_database.delete_file_record("/test/file2.txt") is True
+    assert temp_database.delete_file_record("/test/file2.txt") is False
+
+
 def test_upsert_functionality():
     """Test upsert (insert or update) functionality."""
-    import uuid
-    db_path = f"/tmp/test_upsert_{uuid.uuid4().hex}.db"
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp_file:
+        db_path = tmp_file.name
     
     try:
         db_manager = DatabaseManager(db_path)
@@ -194,8 +415,22 @@ def test_upsert_functionality():
             os.unlink(db_path)
 
 
+def test_try_insert_file_record(temp_database, make_file_record):
+    """Test insert-if-absent reports whether a row was actually inserted."""
+    test_record = make_file_record(file_path="/test/once.txt", size=1024)
+    
+    # First insert succeeds
+    assert temp_database.try_insert_file_record(test_record) is True
+    
+    # Second insert is ignored and leaves the original row in place
+    test_record.size = 2048
+    assert temp_database.try_insert_file_record(test_record) is False
+    assert temp_database.get_record_count() == 1
+    assert temp_database.get_file_record("/test/once.txt").size == 1024
+
+
 if __name__ == "__main__":
     test_database_manager_basic_operations()
     test_csv_export_import()
     test_upsert_functionality()
-    print("\n✅ All DatabaseManager tests passed!")
\ No newline at end of file
+    print("\n✅ All DatabaseManager tests passed!")
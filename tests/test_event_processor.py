@@ -2,54 +2,41 @@
 Tests for the EventProcessor class.
 """
 import pytest
-import tempfile
-import os
-from datetime import datetime
+from dataclasses import replace
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from sync_service.models.data_models import PubSubEvent, FileRecord
+from sync_service.models.data_models import PubSubEvent
 from sync_service.services.database_manager import DatabaseManager
 from sync_service.services.event_processor import EventProcessor
 
 
-@pytest.fixture
-def temp_db():
-    """Create a temporary database for testing."""
-    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
-        db_path = f.name
-    
-    yield db_path
+# Fixed event timestamp for tests that do not depend on the current time
+NOW = datetime(2023, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture(scope="module")
+def db_manager(tmp_path_factory):
+    """
+    Create one DatabaseManager for the module; the schema is set up once.
     
-    # Cleanup
-    if os.path.exists(db_path):
-        os.unlink(db_path)
+    The database is throwaway, so commits skip fsync entirely.
+    """
+    return DatabaseManager(str(tmp_path_factory.mktemp("db") / "test.db"), synchronous='OFF')
 
 
-@pytest.fixture
-def db_manager(temp_db):
-    """Create a DatabaseManager instance for testing."""
-    return DatabaseManager(temp_db)
+@pytest.fixture(autouse=True)
+def empty_database(db_manager):
+    """Start every test from an empty table."""
+    db_manager.clear_all_records()
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def event_processor(db_manager):
     """Create an EventProcessor instance for testing."""
     return EventProcessor(db_manager)
 
 
-@pytest.fixture
-def sample_file_record():
-    """Create a sample file record for testing."""
-    return FileRecord(
-        file_path="/test/file.txt",
-        permissions="rw-r--r--",
-        size=1024,
-        file_type="text/plain",
-        last_modified=datetime(2023, 1, 1, 12, 0, 0),
-        internal_id="test-id-123"
-    )
-
-
 class TestEventProcessor:
     """Test cases for EventProcessor."""
     
@@ -63,59 +50,44 @@ class TestEventProcessor:
         event = PubSubEvent(
             event_type="create",
             file_path="/test/file.txt",
-            timestamp=datetime.now()
+            timestamp=NOW
         )
         
         # Should not raise exception
         event_processor._validate_event(event)
     
-    def test_validate_event_invalid_type(self, event_processor):
-        """Test event validation with invalid event type."""
-        event = PubSubEvent(
-            event_type="invalid_type",
-            file_path="/test/file.txt",
-            timestamp=datetime.now()
-        )
-        
-        with pytest.raises(ValueError, match="Invalid event type"):
-            event_processor._validate_event(event)
-    
-    def test_validate_event_missing_file_path(self, event_processor):
-        """Test event validation with missing file path."""
+    @pytest.mark.parametrize("event_type,file_path,error", [
+        ("invalid_type", "/test/file.txt", "Invalid event type"),
+        ("create", "", "File path is required"),
+        ("rename", "/test/file.txt", "New path is required"),
+    ], ids=["invalid_type", "missing_file_path", "rename_missing_new_path"])
+    def test_validate_event_invalid(self, event_processor, event_type, file_path, error):
+        """Test event validation rejects malformed events."""
         event = PubSubEvent(
-            event_type="create",
-            file_path="",
-            timestamp=datetime.now()
+            event_type=event_type,
+            file_path=file_path,
+            timestamp=NOW
         )
         
-        with pytest.raises(ValueError, match="File path is required"):
-            event_processor._validate_event(event)
-    
-    def test_validate_event_rename_missing_new_path(self, event_processor):
-        """Test event validation for rename without new path."""
-        event = PubSubEvent(
-            event_type="rename",
-            file_path="/test/file.txt",
-            timestamp=datetime.now()
-        )
-        
-        with pytest.raises(ValueError, match="New path is required"):
+        with pytest.raises(ValueError, match=error):
             event_processor._validate_event(event)
     
     def test_handle_change_permission(self, event_processor, db_manager, sample_file_record):
         """Test handling change_permission event."""
-        # Insert initial record
-        db_manager.insert_file_record(sample_file_record)
-        
-        # Create change permission event
-        event = PubSubEvent(
-            event_type="change_permission",
-            file_path="/test/file.txt",
-            timestamp=datetime(2023, 1, 2, 12, 0, 0),
-            metadata={"permissions": "rwxrwxrwx"}
-        )
-        
-        event_processor._handle_change_permission(event)
+        # Seed and apply the event in one transaction, committed once
+        with db_manager.transaction():
+            # Insert initial record
+            db_manager.insert_file_record(sample_file_record)
+            
+            # Create change permission event
+            event = PubSubEvent(
+                event_type="change_permission",
+                file_path="/test/file.txt",
+                timestamp=datetime(2023, 1, 2, 12, 0, 0),
+                metadata={"permissions": "rwxrwxrwx"}
+            )
+            
+            event_processor._handle_change_permission(event)
         
         # Verify permissions were updated
         updated_record = db_manager.get_file_record("/test/file.txt")
@@ -128,17 +100,20 @@ class TestEventProcessor:
         event = PubSubEvent(
             event_type="change_permission",
             file_path="/nonexistent/file.txt",
-            timestamp=datetime.now(),
+            timestamp=NOW,
             metadata={"permissions": "rwxrwxrwx"}
         )
         
         # Should not raise exception, just log warning
         event_processor._handle_change_permission(event)
     
-    def test_handle_delete(self, event_processor, db_manager, sample_file_record):
+    def test_handle_delete(self, event_processor, db_manager, make_file_record):
         """Test handling delete event."""
-        # Insert initial record
-        db_manager.insert_file_record(sample_file_record)
+        # Insert the record to delete and a neighbour that must survive
+        db_manager.bulk_insert_file_records([
+            make_file_record(),
+            make_file_record(file_path="/test/other.txt", internal_id="other-id")
+        ])
         
         # Verify record exists
         assert db_manager.get_file_record("/test/file.txt") is not None
@@ -147,20 +122,21 @@ class TestEventProcessor:
         event = PubSubEvent(
             event_type="delete",
             file_path="/test/file.txt",
-            timestamp=datetime.now()
+            timestamp=NOW
         )
         
         event_processor._handle_delete(event)
         
-        # Verify record was deleted
+        # Verify only the event's record was deleted
         assert db_manager.get_file_record("/test/file.txt") is None
+        assert db_manager.get_file_record("/test/other.txt") is not None
     
     def test_handle_delete_file_not_found(self, event_processor):
         """Test handling delete event for non-existent file."""
         event = PubSubEvent(
             event_type="delete",
             file_path="/nonexistent/file.txt",
-            timestamp=datetime.now()
+            timestamp=NOW
         )
         
         # Should not raise exception, just log warning
@@ -193,25 +169,32 @@ class TestEventProcessor:
     
     def test_handle_create_file_exists(self, event_processor, db_manager, sample_file_record):
         """Test handling create event for existing file."""
-        # Insert initial record
-        db_manager.insert_file_record(sample_file_record)
-        
-        event = PubSubEvent(
-            event_type="create",
-            file_path="/test/file.txt",
-            timestamp=datetime.now(),
-            metadata={"permissions": "rw-r--r--", "size": 1024, "file_type": "text/plain"}
-        )
-        
-        # Should not raise exception, just log warning
-        event_processor._handle_create(event)
+        # Seed and apply the event in one transaction, committed once
+        with db_manager.transaction():
+            # Insert initial record
+            db_manager.insert_file_record(sample_file_record)
+            
+            event = PubSubEvent(
+                event_type="create",
+                file_path="/test/file.txt",
+                timestamp=NOW,
+                metadata={"permissions": "rwxrwxrwx", "size": 4096, "file_type": "text/plain"}
+            )
+            
+            # Should not raise exception, just log warning
+            event_processor._handle_create(event)
+        
+        # Existing record must be left untouched
+        existing_record = db_manager.get_file_record("/test/file.txt")
+        assert existing_record.permissions == sample_file_record.permissions
+        assert existing_record.size == sample_file_record.size
     
     def test_handle_create_insufficient_metadata(self, event_processor):
         """Test handling create event with insufficient metadata."""
         event = PubSubEvent(
             event_type="create",
             file_path="/new/file.txt",
-            timestamp=datetime.now(),
+            timestamp=NOW,
             metadata=None
         )
         
@@ -220,17 +203,19 @@ class TestEventProcessor:
     
     def test_handle_rename(self, event_processor, db_manager, sample_file_record):
         """Test handling rename event."""
-        # Insert initial record
-        db_manager.insert_file_record(sample_file_record)
-        
-        event = PubSubEvent(
-            event_type="rename",
-            file_path="/test/file.txt",
-            new_path="/test/renamed_file.txt",
-            timestamp=datetime(2023, 1, 2, 12, 0, 0)
-        )
-        
-        event_processor._handle_rename(event)
+        # Seed and apply the event in one transaction, committed once
+        with db_manager.transaction():
+            # Insert initial record
+            db_manager.insert_file_record(sample_file_record)
+            
+            event = PubSubEvent(
+                event_type="rename",
+                file_path="/test/file.txt",
+                new_path="/test/renamed_file.txt",
+                timestamp=datetime(2023, 1, 2, 12, 0, 0)
+            )
+            
+            event_processor._handle_rename(event)
         
         # Verify old record was deleted
         assert db_manager.get_file_record("/test/file.txt") is None
@@ -250,7 +235,7 @@ class TestEventProcessor:
             event_type="rename",
             file_path="/nonexistent/file.txt",
             new_path="/test/renamed.txt",
-            timestamp=datetime.now()
+            timestamp=NOW
         )
         
         # Should not raise exception, just log warning
@@ -258,22 +243,24 @@ class TestEventProcessor:
     
     def test_handle_move(self, event_processor, db_manager, sample_file_record):
         """Test handling move event."""
-        # Insert initial record
-        db_manager.insert_file_record(sample_file_record)
-        
-        event = PubSubEvent(
-            event_type="move",
-            file_path="/test/file.txt",
-            new_path="/moved/file.txt",
-            timestamp=datetime(2023, 1, 2, 12, 0, 0),
-            metadata={
-                "permissions": "rwxrwxrwx",
-                "size": 2048,
-                "file_type": "application/octet-stream"
-            }
-        )
-        
-        event_processor._handle_move(event)
+        # Seed and apply the event in one transaction, committed once
+        with db_manager.transaction():
+            # Insert initial record
+            db_manager.insert_file_record(sample_file_record)
+            
+            event = PubSubEvent(
+                event_type="move",
+                file_path="/test/file.txt",
+                new_path="/moved/file.txt",
+                timestamp=datetime(2023, 1, 2, 12, 0, 0),
+                metadata={
+                    "permissions": "rwxrwxrwx",
+                    "size": 2048,
+                    "file_type": "application/octet-stream"
+                }
+            )
+            
+            event_processor._handle_move(event)
         
         # Verify old record was deleted
         assert db_manager.get_file_record("/test/file.txt") is None
@@ -293,36 +280,23 @@ class TestEventProcessor:
             event_type="move",
             file_path="/nonexistent/file.txt",
             new_path="/test/moved.txt",
-            timestamp=datetime.now()
+            timestamp=NOW
         )
         
         # Should not raise exception, just log warning
         event_processor._handle_move(event)
     
-    def test_extract_permissions_from_metadata(self, event_processor):
-        """Test extracting permissions from metadata."""
-        # Test with 'permissions' key
-        metadata1 = {"permissions": "rwxrwxrwx"}
-        assert event_processor._extract_permissions_from_metadata(metadata1) == "rwxrwxrwx"
-        
-        # Test with 'permission' key
-        metadata2 = {"permission": "rw-r--r--"}
-        assert event_processor._extract_permissions_from_metadata(metadata2) == "rw-r--r--"
-        
-        # Test with 'perms' key
-        metadata3 = {"perms": "755"}
-        assert event_processor._extract_permissions_from_metadata(metadata3) == "755"
-        
-        # Test with 'access' key
-        metadata4 = {"access": "read-write"}
-        assert event_processor._extract_permissions_from_metadata(metadata4) == "read-write"
-        
-        # Test with no permissions
-        metadata5 = {"size": 1024}
-        assert event_processor._extract_permissions_from_metadata(metadata5) is None
-        
-        # Test with None metadata
-        assert event_processor._extract_permissions_from_metadata(None) is None
+    @pytest.mark.parametrize("metadata,expected", [
+        ({"permissions": "rwxrwxrwx"}, "rwxrwxrwx"),
+        ({"permission": "rw-r--r--"}, "rw-r--r--"),
+        ({"perms": "755"}, "755"),
+        ({"access": "read-write"}, "read-write"),
+        ({"size": 1024}, None),
+        (None, None),
+    ])
+    def test_extract_permissions_from_metadata(self, event_processor, metadata, expected):
+        """Test extracting permissions from each supported metadata key."""
+        assert event_processor._extract_permissions_from_metadata(metadata) == expected
     
     def test_create_file_record_from_event(self, event_processor):
         """Test creating file record from event."""
@@ -353,7 +327,7 @@ class TestEventProcessor:
         event = PubSubEvent(
             event_type="create",
             file_path="/test/file.txt",
-            timestamp=datetime.now(),
+            timestamp=NOW,
             metadata=None
         )
         
@@ -365,7 +339,7 @@ class TestEventProcessor:
         event = PubSubEvent(
             event_type="create",
             file_path="/test/file.txt",
-            timestamp=datetime.now(),
+            timestamp=NOW,
             metadata={
                 "permissions": "rw-r--r--",
                 "size": "invalid",
@@ -378,37 +352,17 @@ class TestEventProcessor:
     
     def test_process_events_integration(self, event_processor, db_manager):
         """Test processing multiple events in sequence."""
-        # Create events in chronological order
+        # Create events in chronological order, one minute apart
+        base = PubSubEvent(event_type="create", file_path="/test/file1.txt", timestamp=NOW)
         events = [
-            PubSubEvent(
-                event_type="create",
-                file_path="/test/file1.txt",
-                timestamp=datetime(2023, 1, 1, 12, 0, 0),
-                metadata={"permissions": "rw-r--r--", "size": 1024, "file_type": "text/plain"}
-            ),
-            PubSubEvent(
-                event_type="create",
-                file_path="/test/file2.txt",
-                timestamp=datetime(2023, 1, 1, 12, 1, 0),
-                metadata={"permissions": "rw-r--r--", "size": 2048, "file_type": "text/plain"}
-            ),
-            PubSubEvent(
-                event_type="change_permission",
-                file_path="/test/file1.txt",
-                timestamp=datetime(2023, 1, 1, 12, 2, 0),
-                metadata={"permissions": "rwxrwxrwx"}
-            ),
-            PubSubEvent(
-                event_type="rename",
-                file_path="/test/file2.txt",
-                new_path="/test/renamed_file2.txt",
-                timestamp=datetime(2023, 1, 1, 12, 3, 0)
-            ),
-            PubSubEvent(
-                event_type="delete",
-                file_path="/test/file1.txt",
-                timestamp=datetime(2023, 1, 1, 12, 4, 0)
-            )
+            replace(base, metadata={"permissions": "rw-r--r--", "size": 1024, "file_type": "text/plain"}),
+            replace(base, file_path="/test/file2.txt", timestamp=NOW + timedelta(minutes=1),
+                    metadata={"permissions": "rw-r--r--", "size": 2048, "file_type": "text/plain"}),
+            replace(base, event_type="change_permission", timestamp=NOW + timedelta(minutes=2),
+                    metadata={"permissions": "rwxrwxrwx"}),
+            replace(base, event_type="rename", file_path="/test/file2.txt",
+                    new_path="/test/renamed_file2.txt", timestamp=NOW + timedelta(minutes=3)),
+            replace(base, event_type="delete", timestamp=NOW + timedelta(minutes=4))
         ]
         
         result = event_processor.process_events(events)
@@ -430,28 +384,78 @@ class TestEventProcessor:
     
     def test_process_events_with_errors(self, event_processor):
         """Test processing events with validation errors."""
+        base = PubSubEvent(event_type="create", file_path="/test/file1.txt", timestamp=NOW)
         events = [
-            PubSubEvent(
-                event_type="create",
-                file_path="/test/file1.txt",
-                timestamp=datetime.now(),
-                metadata={"permissions": "rw-r--r--", "size": 1024, "file_type": "text/plain"}
-            ),
-            PubSubEvent(
-                event_type="invalid_type",
-                file_path="/test/file2.txt",
-                timestamp=datetime.now()
-            ),
-            PubSubEvent(
-                event_type="rename",
-                file_path="/test/file3.txt",
-                timestamp=datetime.now()
-                # Missing new_path
-            )
+            replace(base, metadata={"permissions": "rw-r--r--", "size": 1024, "file_type": "text/plain"}),
+            replace(base, event_type="invalid_type", file_path="/test/file2.txt"),
+            replace(base, event_type="rename", file_path="/test/file3.txt")  # Missing new_path
         ]
         
         result = event_processor.process_events(events)
         
         # Should have 1 successful create and 2 errors
         assert result['create'] == 1
-        assert result['errors'] == 2
\ No newline at end of file
+        assert result['errors'] == 2
+    
+    def test_process_events_failed_event_rolls_back_alone(self, event_processor, db_manager,
+                                                          make_file_record):
+        """Test that an event failing in the database leaves the rest of the batch applied."""
+        db_manager.insert_file_record(make_file_record(file_path="/test/a.txt", size=1))
+        db_manager.insert_file_record(make_file_record(file_path="/test/b.txt", size=2))
+        
+        base = PubSubEvent(event_type="move", file_path="/test/a.txt", timestamp=NOW)
+        events = [
+            # Moving onto an existing path violates the unique file_path
+            replace(base, new_path="/test/b.txt", metadata={"size": 10}),
+            replace(base, event_type="change_permission", file_path="/test/b.txt",
+                    timestamp=NOW + timedelta(minutes=1), metadata={"permissions": "rwx------"})
+        ]
+        
+        result = event_processor.process_events(events)
+        
+        assert result['move'] == 0
+        assert result['change_permission'] == 1
+        assert result['errors'] == 1
+        assert db_manager.get_file_record("/test/a.txt").size == 1
+        moved_onto = db_manager.get_file_record("/test/b.txt")
+        assert moved_onto.size == 2
+        assert moved_onto.permissions == "rwx------"
+    
+    def test_process_events_inside_caller_transaction(self, event_processor, db_manager):
+        """Test that events join a transaction held by the caller instead of deadlocking."""
+        event = PubSubEvent(
+            event_type="create",
+            file_path="/test/file.txt",
+            timestamp=NOW,
+            metadata={"permissions": "rw-r--r--", "size": 1024, "file_type": "text/plain"}
+        )
+        
+        with pytest.raises(RuntimeError, match="abort"):
+            with db_manager.transaction():
+                result = event_processor.process_events([event])
+                assert result['create'] == 1
+                assert db_manager.get_file_record("/test/file.txt") is not None
+                raise RuntimeError("abort")
+        
+        # Rolled back together with the caller's transaction
+        assert db_manager.get_file_record("/test/file.txt") is None
+    
+    def test_process_events_writer_failure_raises(self, db_manager, monkeypatch):
+        """Test that a failure to open the batch transaction is raised to the caller."""
+        def failing_transaction():
+            raise RuntimeError("database is locked")
+        
+        monkeypatch.setattr(db_manager, "transaction", failing_transaction)
+        processor = EventProcessor(db_manager, queue_size=1)
+        
+        events = [
+            PubSubEvent(
+                event_type="delete",
+                file_path=f"/test/file{i}.txt",
+                timestamp=datetime(2023, 1, 1, 12, i, 0)
+            )
+            for i in range(5)
+        ]
+        
+        with pytest.raises(RuntimeError, match="database is locked"):
+            processor.process_events(events)
@@ -1,31 +1,27 @@
 """
 Tests for incremental sync workflow functionality.
 """
-import os
-import tempfile
+import threading
+import time
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, create_autospec
+from dataclasses import replace
 from datetime import datetime
 from io import BytesIO
 
+import sync_service.services.sync_service as sync_service_module
 from sync_service.services.sync_service import SyncService
 from sync_service.models.config import SyncConfig, S3Config
-from sync_service.models.data_models import PubSubEvent, FileRecord, FileOperation
+from sync_service.models.data_models import PubSubEvent, FileRecord, FileOperation, SyncStats
 
 
-@pytest.fixture
-def temp_db():
-    """Create a temporary database file."""
-    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
-        db_path = f.name
-    yield db_path
-    if os.path.exists(db_path):
-        os.unlink(db_path)
+# Fixed event timestamp for tests that do not depend on the current time
+NOW = datetime(2023, 1, 1, 12, 0, 0)
 
 
-@pytest.fixture
-def sync_config(temp_db):
-    """Create a test sync configuration."""
+@pytest.fixture(scope="session")
+def base_sync_config():
+    """Build the test sync configuration once; tests only vary the database path."""
     return SyncConfig(
         customer_s3=S3Config(
             endpoint="http://localhost:9000",
@@ -35,210 +31,209 @@ def sync_config(temp_db):
         ),
         mock_api_url="http://localhost:8000",
         file_manager_api_url="http://localhost:8001",
-        database_path=temp_db,
+        database_path="",
         sync_interval=300,
         live_reload=False
     )
 
 
 @pytest.fixture
-def mock_sync_service(sync_config):
+def sync_config(base_sync_config, tmp_path):
+    """Create a test sync configuration."""
+    return replace(base_sync_config, database_path=str(tmp_path / "sync.db"))
+
+
+@pytest.fixture(scope="session")
+def component_mocks():
+    """
+    Autospecced stand-ins for the service's component classes.
+    
+    Autospeccing introspects each class, so the mocks are built once per
+    session and reset before every test.
+    """
+    return {
+        name: create_autospec(getattr(sync_service_module, name))
+        for name in ("S3Manager", "InfrastructureAPI", "DatabaseManager",
+                     "CSVProcessor", "EventProcessor")
+    }
+
+
+@pytest.fixture
+def mock_sync_service(sync_config, monkeypatch, component_mocks):
     """Create a sync service with mocked dependencies."""
-    with patch('sync_service.services.sync_service.S3Manager'), \
-         patch('sync_service.services.sync_service.InfrastructureAPI'), \
-         patch('sync_service.services.sync_service.DatabaseManager'), \
-         patch('sync_service.services.sync_service.CSVProcessor'), \
-         patch('sync_service.services.sync_service.EventProcessor'):
-        
-        service = SyncService(sync_config)
-        
-        # Mock the components
-        service.s3_manager = Mock()
-        service.infrastructure_api = Mock()
-        service.database_manager = Mock()
-        service.csv_processor = Mock()
-        service.event_processor = Mock()
-        
-        return service
+    # Each component class is replaced by its mock, so the service holds the
+    # spec'd instance mocks those calls return
+    for name, component_mock in component_mocks.items():
+        component_mock.reset_mock()
+        component_mock.return_value.reset_mock(return_value=True, side_effect=True)
+        monkeypatch.setattr(sync_service_module, name, component_mock)
+    
+    return SyncService(sync_config)
+
+
+@pytest.fixture
+def workflow_service(mock_sync_service):
+    """Mocked sync service whose connection test passes and whose side effects are stubbed."""
+    mock_sync_service._test_connections = Mock(return_value=True)
+    mock_sync_service.export_state_to_csv = Mock()
+    mock_sync_service._report_sync_results = Mock()
+    return mock_sync_service
 
 
 class TestIncrementalSyncWorkflow:
     """Test cases for incremental sync workflow."""
     
-    def test_incremental_sync_complete_workflow(self, mock_sync_service):
-        """Test complete incremental sync workflow with events and operations."""
-        # Setup mocks
-        mock_sync_service._test_connections = Mock(return_value=True)
-        mock_sync_service.export_state_to_csv = Mock()
-        mock_sync_service._cleanup_temp_files = Mock()
-        
-        # Mock events from infrastructure API
-        test_events = [
-            PubSubEvent(
-                event_type="create",
-                file_path="new_file.txt",
-                metadata={"size": 100, "file_type": "text/plain"},
-                timestamp=datetime.now()
-            ),
-            PubSubEvent(
-                event_type="delete",
-                file_path="old_file.txt",
-                timestamp=datetime.now()
-            )
-        ]
-        mock_sync_service.infrastructure_api.get_pub_sub_events.return_value = test_events
-        
-        # Mock event processing
-        event_counts = {"create": 1, "delete": 1, "errors": 0}
-        mock_sync_service.event_processor.process_events.return_value = event_counts
-        
-        # Mock CSV diff operations
-        test_operations = [
-            FileOperation(
-                operation_type="create",
-                file_path="new_file.txt",
-                metadata={"size": 100, "file_type": "text/plain"}
-            ),
-            FileOperation(
-                operation_type="delete",
-                file_path="old_file.txt"
-            )
-        ]
-        mock_sync_service.process_csv_diff = Mock(return_value=test_operations)
-        
-        # Mock operation execution
-        mock_sync_service._execute_operation = Mock(return_value=True)
-        
-        # Mock result reporting
-        mock_sync_service._report_sync_results = Mock()
+    @pytest.mark.parametrize("events,event_counts,operations,group_results,expected", [
+        (
+            [
+                PubSubEvent(event_type="create", file_path="new_file.txt",
+                            metadata={"size": 100, "file_type": "text/plain"}, timestamp=NOW),
+                PubSubEvent(event_type="delete", file_path="old_file.txt", timestamp=NOW)
+            ],
+            {"create": 1, "delete": 1, "errors": 0},
+            [
+                FileOperation(operation_type="create", file_path="new_file.txt",
+                              metadata={"size": 100, "file_type": "text/plain"}),
+                FileOperation(operation_type="delete", file_path="old_file.txt")
+            ],
+            [[True], [True]],
+            {"events_processed": 2, "operations_processed": 2, "operations_failed": 0, "errors": 0}
+        ),
+        (
+            [], {}, [], [],
+            {"events_processed": 0, "operations_processed": 0, "operations_failed": 0, "errors": 0}
+        ),
+        (
+            [PubSubEvent(event_type="create", file_path="file1.txt", timestamp=NOW)],
+            {"create": 1},
+            [
+                FileOperation(operation_type="create", file_path="file1.txt"),
+                FileOperation(operation_type="update", file_path="file2.txt")
+            ],
+            # The create group succeeds, then the update group raises
+            [[True], Exception("Operation failed")],
+            {"events_processed": 1, "operations_processed": 1, "operations_failed": 1, "errors": 1}
+        ),
+    ], ids=["complete_workflow", "no_events", "operation_failures"])
+    def test_incremental_sync_scenarios(self, workflow_service, events, event_counts,
+                                        operations, group_results, expected):
+        """Test the incremental sync workflow and its result for each event/operation scenario."""
+        workflow_service.infrastructure_api.get_pub_sub_events.return_value = events
+        workflow_service.event_processor.process_events.return_value = event_counts
+        workflow_service.csv_processor.generate_operations_from_records.return_value = operations
+        workflow_service._execute_operation_group = Mock(side_effect=group_results)
         
         # Execute incremental sync
-        result = mock_sync_service.run_incremental_sync()
+        result = workflow_service.run_incremental_sync()
         
         # Verify workflow steps
-        assert mock_sync_service._test_connections.called
-        assert mock_sync_service.export_state_to_csv.call_count == 2  # old and new state
-        assert mock_sync_service.infrastructure_api.get_pub_sub_events.called
-        mock_sync_service.event_processor.process_events.assert_called_with(test_events)
-        assert mock_sync_service.process_csv_diff.called
-        assert mock_sync_service._execute_operation.call_count == 2  # two operations
-        assert mock_sync_service._report_sync_results.called
-        assert mock_sync_service._cleanup_temp_files.called
-        
-        # Verify result structure
+        assert workflow_service._test_connections.called
+        assert workflow_service.infrastructure_api.get_pub_sub_events.called
+        assert not workflow_service.export_state_to_csv.called
+        assert workflow_service._report_sync_results.called
+        if events:
+            workflow_service.event_processor.process_events.assert_called_with(events)
+            # Old and new state snapshots cover only the files named by events
+            assert workflow_service.database_manager.get_records_by_paths.call_count == 2
+            workflow_service.database_manager.get_records_by_paths.assert_called_with(
+                [event.file_path for event in events]
+            )
+            assert workflow_service.csv_processor.generate_operations_from_records.called
+        else:
+            # No events means no state snapshots or diff
+            assert not workflow_service.database_manager.get_records_by_paths.called
+            assert not workflow_service.csv_processor.generate_operations_from_records.called
+        # One call per operation type group
+        assert workflow_service._execute_operation_group.call_count == len(group_results)
+        
+        # Verify result structure; the sync succeeds even when operations fail
         assert result['success'] is True
-        assert result['events_processed'] == 2
-        assert result['operations_processed'] == 2
-        assert result['operations_failed'] == 0
+        assert result['events_processed'] == expected['events_processed']
+        assert result['operations_processed'] == expected['operations_processed']
+        assert result['operations_failed'] == expected['operations_failed']
+        assert len(result['errors']) == expected['errors']
         assert result['event_counts'] == event_counts
         assert 'duration' in result
         assert 'start_time' in result
         assert 'end_time' in result
     
-    def test_incremental_sync_no_events(self, mock_sync_service):
-        """Test incremental sync when no events are available."""
-        # Setup mocks
-        mock_sync_service._test_connections = Mock(return_value=True)
-        mock_sync_service.export_state_to_csv = Mock()
-        mock_sync_service._cleanup_temp_files = Mock()
-        
-        # No events from infrastructure API
-        mock_sync_service.infrastructure_api.get_pub_sub_events.return_value = []
-        
-        # No operations from CSV diff
-        mock_sync_service.process_csv_diff = Mock(return_value=[])
-        
-        # Mock result reporting
-        mock_sync_service._report_sync_results = Mock()
-        
-        # Execute incremental sync
-        result = mock_sync_service.run_incremental_sync()
-        
-        # Verify workflow
-        assert result['success'] is True
-        assert result['events_processed'] == 0
-        assert result['operations_processed'] == 0
-        assert result['operations_failed'] == 0
-        assert result['event_counts'] == {}
-        
-        # Verify CSV export still happens
-        assert mock_sync_service.export_state_to_csv.call_count == 2
-    
-    def test_incremental_sync_operation_failures(self, mock_sync_service):
-        """Test incremental sync with some operation failures."""
-        # Setup mocks
-        mock_sync_service._test_connections = Mock(return_value=True)
-        mock_sync_service.export_state_to_csv = Mock()
-        mock_sync_service._cleanup_temp_files = Mock()
-        
-        # Mock events
-        test_events = [
-            PubSubEvent(
-                event_type="create",
-                file_path="file1.txt",
-                timestamp=datetime.now()
-            )
-        ]
-        mock_sync_service.infrastructure_api.get_pub_sub_events.return_value = test_events
-        mock_sync_service.event_processor.process_events.return_value = {"create": 1}
-        
-        # Mock operations
-        test_operations = [
-            FileOperation(operation_type="create", file_path="file1.txt"),
-            FileOperation(operation_type="update", file_path="file2.txt")
-        ]
-        mock_sync_service.process_csv_diff = Mock(return_value=test_operations)
-        
-        # Mock operation execution with one failure
-        def mock_execute_operation(operation):
-            if operation.file_path == "file1.txt":
-                return True
-            else:
-                raise Exception("Operation failed")
-        
-        mock_sync_service._execute_operation = Mock(side_effect=mock_execute_operation)
-        mock_sync_service._report_sync_results = Mock()
-        
-        # Execute incremental sync
-        result = mock_sync_service.run_incremental_sync()
-        
-        # Verify results
-        assert result['success'] is True  # Overall sync succeeds even with operation failures
-        assert result['operations_processed'] == 1
-        assert result['operations_failed'] == 1
-        assert len(result['errors']) == 1
-    
-    def test_incremental_sync_connection_failure(self, mock_sync_service):
+    def test_incremental_sync_connection_failure(self, workflow_service):
         """Test incremental sync when connection tests fail."""
         # Mock connection test failure
-        mock_sync_service._test_connections = Mock(return_value=False)
-        mock_sync_service._cleanup_temp_files = Mock()
-        mock_sync_service._report_sync_results = Mock()
+        workflow_service._test_connections = Mock(return_value=False)
         
         # Execute incremental sync and expect exception
         with pytest.raises(Exception, match="Connection tests failed"):
-            mock_sync_service.run_incremental_sync()
+            workflow_service.run_incremental_sync()
         
         # Verify failure reporting
-        assert mock_sync_service._report_sync_results.called
+        assert workflow_service._report_sync_results.called
     
-    def test_incremental_sync_event_processing_failure(self, mock_sync_service):
+    def test_incremental_sync_event_processing_failure(self, workflow_service):
         """Test incremental sync when event processing fails."""
-        # Setup mocks
-        mock_sync_service._test_connections = Mock(return_value=True)
-        mock_sync_service.export_state_to_csv = Mock()
-        mock_sync_service._cleanup_temp_files = Mock()
-        
         # Mock infrastructure API failure
-        mock_sync_service.infrastructure_api.get_pub_sub_events.side_effect = Exception("API failure")
-        mock_sync_service._report_sync_results = Mock()
+        workflow_service.infrastructure_api.get_pub_sub_events.side_effect = Exception("API failure")
         
         # Execute incremental sync and expect exception
         with pytest.raises(Exception, match="API failure"):
-            mock_sync_service.run_incremental_sync()
+            workflow_service.run_incremental_sync()
         
         # Verify failure reporting
-        assert mock_sync_service._report_sync_results.called
+        assert workflow_service._report_sync_results.called
+    
+    def test_execute_operation_groups_use_bulk_writes(self, mock_sync_service):
+        """Test each operation group is written to the database in one bulk call."""
+        mock_sync_service.s3_manager.download_object.return_value = b"content"
+        mock_sync_service.infrastructure_api.save_to_disk.side_effect = [
+            {"internal_id": "id-1"},
+            Exception("save failed")
+        ]
+        
+        metadata = {"size": 7, "file_type": "text/plain", "last_modified": "2023-01-01T12:00:00"}
+        create_results = mock_sync_service._execute_operation_group("create", [
+            FileOperation(operation_type="create", file_path="a.txt", metadata=metadata),
+            FileOperation(operation_type="create", file_path="b.txt", metadata=metadata)
+        ])
+        update_results = mock_sync_service._execute_operation_group("update", [
+            FileOperation(operation_type="update", file_path="c.txt", metadata=metadata),
+            FileOperation(operation_type="update", file_path="d.txt",
+                          metadata={"last_modified": "not a timestamp"})
+        ])
+        delete_results = mock_sync_service._execute_operation_group("delete", [
+            FileOperation(operation_type="delete", file_path="e.txt"),
+            FileOperation(operation_type="delete", file_path="f.txt")
+        ])
+        
+        assert create_results == [True, False]
+        assert update_results == [True, False]
+        assert delete_results == [True, True]
+        
+        created = mock_sync_service.database_manager.upsert_many.call_args[0][0]
+        assert [(r.file_path, r.internal_id) for r in created] == [("a.txt", "id-1")]
+        updated = mock_sync_service.database_manager.update_many.call_args[0][0]
+        assert [r.file_path for r in updated] == ["c.txt"]
+        mock_sync_service.database_manager.delete_many.assert_called_once_with(["e.txt", "f.txt"])
+    
+    def test_connection_test_result_is_cached(self, mock_sync_service):
+        """Test successful connection tests are reused until invalidated or expired."""
+        mock_sync_service._test_connections = Mock(return_value=True)
+        
+        assert mock_sync_service._test_connections_cached() is True
+        assert mock_sync_service._test_connections_cached() is True
+        assert mock_sync_service._test_connections.call_count == 1
+        
+        # Expired results and invalidation both force a fresh test
+        assert mock_sync_service._test_connections_cached(ttl=0) is True
+        mock_sync_service._invalidate_connection_test()
+        assert mock_sync_service._test_connections_cached() is True
+        assert mock_sync_service._test_connections.call_count == 3
+        
+        # Failures are never cached
+        mock_sync_service._invalidate_connection_test()
+        mock_sync_service._test_connections.return_value = False
+        assert mock_sync_service._test_connections_cached() is False
+        assert mock_sync_service._test_connections_cached() is False
+        assert mock_sync_service._test_connections.call_count == 5
     
     def test_report_sync_results(self, mock_sync_service):
         """Test sync results reporting functionality."""
@@ -246,15 +241,16 @@ class TestIncrementalSyncWorkflow:
         mock_sync_service.database_manager.get_record_count.return_value = 42
         
         # Test sync stats
-        sync_stats = {
-            'success': True,
-            'duration': 123.45,
-            'events_processed': 5,
-            'operations_processed': 3,
-            'operations_failed': 1,
-            'event_counts': {'create': 2, 'delete': 1},
-            'errors': ['Some error']
-        }
+        sync_stats = SyncStats(
+            start_time=datetime.now(),
+            success=True,
+            duration=123.45,
+            events_processed=5,
+            operations_processed=3,
+            operations_failed=1,
+            event_counts={'create': 2, 'delete': 1},
+            errors=['Some error']
+        )
         
         # Execute reporting
         mock_sync_service._report_sync_results(sync_stats, 'incremental')
@@ -276,32 +272,31 @@ class TestIncrementalSyncWorkflow:
         assert call_args['errors'] == ['Some error']
         assert call_args['service_info']['record_count'] == 42
     
-    def test_cleanup_temp_files(self, mock_sync_service):
-        """Test temporary file cleanup functionality."""
-        # Create temporary files
-        with tempfile.NamedTemporaryFile(delete=False) as f1, \
-             tempfile.NamedTemporaryFile(delete=False) as f2:
-            file1_path = f1.name
-            file2_path = f2.name
-        
-        # Verify files exist
-        assert os.path.exists(file1_path)
-        assert os.path.exists(file2_path)
-        
-        # Test cleanup
-        mock_sync_service._cleanup_temp_files([file1_path, file2_path, None])
-        
-        # Verify files are deleted
-        assert not os.path.exists(file1_path)
-        assert not os.path.exists(file2_path)
-    
-    def test_cleanup_temp_files_nonexistent(self, mock_sync_service):
-        """Test cleanup with non-existent files doesn't raise errors."""
-        # Test cleanup with non-existent files
-        mock_sync_service._cleanup_temp_files([
-            "/nonexistent/file1.csv",
-            "/nonexistent/file2.csv",
-            None
-        ])
-        
-        # Should not raise any exceptions
\ No newline at end of file
+    def test_periodic_sync_runs_and_stops_promptly(self, mock_sync_service):
+        """Test the periodic worker syncs on schedule and stops without waiting out the interval."""
+        mock_sync_service.get_sync_status = Mock(return_value={'database_records': 1})
+        sync_ran = threading.Event()
+        
+        def run_incremental_sync():
+            # Push the next sync far out so the worker must be woken by stop
+            mock_sync_service.config.sync_interval = 300
+            sync_ran.set()
+            return {'events_processed': 0, 'operations_processed': 0}
+        
+        mock_sync_service.run_incremental_sync = Mock(side_effect=run_incremental_sync)
+        mock_sync_service.config.sync_interval = 0
+        
+        mock_sync_service.start_periodic_sync()
+        worker = mock_sync_service._sync_thread
+        
+        # Starting again while running keeps the single worker
+        mock_sync_service.start_periodic_sync()
+        assert mock_sync_service._sync_thread is worker
+        assert sync_ran.wait(5)
+        
+        started = time.monotonic()
+        mock_sync_service.stop_periodic_sync(timeout=5)
+        
+        assert time.monotonic() - started < 5
+        assert mock_sync_service._sync_thread is None
+        assert mock_sync_service.run_incremental_sync.call_count == 1
@@ -6,99 +6,198 @@ error handling, retry logic, and file streaming.
 """
 
 import pytest
+import requests
 import json
 import io
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch
 from datetime import datetime
+from types import MappingProxyType, SimpleNamespace
+from botocore.response import StreamingBody
 
 from sync_service.clients.infrastructure_api import InfrastructureAPI, InfrastructureAPIError
+from sync_service.clients.circuit_breaker import CircuitBreaker
 from sync_service.models.data_models import PubSubEvent
 
 
+pytestmark = pytest.mark.unit
+
+BASE_URL = "http://localhost:8001"
+
+# Canned response payloads; read-only so no test can leak changes into another
+_PERMISSIONS_RESPONSE = MappingProxyType({
+    "file_path": "/test/file.txt",
+    "permissions": "rw-r--r--",
+    "owner": "user",
+    "group": "users",
+    "last_updated": "2023-01-01T12:00:00"
+})
+
+_PERMISSIONS_BULK_RESPONSE = MappingProxyType({
+    "permissions": [
+        {"file_path": "/test/a.txt", "permissions": "rw-r--r--"},
+        {"file_path": "/test/b.sh", "permissions": "rwxr-xr-x"}
+    ]
+})
+
+_SAVE_RESPONSE = MappingProxyType({
+    "internal_id": "12345-abcde",
+    "file_path": "/test/file.txt",
+    "operation": "create",
+    "size": 1024,
+    "saved_at": "2023-01-01T12:00:00",
+    "status": "success"
+})
+
+_EVENTS_RESPONSE = MappingProxyType({
+    "events": [
+        {
+            "event_type": "create",
+            "file_path": "/test/file1.txt",
+            "new_path": None,
+            "metadata": {"size": 1024},
+            "timestamp": "2023-01-01T12:00:00"
+        },
+        {
+            "event_type": "rename",
+            "file_path": "/test/file2.txt",
+            "new_path": "/test/file2_renamed.txt",
+            "metadata": None,
+            "timestamp": "2023-01-01T12:30:00"
+        }
+    ],
+    "total_count": 2
+})
+
+_REPORT_RESPONSE = MappingProxyType({
+    "status": "received",
+    "message": "Sync results recorded successfully",
+    "timestamp": "2023-01-01T12:00:00"
+})
+
+
+def fake_response(payload=None, status=200):
+    """Build a successful response stub; cheaper to create and read than a Mock."""
+    return SimpleNamespace(status_code=status, json=lambda: payload, raise_for_status=lambda: None)
+
+
+@pytest.fixture(scope="class")
+def api_client():
+    """One client, and so one connection pool, for the whole class."""
+    api_client = InfrastructureAPI(BASE_URL)
+    yield api_client
+    api_client.session.close()
+
+
+@pytest.fixture(scope="class")
+def mock_request(api_client):
+    """Patch the shared session's request method once for the whole class."""
+    with patch.object(api_client.session, "request") as mock_request:
+        yield mock_request
+
+
+@pytest.fixture
+def bytes_stream():
+    """
+    Factory for in-memory upload streams.
+    
+    io.BytesIO shares the bytes it is created from until the stream is written
+    to, so wrapping a payload does not copy it, however large the payload is.
+    """
+    def _make(data: bytes) -> io.BytesIO:
+        return io.BytesIO(data)
+    
+    return _make
+
+
 class TestInfrastructureAPI:
     """Test cases for InfrastructureAPI client."""
     
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.base_url = "http://localhost:8001"
-        self.api_client = InfrastructureAPI(self.base_url)
+    @pytest.fixture(autouse=True)
+    def reset_mock_request(self, mock_request, api_client):
+        """Forget calls, responses, errors and circuit state left by the previous test."""
+        mock_request.reset_mock(return_value=True, side_effect=True)
+        api_client._breaker.reset()
     
-    def test_init(self):
+    def test_init(self, api_client):
         """Test InfrastructureAPI initialization."""
-        assert self.api_client.base_url == self.base_url
-        assert self.api_client.timeout == 30
-        assert self.api_client.max_retries == 3
-        assert self.api_client.session is not None
+        assert api_client.base_url == BASE_URL
+        assert api_client.timeout == 30
+        assert api_client.max_retries == 3
+        assert api_client.session is not None
     
     def test_init_with_custom_params(self):
         """Test InfrastructureAPI initialization with custom parameters."""
         api_client = InfrastructureAPI(
             base_url="http://example.com/",
             timeout=60,
-            max_retries=5
+            max_retries=5,
+            pool_maxsize=32
         )
         assert api_client.base_url == "http://example.com"
         assert api_client.timeout == 60
         assert api_client.max_retries == 5
+        assert api_client.session.get_adapter("http://example.com")._pool_maxsize == 32
     
-    @patch('sync_service.clients.infrastructure_api.requests.Session.request')
-    def test_update_permissions_success(self, mock_request):
+    def test_update_permissions_success(self, mock_request, api_client):
         """Test successful permissions update."""
-        # Mock response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "file_path": "/test/file.txt",
-            "permissions": "rw-r--r--",
-            "owner": "user",
-            "group": "users",
-            "last_updated": "2023-01-01T12:00:00"
-        }
-        mock_response.raise_for_status.return_value = None
-        mock_request.return_value = mock_response
+        mock_request.return_value = fake_response(_PERMISSIONS_RESPONSE)
         
         # Test the method
-        result = self.api_client.update_permissions("/test/file.txt")
+        result = api_client.update_permissions("/test/file.txt")
         
         # Verify the call
         mock_request.assert_called_once()
         call_args = mock_request.call_args
         assert call_args[1]['method'] == 'POST'
-        assert call_args[1]['url'] == f"{self.base_url}/updatePermissions"
+        assert call_args[1]['url'] == f"{BASE_URL}/updatePermissions"
         assert call_args[1]['data'] == {"file_path": "/test/file.txt"}
         
         # Verify the result
         assert result["file_path"] == "/test/file.txt"
         assert result["permissions"] == "rw-r--r--"
     
-    def test_update_permissions_empty_path(self):
-        """Test update_permissions with empty file path."""
-        with pytest.raises(ValueError, match="file_path cannot be empty"):
-            self.api_client.update_permissions("")
+    def test_get_permissions_bulk_success(self, mock_request, api_client):
+        """Test fetching permissions for many files with one request."""
+        mock_request.return_value = fake_response(_PERMISSIONS_BULK_RESPONSE)
+        
+        result = api_client.get_permissions_bulk(["/test/a.txt", "/test/b.sh"])
+        
+        mock_request.assert_called_once()
+        call_args = mock_request.call_args
+        assert call_args[1]['url'] == f"{BASE_URL}/updatePermissionsBulk"
+        assert call_args[1]['json'] == {"file_paths": ["/test/a.txt", "/test/b.sh"]}
+        assert result["/test/b.sh"]["permissions"] == "rwxr-xr-x"
+        
+        # No request is needed for an empty batch
+        assert api_client.get_permissions_bulk([]) == {}
+        mock_request.assert_called_once()
+    
+    @pytest.mark.parametrize("method,args,kwargs,match", [
+        ("update_permissions", ("",), {}, "file_path cannot be empty"),
+        ("save_to_disk", ("create", "", b"test"), {}, "file_path cannot be empty"),
+        ("save_to_disk", ("create", "/test/file.txt", None), {}, "create operation requires file_stream"),
+        ("get_pub_sub_events", (), {"count": 0}, "count must be between 1 and 100"),
+        ("get_pub_sub_events", (), {"count": 101}, "count must be between 1 and 100"),
+        ("report_results", ({},), {}, "results cannot be empty"),
+    ], ids=["permissions_empty_path", "save_empty_path", "save_none_stream",
+            "events_count_too_low", "events_count_too_high", "report_empty_results"])
+    def test_invalid_arguments(self, mock_request, api_client, method, args, kwargs, match):
+        """Test that invalid arguments are rejected before any request is made."""
+        with pytest.raises(ValueError, match=match):
+            getattr(api_client, method)(*args, **kwargs)
+        
+        mock_request.assert_not_called()
     
-    @patch('sync_service.clients.infrastructure_api.requests.Session.request')
-    def test_save_to_disk_success(self, mock_request):
+    def test_save_to_disk_success(self, mock_request, api_client, bytes_stream):
         """Test successful file save to disk."""
-        # Mock response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "internal_id": "12345-abcde",
-            "file_path": "/test/file.txt",
-            "operation": "create",
-            "size": 1024,
-            "saved_at": "2023-01-01T12:00:00",
-            "status": "success"
-        }
-        mock_response.raise_for_status.return_value = None
-        mock_request.return_value = mock_response
+        mock_request.return_value = fake_response(_SAVE_RESPONSE)
         
         # Create test file stream
         file_content = b"test file content"
-        file_stream = io.BytesIO(file_content)
+        file_stream = bytes_stream(file_content)
         
         # Test the method
-        result = self.api_client.save_to_disk(
+        result = api_client.save_to_disk(
             operation="create",
             file_path="/test/file.txt",
             file_stream=file_stream,
@@ -110,64 +209,99 @@ class TestInfrastructureAPI:
         mock_request.assert_called_once()
         call_args = mock_request.call_args
         assert call_args[1]['method'] == 'POST'
-        assert call_args[1]['url'] == f"{self.base_url}/saveToDisk"
-        assert call_args[1]['data']['operation'] == "create"
-        assert call_args[1]['data']['file_path'] == "/test/file.txt"
-        assert call_args[1]['data']['size'] == str(len(file_content))
-        assert call_args[1]['data']['file_type'] == "text/plain"
-        assert 'files' in call_args[1]
+        assert call_args[1]['url'] == f"{BASE_URL}/saveToDisk"
+        body = call_args[1]['data']
+        assert call_args[1]['headers']['Content-Type'] == body.content_type
+        encoded = b"".join(body)
+        assert len(encoded) == len(body)
+        assert b'name="operation"\r\n\r\ncreate\r\n' in encoded
+        assert b'name="file_path"\r\n\r\n/test/file.txt\r\n' in encoded
+        assert f'name="size"\r\n\r\n{len(file_content)}\r\n'.encode() in encoded
+        assert b'name="file_type"\r\n\r\ntext/plain\r\n' in encoded
+        assert b'filename="/test/file.txt"\r\nContent-Type: text/plain\r\n\r\n' + file_content in encoded
         
         # Verify the result
         assert result["internal_id"] == "12345-abcde"
         assert result["status"] == "success"
     
-    def test_save_to_disk_empty_path(self):
-        """Test save_to_disk with empty file path."""
-        file_stream = io.BytesIO(b"test")
-        with pytest.raises(ValueError, match="file_path cannot be empty"):
-            self.api_client.save_to_disk("create", "", file_stream)
+    def test_save_to_disk_streams_file_content(self, mock_request, api_client, bytes_stream):
+        """Test that uploads read the file stream in chunks only when the body is sent."""
+        mock_request.return_value = fake_response(_SAVE_RESPONSE)
+        file_stream = Mock(wraps=bytes_stream(b"x" * 65536 + b"y" * 65536))
+        
+        api_client.save_to_disk(
+            operation="update",
+            file_path="/test/large.bin",
+            file_stream=file_stream,
+            size=2 * 65536
+        )
+        
+        body = mock_request.call_args[1]['data']
+        file_stream.read.assert_not_called()
+        
+        chunks = list(body)
+        assert [len(chunk) for chunk in chunks[1:-1]] == [65536, 65536]
+        assert sum(map(len, chunks)) == len(body)
+        
+        # A retry iterates the body again and must resend the whole content
+        assert b"".join(body) == b"".join(chunks)
+    
+    def test_save_to_disk_non_seekable_stream(self, mock_request, api_client):
+        """Test uploading an S3 response body, which cannot seek, with the listed size."""
+        mock_request.return_value = fake_response(_SAVE_RESPONSE)
+        file_stream = StreamingBody(io.BytesIO(b"abc"), 3)
+        
+        api_client.save_to_disk(
+            operation="create",
+            file_path="/test/file.txt",
+            file_stream=file_stream,
+            size=3
+        )
+        
+        body = mock_request.call_args[1]['data']
+        encoded = b"".join(body)
+        assert len(encoded) == len(body)
+        assert b"\r\n\r\nabc\r\n--" in encoded
+    
+    def test_save_to_disk_unknown_stream_length(self, mock_request, api_client):
+        """Test that a non-seekable stream without a size is rejected before sending."""
+        file_stream = StreamingBody(io.BytesIO(b"abc"), 3)
+        
+        with pytest.raises(InfrastructureAPIError, match="size is required"):
+            api_client.save_to_disk(operation="create", file_path="/test/file.txt",
+                                    file_stream=file_stream)
+        
+        mock_request.assert_not_called()
     
-    def test_save_to_disk_none_stream(self):
-        """Test save_to_disk with None file stream for create operation."""
-        with pytest.raises(ValueError, match="create operation requires file_stream"):
-            self.api_client.save_to_disk("create", "/test/file.txt", None)
+    def test_save_to_disk_sends_stream_from_current_position(self, mock_request, api_client,
+                                                             bytes_stream):
+        """Test that a seekable stream is sent, and resent, from where it was positioned."""
+        mock_request.return_value = fake_response(_SAVE_RESPONSE)
+        file_stream = bytes_stream(b"skipcontent")
+        file_stream.seek(4)
+        
+        api_client.save_to_disk(operation="create", file_path="/test/file.txt",
+                                file_stream=file_stream)
+        
+        body = mock_request.call_args[1]['data']
+        for _ in range(2):
+            encoded = b"".join(body)
+            assert len(encoded) == len(body)
+            assert b"\r\n\r\ncontent\r\n--" in encoded
+            assert b"skip" not in encoded
     
-    @patch('sync_service.clients.infrastructure_api.requests.Session.request')
-    def test_get_pub_sub_events_success(self, mock_request):
+    def test_get_pub_sub_events_success(self, mock_request, api_client):
         """Test successful pub/sub events retrieval."""
-        # Mock response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "events": [
-                {
-                    "event_type": "create",
-                    "file_path": "/test/file1.txt",
-                    "new_path": None,
-                    "metadata": {"size": 1024},
-                    "timestamp": "2023-01-01T12:00:00"
-                },
-                {
-                    "event_type": "rename",
-                    "file_path": "/test/file2.txt",
-                    "new_path": "/test/file2_renamed.txt",
-                    "metadata": None,
-                    "timestamp": "2023-01-01T12:30:00"
-                }
-            ],
-            "total_count": 2
-        }
-        mock_response.raise_for_status.return_value = None
-        mock_request.return_value = mock_response
+        mock_request.return_value = fake_response(_EVENTS_RESPONSE)
         
         # Test the method
-        result = self.api_client.get_pub_sub_events(count=5)
+        result = api_client.get_pub_sub_events(count=5)
         
         # Verify the call
         mock_request.assert_called_once()
         call_args = mock_request.call_args
         assert call_args[1]['method'] == 'GET'
-        assert call_args[1]['url'] == f"{self.base_url}/pubSubFullList"
+        assert call_args[1]['url'] == f"{BASE_URL}/pubSubFullList"
         assert call_args[1]['params'] == {"count": 5}
         
         # Verify the result
@@ -178,27 +312,9 @@ class TestInfrastructureAPI:
         assert result[1].event_type == "rename"
         assert result[1].new_path == "/test/file2_renamed.txt"
     
-    def test_get_pub_sub_events_invalid_count(self):
-        """Test get_pub_sub_events with invalid count."""
-        with pytest.raises(ValueError, match="count must be between 1 and 100"):
-            self.api_client.get_pub_sub_events(count=0)
-        
-        with pytest.raises(ValueError, match="count must be between 1 and 100"):
-            self.api_client.get_pub_sub_events(count=101)
-    
-    @patch('sync_service.clients.infrastructure_api.requests.Session.request')
-    def test_report_results_success(self, mock_request):
+    def test_report_results_success(self, mock_request, api_client):
         """Test successful results reporting."""
-        # Mock response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "status": "received",
-            "message": "Sync results recorded successfully",
-            "timestamp": "2023-01-01T12:00:00"
-        }
-        mock_response.raise_for_status.return_value = None
-        mock_request.return_value = mock_response
+        mock_request.return_value = fake_response(_REPORT_RESPONSE)
         
         # Test data
         results = {
@@ -211,53 +327,108 @@ class TestInfrastructureAPI:
         }
         
         # Test the method
-        result = self.api_client.report_results(results)
+        result = api_client.report_results(results)
         
         # Verify the call
         mock_request.assert_called_once()
         call_args = mock_request.call_args
         assert call_args[1]['method'] == 'POST'
-        assert call_args[1]['url'] == f"{self.base_url}/reportResults"
+        assert call_args[1]['url'] == f"{BASE_URL}/reportResults"
         assert call_args[1]['json'] == results
         assert call_args[1]['headers']['Content-Type'] == "application/json"
         
         # Verify the result
         assert result["status"] == "received"
     
-    def test_report_results_empty_results(self):
-        """Test report_results with empty results."""
-        with pytest.raises(ValueError, match="results cannot be empty"):
-            self.api_client.report_results({})
-    
-    @patch('sync_service.clients.infrastructure_api.requests.Session.request')
-    def test_health_check_success(self, mock_request):
+    def test_health_check_success(self, mock_request, api_client):
         """Test successful health check."""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.raise_for_status.return_value = None
-        mock_request.return_value = mock_response
+        mock_request.return_value = fake_response()
         
-        result = self.api_client.health_check()
+        result = api_client.health_check()
         
         assert result is True
         mock_request.assert_called_once()
         call_args = mock_request.call_args
         assert call_args[1]['method'] == 'GET'
-        assert call_args[1]['url'] == f"{self.base_url}/"
+        assert call_args[1]['url'] == f"{BASE_URL}/"
     
-    @patch('sync_service.clients.infrastructure_api.requests.Session.request')
-    def test_health_check_failure(self, mock_request):
+    def test_health_check_failure(self, mock_request, api_client):
         """Test health check failure."""
         mock_request.side_effect = Exception("Connection failed")
         
-        result = self.api_client.health_check()
+        result = api_client.health_check()
         
         assert result is False
     
-    @patch('sync_service.clients.infrastructure_api.requests.Session.request')
-    def test_request_failure_raises_error(self, mock_request):
+    def test_request_failure_raises_error(self, mock_request, api_client):
         """Test that request failures raise InfrastructureAPIError."""
         mock_request.side_effect = Exception("Network error")
         
         with pytest.raises(InfrastructureAPIError, match="Failed to get/update permissions"):
-            self.api_client.update_permissions("/test/file.txt")
\ No newline at end of file
+            api_client.update_permissions("/test/file.txt")
+    
+    def test_circuit_opens_after_repeated_failures(self, mock_request, api_client):
+        """Test that requests fail fast without reaching the server once the circuit opens."""
+        mock_request.side_effect = requests.exceptions.ConnectionError("Connection refused")
+        
+        for _ in range(5):
+            with pytest.raises(InfrastructureAPIError, match="Connection refused"):
+                api_client.update_permissions("/test/file.txt")
+        
+        with pytest.raises(InfrastructureAPIError, match="Circuit open"):
+            api_client.update_permissions("/test/file.txt")
+        assert api_client.health_check() is False
+        assert mock_request.call_count == 5
+    
+    def test_circuit_half_open_probe(self, mock_request, api_client, monkeypatch):
+        """Test that one probe is let through after the reset timeout and closes the circuit."""
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: now[0])
+        monkeypatch.setattr(api_client, "_breaker", breaker)
+        mock_request.side_effect = requests.exceptions.ConnectionError("Connection refused")
+        
+        assert api_client.health_check() is False
+        assert api_client.health_check() is False
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        # A failed probe reopens the circuit for another full timeout
+        now[0] = 31.0
+        assert api_client.health_check() is False
+        assert mock_request.call_count == 3
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        now[0] = 45.0
+        assert api_client.health_check() is False
+        assert mock_request.call_count == 3
+        
+        # A successful probe closes it again
+        now[0] = 62.0
+        mock_request.side_effect = None
+        mock_request.return_value = fake_response()
+        assert api_client.health_check() is True
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.failure_count == 0
+    
+    def test_circuit_interrupted_probe_reopens(self, mock_request, api_client, monkeypatch):
+        """Test that a probe interrupted by a BaseException reopens the circuit instead of sticking half-open."""
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=lambda: now[0])
+        monkeypatch.setattr(api_client, "_breaker", breaker)
+        mock_request.side_effect = requests.exceptions.ConnectionError("Connection refused")
+        
+        assert api_client.health_check() is False
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        now[0] = 31.0
+        mock_request.side_effect = KeyboardInterrupt
+        with pytest.raises(KeyboardInterrupt):
+            api_client.health_check()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.opened_at == 31.0
+        
+        # Another probe is allowed after a fresh timeout
+        now[0] = 62.0
+        mock_request.side_effect = None
+        mock_request.return_value = fake_response()
+        assert api_client.health_check() is True
+        assert breaker.state == CircuitBreaker.CLOSED
@@ -5,13 +5,23 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from io import BytesIO
 from datetime import datetime
+from functools import partial
+import boto3
 from botocore.exceptions import ClientError
+from botocore.stub import Stubber
 
-from sync_service.clients.s3_manager import S3Manager, S3Object
+from sync_service.clients.s3_manager import (
+    S3Manager, S3Object, ObjectChangedError, MAX_RETRY_DELAY, RANGE_PART_SIZE
+)
 from sync_service.models.config import S3Config
 
 
-@pytest.fixture
+pytestmark = pytest.mark.unit
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture(scope="module")
 def customer_config():
     """Create a test customer S3 configuration."""
     return S3Config(
@@ -22,51 +32,73 @@ def customer_config():
     )
 
 
-@pytest.fixture
-def s3_manager(customer_config):
-    """Create a test S3Manager instance with mocked client."""
+@pytest.fixture(scope="module")
+def boto3_client():
+    """Patch boto3.client for the whole module; it returns one shared mock client."""
     with patch('sync_service.clients.s3_manager.boto3.client') as mock_boto3:
-        mock_customer_client = Mock()
-        mock_boto3.return_value = mock_customer_client
-        
-        manager = S3Manager(customer_config)
-        manager.customer_client = mock_customer_client
-        
-        return manager
+        mock_boto3.return_value = Mock()
+        yield mock_boto3
+
+
+@pytest.fixture(scope="module")
+def s3_manager(customer_config, boto3_client):
+    """Create one S3Manager for the module, backed by the mocked client."""
+    return S3Manager(customer_config)
+
+
+@pytest.fixture(autouse=True)
+def reset_customer_client(boto3_client):
+    """Give every test a clean mock client: no recorded calls, return values or side effects."""
+    boto3_client.return_value.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def stubbed_s3(s3_manager, customer_config, monkeypatch):
+    """
+    Swap in a real botocore client whose responses are queued with a Stubber.
+    
+    Yields the manager, the stubber and the list of retry delays, which are
+    recorded instead of slept.
+    """
+    client = boto3.session.Session().client(
+        's3',
+        endpoint_url=customer_config.endpoint,
+        aws_access_key_id=customer_config.access_key,
+        aws_secret_access_key=customer_config.secret_key,
+        region_name='us-east-1'
+    )
+    delays = []
+    monkeypatch.setattr(s3_manager, 'customer_client', client)
+    monkeypatch.setattr(s3_manager, '_retry_operation',
+                        partial(s3_manager._retry_operation, sleep=delays.append))
+    with Stubber(client) as stubber:
+        yield s3_manager, stubber, delays
 
 
 class TestS3Manager:
     """Test cases for S3Manager."""
     
-    def test_initialization(self, customer_config):
+    def test_initialization(self, s3_manager, customer_config, boto3_client):
         """Test S3Manager initialization."""
-        with patch('sync_service.clients.s3_manager.boto3.client') as mock_boto3:
-            mock_boto3.return_value = Mock()
-            
-            manager = S3Manager(customer_config)
-            
-            assert manager.customer_config == customer_config
-            assert mock_boto3.call_count == 1
-    
-    def test_list_objects_customer(self, s3_manager):
+        assert s3_manager.customer_config == customer_config
+        assert s3_manager.customer_client is boto3_client.return_value
+        assert boto3_client.call_count == 1
+    
+    def test_list_objects_customer(self, stubbed_s3):
         """Test listing objects from customer bucket."""
-        # Mock paginator response
-        mock_paginator = Mock()
-        mock_page_iterator = [
-            {
-                'Contents': [
-                    {
-                        'Key': 'test-file.txt',
-                        'Size': 1024,
-                        'LastModified': datetime.now(),
-                        'ETag': '"abc123"',
-                        'StorageClass': 'STANDARD'
-                    }
-                ]
-            }
-        ]
-        mock_paginator.paginate.return_value = mock_page_iterator
-        s3_manager.customer_client.get_paginator.return_value = mock_paginator
+        s3_manager, stubber, _ = stubbed_s3
+        stubber.add_response('list_objects_v2', {
+            'Contents': [
+                {
+                    'Key': 'test-file.txt',
+                    'Size': 1024,
+                    'LastModified': NOW,
+                    'ETag': '"abc123"',
+                    'StorageClass': 'STANDARD'
+                }
+            ],
+            'IsTruncated': False
+        }, {'Bucket': 'customer-bucket'})
         
         objects = list(s3_manager.list_objects())
         
@@ -74,6 +106,65 @@ class TestS3Manager:
         assert objects[0].key == 'test-file.txt'
         assert objects[0].size == 1024
         assert objects[0].etag == 'abc123'
+        assert objects[0].last_modified == NOW
+        stubber.assert_no_pending_responses()
+    
+    def test_list_objects_empty_bucket(self, stubbed_s3):
+        """Test listing an empty bucket, whose page carries no Contents."""
+        s3_manager, stubber, _ = stubbed_s3
+        stubber.add_response('list_objects_v2', {'IsTruncated': False, 'KeyCount': 0})
+        
+        assert list(s3_manager.list_objects()) == []
+    
+    def test_list_objects_many_pages(self, stubbed_s3):
+        """Test listing yields every key across pages as compact S3Objects."""
+        s3_manager, stubber, _ = stubbed_s3
+        first_page, last_page = [
+            {
+                'Contents': [
+                    {'Key': f'k{i}', 'Size': i, 'LastModified': NOW, 'ETag': f'"e{i}"'}
+                    for i in range(start, start + 500)
+                ],
+                'IsTruncated': False
+            }
+            for start in (0, 500)
+        ]
+        first_page.update(IsTruncated=True, NextContinuationToken='token-1')
+        stubber.add_response('list_objects_v2', first_page, {'Bucket': 'customer-bucket'})
+        stubber.add_response('list_objects_v2', last_page,
+                             {'Bucket': 'customer-bucket', 'ContinuationToken': 'token-1'})
+        
+        objects = list(s3_manager.list_objects())
+        
+        assert [obj.key for obj in objects] == [f'k{i}' for i in range(1000)]
+        assert objects[-1].size == 999
+        assert objects[-1].etag == 'e999'
+        assert objects[-1].storage_class == 'STANDARD'
+        assert not hasattr(objects[0], '__dict__')
+        stubber.assert_no_pending_responses()
+    
+    def test_list_objects_retries_failed_page(self, stubbed_s3):
+        """Test a failing page request is retried without restarting or repeating the listing."""
+        s3_manager, stubber, delays = stubbed_s3
+        page = {
+            'Contents': [{'Key': 'a.txt', 'Size': 1, 'LastModified': NOW, 'ETag': '"a"'}],
+            'IsTruncated': True,
+            'NextContinuationToken': 'token-1'
+        }
+        stubber.add_response('list_objects_v2', page, {'Bucket': 'customer-bucket'})
+        for _ in range(2):
+            stubber.add_client_error('list_objects_v2', service_error_code='InternalError',
+                                     http_status_code=500)
+        stubber.add_response('list_objects_v2', {
+            'Contents': [{'Key': 'b.txt', 'Size': 2, 'LastModified': NOW, 'ETag': '"b"'}],
+            'IsTruncated': False
+        }, {'Bucket': 'customer-bucket', 'ContinuationToken': 'token-1'})
+        
+        objects = list(s3_manager.list_objects())
+        
+        assert [obj.key for obj in objects] == ['a.txt', 'b.txt']
+        assert len(delays) == 2
+        stubber.assert_no_pending_responses()
     
     def test_get_object_stream(self, s3_manager):
         """Test getting object stream."""
@@ -87,11 +178,110 @@ class TestS3Manager:
             Bucket='customer-bucket', Key='test-key'
         )
     
+    def test_download_object(self, s3_manager):
+        """Test downloading object content into an exact-size buffer."""
+        s3_manager.customer_client.get_object.return_value = {'Body': BytesIO(b'test content')}
+        
+        content = s3_manager.download_object('test-key', size=12, chunk_size=5)
+        
+        assert content == b'test content'
+    
+    def test_download_object_size_mismatch(self, s3_manager):
+        """Test downloading an object whose size changed since listing."""
+        s3_manager.customer_client.get_object.return_value = {'Body': BytesIO(b'test content')}
+        assert s3_manager.download_object('test-key', size=4) == b'test content'
+        
+        s3_manager.customer_client.get_object.return_value = {'Body': BytesIO(b'test')}
+        assert s3_manager.download_object('test-key', size=12) == b'test'
+    
+    def test_get_object_ranged(self, s3_manager):
+        """Test downloading an object as concurrent byte ranges of one version."""
+        content = bytes(range(256)) * 40
+        
+        def get_object(Bucket, Key, Range, IfMatch=None):
+            start, end = map(int, Range[len('bytes='):].split('-'))
+            return {
+                'Body': BytesIO(content[start:end + 1]),
+                'ContentRange': f'bytes {start}-{end}/{len(content)}',
+                'ETag': '"v1"'
+            }
+        
+        s3_manager.customer_client.get_object.side_effect = get_object
+        
+        result = s3_manager.get_object_ranged('test-key', len(content), part_size=1000, workers=4)
+        
+        assert result == content
+        calls = s3_manager.customer_client.get_object.call_args_list
+        assert len(calls) == 11
+        # The first part pins the version every other part must match
+        assert 'IfMatch' not in calls[0].kwargs
+        assert all(call.kwargs['IfMatch'] == '"v1"' for call in calls[1:])
+    
+    def test_get_object_ranged_uses_listed_etag(self, s3_manager):
+        """Test every range request matches the ETag the object was listed with."""
+        s3_manager.customer_client.get_object.side_effect = lambda **kwargs: {
+            'Body': BytesIO(b'x' * 50), 'ContentRange': 'bytes 0-49/100'
+        }
+        
+        s3_manager.get_object_ranged('test-key', 100, etag='abc123', part_size=50)
+        
+        calls = s3_manager.customer_client.get_object.call_args_list
+        assert [call.kwargs['IfMatch'] for call in calls] == ['"abc123"', '"abc123"']
+    
+    def test_get_object_ranged_overwritten(self, s3_manager):
+        """Test ranged download fails when the object is overwritten between parts."""
+        responses = iter([
+            {'Body': BytesIO(b'x' * 50), 'ContentRange': 'bytes 0-49/100', 'ETag': '"v1"'},
+            ClientError({'Error': {'Code': 'PreconditionFailed'}}, 'GetObject')
+        ])
+        
+        def get_object(**kwargs):
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        
+        s3_manager.customer_client.get_object.side_effect = get_object
+        
+        with pytest.raises(ObjectChangedError, match="overwritten"):
+            s3_manager.get_object_ranged('test-key', 100, part_size=50)
+        assert s3_manager.customer_client.get_object.call_count == 2
+    
+    def test_get_object_ranged_size_changed(self, s3_manager):
+        """Test ranged download fails when the object's size differs from the listing."""
+        s3_manager.customer_client.get_object.return_value = {
+            'Body': BytesIO(b'x' * 50), 'ContentRange': 'bytes 0-49/120'
+        }
+        
+        with pytest.raises(ObjectChangedError, match="120 bytes, expected 100"):
+            s3_manager.get_object_ranged('test-key', 100, part_size=50)
+    
+    def test_get_object_ranged_short_read(self, s3_manager):
+        """Test ranged download fails when a range comes back short."""
+        s3_manager.customer_client.get_object.return_value = {'Body': BytesIO(b'short')}
+        
+        with pytest.raises(IOError):
+            s3_manager.get_object_ranged('test-key', 100, part_size=50)
+    
+    def test_download_object_changed_during_ranged_download(self, s3_manager, monkeypatch):
+        """Test a large object that changed since listing is downloaded whole instead."""
+        monkeypatch.setattr(s3_manager, 'get_object_ranged',
+                            Mock(side_effect=ObjectChangedError("changed")))
+        s3_manager.customer_client.get_object.return_value = {'Body': BytesIO(b'new content')}
+        
+        content = s3_manager.download_object('test-key', size=RANGE_PART_SIZE, etag='abc123')
+        
+        assert content == b'new content'
+        s3_manager.get_object_ranged.assert_called_once_with('test-key', RANGE_PART_SIZE, etag='abc123')
+        s3_manager.customer_client.get_object.assert_called_once_with(
+            Bucket='customer-bucket', Key='test-key'
+        )
+    
     def test_get_object_metadata(self, s3_manager):
         """Test getting object metadata."""
         mock_response = {
             'ContentLength': 1024,
-            'LastModified': datetime.now(),
+            'LastModified': NOW,
             'ETag': '"abc123"',
             'ContentType': 'text/plain',
             'Metadata': {'custom': 'value'},
@@ -102,6 +292,7 @@ class TestS3Manager:
         metadata = s3_manager.get_object_metadata('test-key')
         
         assert metadata['size'] == 1024
+        assert metadata['last_modified'] == NOW
         assert metadata['etag'] == 'abc123'
         assert metadata['content_type'] == 'text/plain'
         assert metadata['metadata'] == {'custom': 'value'}
@@ -112,7 +303,7 @@ class TestS3Manager:
         """Test checking if object exists (exists)."""
         mock_response = {
             'ContentLength': 1024,
-            'LastModified': datetime.now(),
+            'LastModified': NOW,
             'ETag': '"abc123"'
         }
         s3_manager.customer_client.head_object.return_value = mock_response
@@ -151,22 +342,36 @@ class TestS3Manager:
             'success'
         ]
         
-        with patch('time.sleep'):  # Mock sleep to speed up test
-            result = s3_manager._retry_operation(operation, max_retries=3)
+        delays = []
+        
+        result = s3_manager._retry_operation(operation, max_retries=3, sleep=delays.append, rand=lambda: 0.5)
         
         assert result == 'success'
         assert operation.call_count == 3
+        assert delays == [1.25, 2.5]
     
     def test_retry_operation_max_retries_exceeded(self, s3_manager):
         """Test retry operation fails after max retries."""
         operation = Mock()
         operation.side_effect = ClientError({'Error': {'Code': '500'}}, 'TestOperation')
         
-        with patch('time.sleep'):  # Mock sleep to speed up test
-            with pytest.raises(ClientError):
-                s3_manager._retry_operation(operation, max_retries=2)
+        sleep = Mock()
+        
+        with pytest.raises(ClientError):
+            s3_manager._retry_operation(operation, max_retries=2, sleep=sleep)
         
         assert operation.call_count == 2
+        assert sleep.call_count == 1
+    
+    def test_retry_operation_backoff_is_capped(self, s3_manager):
+        """Test retry backoff never exceeds the maximum delay."""
+        operation = Mock(side_effect=ClientError({'Error': {'Code': '500'}}, 'TestOperation'))
+        delays = []
+        
+        with pytest.raises(ClientError):
+            s3_manager._retry_operation(operation, max_retries=7, sleep=delays.append, rand=lambda: 1.0)
+        
+        assert delays == [1.5, 3.0, 6.0, 12.0, 24.0, MAX_RETRY_DELAY]
     
     def test_test_connection_success(self, s3_manager):
         """Test connection testing when it succeeds."""
@@ -190,18 +395,17 @@ class TestS3Object:
     
     def test_s3_object_creation(self):
         """Test S3Object creation."""
-        now = datetime.now()
         obj = S3Object(
             key='test-key',
             size=1024,
-            last_modified=now,
+            last_modified=NOW,
             etag='abc123',
             storage_class='STANDARD'
         )
         
         assert obj.key == 'test-key'
         assert obj.size == 1024
-        assert obj.last_modified == now
+        assert obj.last_modified == NOW
         assert obj.etag == 'abc123'
         assert obj.storage_class == 'STANDARD'
     
@@ -210,7 +414,7 @@ class TestS3Object:
         obj = S3Object(
             key='test-key',
             size=1024,
-            last_modified=datetime.now(),
+            last_modified=NOW,
             etag='abc123'
         )
         